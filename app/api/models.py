@@ -1,11 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class UserProfile(BaseModel):
     interests: str
     skills: str
     age: int
     education_level_id: int
+    # Optional filters: careers with a lower (or unknown) median wage / growth are excluded
+    min_salary: Optional[int] = Field(None, ge=0)
+    min_growth: Optional[float] = None
 
 class CareerRecommendation(BaseModel):
     id: str
@@ -13,7 +16,35 @@ class CareerRecommendation(BaseModel):
     match_score: float
     education_requirement: str
     description: str
+    median_wage: Optional[int] = None
+    growth_pct: Optional[float] = None
 
 class RecommendationResponse(BaseModel):
     user_summary: str
-    recommendations: List[CareerRecommendation]
\ No newline at end of file
+    recommendations: List[CareerRecommendation]
+    index_version: Optional[str] = None
+
+class BatchRecommendationRequest(BaseModel):
+    profiles: List[UserProfile]
+    include_advice: bool = True
+    top_k: int = Field(5, ge=1, le=50)
+
+class BatchRecommendationItem(BaseModel):
+    user_summary: Optional[str] = None
+    recommendations: List[CareerRecommendation]
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchRecommendationItem]
+    index_version: Optional[str] = None
+
+class RelatedCareersResponse(BaseModel):
+    id: str
+    title: str
+    related: List[CareerRecommendation]
+    index_version: Optional[str] = None
+
+class ReloadResponse(BaseModel):
+    reloaded: bool
+    version: Optional[str] = None
+    previous_version: Optional[str] = None
+    detail: Optional[str] = None
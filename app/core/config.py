@@ -14,12 +14,102 @@ class Settings(BaseSettings):
     # File Names
     RAW_DATA_FILE: str = "Occupation Data.txt"
     RAW_SKILLS_FILE: str = "Skills.txt"
-    PROCESSED_DATA_FILE: str = "career_gold_dataset.csv"
+    # Median wage + projected growth per occupation (mock data: `python generate_wages.py`)
+    WAGES_FILE: str = "Wages and Employment.txt"
+    PROCESSED_DATA_FILE: str = "career_gold_dataset.csv"  # optional CSV export / legacy input
+    PROCESSED_PARQUET_FILE: str = "career_gold_dataset.parquet"
     EMBEDDINGS_FILE: str = "career_embeddings.npy"
+    # Memory-mapped local index store built by the indexer (defaults to DATA_DIR/local_index)
+    LOCAL_INDEX_DIR: str | None = None
+    # IVF approximate search for the local index: built with the store once it has
+    # at least LOCAL_ANN_MIN_SIZE vectors (NLIST defaults to ~sqrt(count)).
+    LOCAL_ANN_ENABLED: bool = True
+    LOCAL_ANN_MIN_SIZE: int = 20000
+    LOCAL_ANN_NLIST: int | None = None
+    LOCAL_ANN_NPROBE: int = 16
+    # Compressed local vectors for first-pass scoring ("float32" = off, "float16", "int8");
+    # the best top_k * LOCAL_RESCORE_OVERSAMPLING candidates are rescored exactly
+    LOCAL_VECTOR_DTYPE: str = "float32"
+    LOCAL_RESCORE_OVERSAMPLING: int = 4
+    # Precomputed related-careers table (0 = off), built with the store for catalogs
+    # up to LOCAL_NEIGHBORS_MAX_JOBS using at most LOCAL_NEIGHBORS_MEMORY_MB of scores
+    LOCAL_NEIGHBORS_K: int = 10
+    LOCAL_NEIGHBORS_MEMORY_MB: int = 256
+    LOCAL_NEIGHBORS_MAX_JOBS: int = 50000
+    # Poll the local index store every N seconds and hot-reload it when rebuilt (0 = off)
+    INDEX_WATCH_INTERVAL: float = 30.0
+    # Token for the /api/admin/* endpoints (sent as X-Admin-Token); unset disables them
+    ADMIN_TOKEN: str | None = None
     # Qdrant settings (cloud or local)
     QDRANT_URL: str | None = None
     QDRANT_API_KEY: str | None = None
     QDRANT_LOCAL_PATH: str = os.path.join(DATA_DIR, "qdrant_db")
+    QDRANT_TIMEOUT: int = 5
+    # Circuit breaker: route to the local index after N consecutive failures
+    QDRANT_FAILURE_THRESHOLD: int = 3
+    QDRANT_COOLDOWN_SECONDS: float = 30.0
+    # Scalar quantization of the Qdrant collection ("int8" or None), with exact
+    # rescoring of QDRANT_OVERSAMPLING x limit candidates at query time
+    QDRANT_QUANTIZATION: str | None = None
+    QDRANT_OVERSAMPLING: float = 2.0
+
+    # Sentence encoder shared by the engine and the indexer (app/services/encoder.py):
+    # "float32", or "int8" for dynamically quantized Linear layers. Max sequence
+    # length defaults to the model's own (256 tokens for MiniLM); torch threads
+    # are set by TORCH_NUM_THREADS below.
+    ENCODER_BACKEND: str = "float32"
+    ENCODER_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    ENCODER_MAX_SEQ_LENGTH: int | None = None
+
+    # Query embedding cache (TTL in seconds, 0 = never expire)
+    EMBEDDING_CACHE_SIZE: int = 2048
+    EMBEDDING_CACHE_TTL: int = 3600
+
+    # Micro-batching of concurrent query encodes
+    ENCODE_BATCHING_ENABLED: bool = True
+    ENCODE_MAX_BATCH_SIZE: int = 32
+    ENCODE_MAX_WAIT_MS: float = 3.0
+
+    # Async request path: encode threads (used when batching is off) and LLM timeout
+    ENCODE_EXECUTOR_WORKERS: int = 2
+    ADVISOR_TIMEOUT: float = 15.0
+
+    # Advisor LLM and its response cache (memory LRU + optional disk tier under DATA_DIR)
+    ADVISOR_MODEL: str = "gpt-3.5-turbo"
+    ADVICE_CACHE_SIZE: int = 1024
+    ADVICE_CACHE_TTL: int = 86400
+    ADVICE_DISK_CACHE_ENABLED: bool = False
+    ADVICE_DISK_CACHE_DIR: str | None = None  # defaults to DATA_DIR/advice_cache
+    ADVICE_DISK_CACHE_MAX_ENTRIES: int = 50000
+
+    # Whole /api/recommend responses, keyed by profile + index version + top_k and
+    # bounded by entries and bytes, with an optional disk tier under DATA_DIR.
+    # RESPONSE_CACHE_MAX_AGE is the Cache-Control max-age of GET responses.
+    RESPONSE_CACHE_SIZE: int = 2048
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_TTL: int = 3600
+    RESPONSE_DISK_CACHE_ENABLED: bool = False
+    RESPONSE_DISK_CACHE_DIR: str | None = None  # defaults to DATA_DIR/response_cache
+    RESPONSE_DISK_CACHE_MAX_ENTRIES: int = 50000
+    RESPONSE_CACHE_MAX_AGE: int = 300
+
+    # Upper bound on profiles accepted by POST /api/recommend/batch, and on the
+    # advisor calls one batch request keeps in flight when include_advice is set
+    BATCH_MAX_PROFILES: int = 1000
+    BATCH_ADVICE_CONCURRENCY: int = 8
+
+    # Instrumentation: one timing line per request, and cProfile for a sample of requests
+    LOG_REQUEST_TIMINGS: bool = True
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_DIR: str = os.path.join(BASE_DIR, "profiles")
+
+    # Gunicorn workers (gunicorn.conf.py). With PRELOAD_ENGINE the master loads the
+    # model and index once and workers share them copy-on-write after fork.
+    # TORCH_NUM_THREADS is the encoder's thread count per process (default under
+    # gunicorn: cores / workers; otherwise torch's own default).
+    WEB_CONCURRENCY: int = 1
+    PRELOAD_ENGINE: bool = False
+    TORCH_NUM_THREADS: int | None = None
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,341 @@
+"""
+Low-overhead request instrumentation.
+
+- `Histogram` / `Counter`: labelled, thread-safe, rendered in the Prometheus
+  text format by `render()` (served at /metrics).
+- `stage(name)`: times a block into the per-stage histogram and the current
+  request's breakdown.
+- `MetricsMiddleware`: assigns a request ID (X-Request-ID), records request
+  latency by route and serving backend, logs a one-line stage summary and
+  runs the optional profiling hook.
+"""
+import contextvars
+import cProfile
+import functools
+import inspect
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+_collectors = []
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "career_request_duration_seconds", "HTTP request latency", ("method", "route", "status", "backend")
+)
+STAGE_SECONDS = Histogram(
+    "career_stage_duration_seconds",
+    "Latency of request stages (encode, vector_query, local_scoring, advisor, serialization)",
+    ("stage", "backend"),
+)
+SEARCH_FALLBACKS = Counter(
+    "career_search_fallbacks_total", "Searches served locally although Qdrant is configured", ("reason",)
+)
+
+
+def register_collector(collect):
+    """Add a callable returning extra exposition lines, evaluated at scrape time."""
+    _collectors.append(collect)
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            lines.extend(collect())
+        except Exception as e:
+            lines.append(f"# collector error: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def cache_counter_lines(caches):
+    """Exposition lines for cache hit/miss/eviction counts from `{name: stats dict}`."""
+    lines = [
+        "# HELP career_cache_events_total Cache lookups and evictions",
+        "# TYPE career_cache_events_total counter",
+    ]
+    for name, stats in caches.items():
+        if not stats:
+            continue
+        for event, field in (("hit", "hits"), ("miss", "misses"), ("eviction", "evictions")):
+            lines.append(f'career_cache_events_total{{cache="{name}",event="{event}"}} {stats[field]}')
+    return lines
+
+
+# --- Per-request context ---
+
+class RequestContext:
+    __slots__ = ("request_id", "backend", "stages", "handler_done")
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.backend = None
+        self.stages = {}
+        self.handler_done = None
+
+
+_current = contextvars.ContextVar("request_context", default=None)
+_SAFE_REQUEST_ID = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def current_request():
+    return _current.get()
+
+
+def request_tag():
+    """'[req=<id>] ' inside a request, '' outside; prefix for log lines."""
+    ctx = _current.get()
+    return f"[req={ctx.request_id}] " if ctx is not None else ""
+
+
+def set_backend(backend):
+    """Record which search backend served the current request."""
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.backend = backend
+
+
+def record_stage(name, seconds):
+    ctx = _current.get()
+    backend = ctx.backend if ctx is not None and ctx.backend else ""
+    STAGE_SECONDS.observe(seconds, stage=name, backend=backend)
+    if ctx is not None:
+        ctx.stages[name] = ctx.stages.get(name, 0.0) + seconds
+
+
+class stage:
+    """`with stage("encode"): ...` times the block (a class, cheaper than @contextmanager)."""
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+# --- Profiling hook ---
+
+# One cProfile profiler per process: a second one would replace the first's hook
+_profiling = threading.Lock()
+
+
+def cprofile_sampler(rate, directory):
+    """
+    Profile hook that runs `rate` of requests under cProfile and dumps a .prof
+    file per sampled request.
+
+    A profile covers the whole process's event loop, not just its request:
+    whatever the loop runs while the request is in flight (other requests
+    included) is in it, while work that sync endpoints run in the threadpool
+    is not. Only one profiler runs at a time; a request sampled while another
+    is being profiled is skipped.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def profile(ctx, scope):
+        if not _profiling.acquire(blocking=False):
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                route = scope["path"].strip("/").replace("/", "_") or "root"
+                profiler.dump_stats(os.path.join(directory, f"{int(time.time())}-{route}-{ctx.request_id}.prof"))
+        finally:
+            _profiling.release()
+
+    def hook(ctx, scope):
+        return profile(ctx, scope) if random.random() < rate else None
+
+    return hook
+
+
+_profile_hook = None
+
+
+def set_profile_hook(hook):
+    """Install `hook(ctx, scope) -> context manager | None`, called once per request."""
+    global _profile_hook
+    _profile_hook = hook
+
+
+if settings.PROFILE_SAMPLE_RATE > 0:
+    set_profile_hook(cprofile_sampler(settings.PROFILE_SAMPLE_RATE, settings.PROFILE_DIR))
+
+
+# --- ASGI integration ---
+
+class MetricsRoute(APIRoute):
+    """Route class that marks when the endpoint returns, so response serialization is timed separately."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _mark_handler_done(endpoint), **kwargs)
+
+
+def _mark_handler_done(endpoint):
+    def mark(result):
+        # A Response is sent as-is; handlers that build one time their own
+        # serialization, so the gap before the first byte is not counted
+        if isinstance(result, Response):
+            return
+        ctx = _current.get()
+        if ctx is not None:
+            ctx.handler_done = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            mark(result)
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            result = endpoint(*args, **kwargs)
+            mark(result)
+            return result
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                # Client IDs end up in log lines and profile file names: keep them tame
+                request_id = _SAFE_REQUEST_ID.sub("", value.decode("latin-1"))[:64] or None
+                break
+        ctx = RequestContext(request_id or uuid.uuid4().hex[:12])
+        token = _current.set(ctx)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if ctx.handler_done is not None:
+                    record_stage("serialization", time.perf_counter() - ctx.handler_done)
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", ctx.request_id.encode("latin-1"))]
+            await send(message)
+
+        profiler = _profile_hook(ctx, scope) if _profile_hook else None
+        try:
+            if profiler is None:
+                await self.app(scope, receive, send_with_id)
+            else:
+                with profiler:
+                    await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(
+                elapsed, method=scope["method"], route=route, status=status, backend=ctx.backend or ""
+            )
+            if settings.LOG_REQUEST_TIMINGS and route != "/metrics":
+                stages = " ".join(f"{k}={v * 1000:.1f}ms" for k, v in ctx.stages.items())
+                print(f"[req={ctx.request_id}] {scope['method']} {scope['path']} {status} "
+                      f"{elapsed * 1000:.1f}ms backend={ctx.backend or '-'} {stages}".rstrip())
+            _current.reset(token)
@@ -1,18 +1,40 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Header, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+from typing import Annotated
+import asyncio
+import json
+import secrets
 from fastapi.middleware.cors import CORSMiddleware
 from app.services.engine import CareerEngine
-from app.services.advisor import CareerAdvisor
-from app.api.models import UserProfile, RecommendationResponse
+from app.services.advisor import CareerAdvisor, ADVICE_ERROR_PREFIX
+from app.services.encoder import set_torch_threads
+from app.services.response_cache import ResponseCache, profile_key, etag_for, etag_matches
+from app.core.config import settings
+from app.core import metrics
+from app.core.metrics import MetricsMiddleware, MetricsRoute, request_tag, stage
+from app.api.models import (
+    UserProfile,
+    RecommendationResponse,
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    RelatedCareersResponse,
+    ReloadResponse,
+)
 
 service_container = {}
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting Server...")
+    if settings.TORCH_NUM_THREADS:
+        set_torch_threads(settings.TORCH_NUM_THREADS)
     # Initialize services but don't let failures prevent the app from starting.
     try:
-        service_container["engine"] = CareerEngine()
+        # Under gunicorn with PRELOAD_ENGINE the master already built it (see gunicorn.conf.py)
+        if service_container.get("engine") is None:
+            service_container["engine"] = CareerEngine()
+        service_container["engine"].start_index_watcher()
     except Exception as e:
         print(f"⚠️ Failed to initialize CareerEngine: {e}")
         service_container["engine"] = None
@@ -23,10 +45,18 @@ async def lifespan(app: FastAPI):
         print(f"⚠️ Failed to initialize CareerAdvisor: {e}")
         service_container["advisor"] = None
 
+    service_container["response_cache"] = ResponseCache() if settings.RESPONSE_CACHE_SIZE > 0 else None
+
     yield
     print("🛑 Shutting down...")
+    for service in service_container.values():
+        if service is not None:
+            await service.aclose()
 
 app = FastAPI(title="Career Compass AI", version="1.0", lifespan=lifespan)
+# Routes mark when their endpoint returns so response serialization is timed on its own
+app.router.route_class = MetricsRoute
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,44 +74,295 @@ def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "api_docs": "/docs",
-            "recommendations": "POST /api/recommend"
+            "recommendations": "POST /api/recommend",
+            "recommendations_get": "GET /api/recommend?interests=...&skills=...&age=...&education_level_id=...",
+            "batch_recommendations": "POST /api/recommend/batch",
+            "streaming_recommendations": "POST /api/recommend/stream",
+            "related_careers": "GET /api/careers/{soc_code}/related",
+            "reload_index": "POST /api/admin/reload"
         }
     }
 
-@app.post("/api/recommend", response_model=RecommendationResponse)
-def get_recommendations(user: UserProfile):
+# Summary for a profile whose filters (education, salary, growth) leave no careers
+NO_MATCHES_SUMMARY = (
+    "No careers match all of your filters. Try a lower minimum salary or growth, "
+    "or a higher education level."
+)
+
+
+def build_search_query(user: UserProfile) -> str:
+    return f"{user.interests}. My skills are: {user.skills}."
+
+
+async def recommend(user: UserProfile, if_none_match, cache_control):
+    """
+    Shared body of POST and GET /api/recommend. Complete responses are cached
+    by profile, index version and top_k; the ETag is a hash of the body, so a
+    client that already holds this response gets a 304 instead.
+    """
     engine = service_container.get("engine")
     advisor = service_container.get("advisor")
+    response_cache = service_container.get("response_cache")
 
     if not engine or not advisor:
         raise HTTPException(status_code=500, detail="Services not initialized")
 
-    search_query = f"{user.interests}. My skills are: {user.skills}."
-    
+    top_k = 5
+    index_version = engine.index_version
+    key = profile_key(user.dict(), top_k, index_version, lowercase=engine.lowercase_queries)
+    cached = None
+    if response_cache is not None:
+        with stage("response_cache"):
+            cached = await response_cache.aget(key, index_version)
+
+    if cached is not None:
+        body, etag = cached
+        cache_status = "HIT"
+    else:
+        try:
+            results = await engine.asearch(
+                user_query=build_search_query(user),
+                max_education_level=user.education_level_id,
+                top_k=top_k,
+                min_salary=user.min_salary,
+                min_growth=user.min_growth,
+            )
+        except Exception as e:
+            print(f"{request_tag()}❌ SEARCH ERROR: {e}")
+            raise HTTPException(status_code=500, detail=f"Search Error: {str(e)}")
+
+        ai_summary = NO_MATCHES_SUMMARY
+        if results:
+            with stage("advisor"):
+                ai_summary = await advisor.agenerate_advice(user_profile=user.dict(), jobs=results)
+
+        with stage("serialization"):
+            body = RecommendationResponse(
+                user_summary=ai_summary,
+                recommendations=results,
+                index_version=index_version,
+            ).model_dump_json().encode("utf-8")
+            etag = etag_for(body)
+        cache_status = "MISS"
+        # A failed advisor call is worth retrying, so that response is not kept anywhere
+        if ai_summary.startswith(ADVICE_ERROR_PREFIX):
+            cache_control = "no-store"
+        elif response_cache is not None:
+            await response_cache.aset(key, index_version, body, etag)
+
+    headers = {"Cache-Control": cache_control, "ETag": etag, "X-Cache": cache_status}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.post("/api/recommend", response_model=RecommendationResponse)
+async def get_recommendations(user: UserProfile, if_none_match: str | None = Header(None)):
+    return await recommend(user, if_none_match, cache_control="no-cache")
+
+
+@app.get("/api/recommend", response_model=RecommendationResponse)
+async def get_recommendations_by_query(
+    user: Annotated[UserProfile, Query()],
+    if_none_match: str | None = Header(None),
+):
+    """
+    Same as the POST, with the profile in the query string, so browsers and
+    the nginx proxy cache can store it for RESPONSE_CACHE_MAX_AGE seconds and
+    revalidate with If-None-Match afterwards.
+    """
+    return await recommend(user, if_none_match, cache_control=f"public, max-age={settings.RESPONSE_CACHE_MAX_AGE}")
 
-    import time
-    t0 = time.time()
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/recommend/stream")
+async def stream_recommendations(user: UserProfile):
+    """
+    Server-sent events: `recommendations` as soon as the search returns, then
+    one `token` event per advice chunk, then `end` with the full summary.
+    """
+    engine = service_container.get("engine")
+    advisor = service_container.get("advisor")
+
+    if not engine or not advisor:
+        raise HTTPException(status_code=500, detail="Services not initialized")
+
+    index_version = engine.index_version
     try:
-        results = engine.search(
-            user_query=search_query,
+        results = await engine.asearch(
+            user_query=build_search_query(user),
             max_education_level=user.education_level_id,
-            top_k=5
+            top_k=5,
+            min_salary=user.min_salary,
+            min_growth=user.min_growth,
         )
     except Exception as e:
-        print(f"❌ SEARCH ERROR: {e}")
+        print(f"{request_tag()}❌ SEARCH ERROR: {e}")
         raise HTTPException(status_code=500, detail=f"Search Error: {str(e)}")
-    t1 = time.time()
-    print(f"[TIMING] /api/recommend total search time: {t1-t0:.3f}s")
 
-    ai_summary = advisor.generate_advice(user_profile=user.dict(), jobs=results)
+    async def events():
+        yield sse_event("recommendations", {"recommendations": results, "index_version": index_version})
+        if not results:
+            yield sse_event("end", {"user_summary": NO_MATCHES_SUMMARY})
+            return
+        chunks = []
+        try:
+            with stage("advisor"):
+                async for chunk in advisor.astream_advice(user_profile=user.dict(), jobs=results):
+                    chunks.append(chunk)
+                    yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Could not generate advice: {str(e)}"})
+            return
+        yield sse_event("end", {"user_summary": "".join(chunks)})
 
-    return {
-        "user_summary": ai_summary,
-        "recommendations": results
-    }
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/recommend/batch", response_model=BatchRecommendationResponse)
+async def get_batch_recommendations(batch: BatchRecommendationRequest):
+    engine = service_container.get("engine")
+    advisor = service_container.get("advisor")
+
+    if not engine or (batch.include_advice and not advisor):
+        raise HTTPException(status_code=500, detail="Services not initialized")
+    if len(batch.profiles) > settings.BATCH_MAX_PROFILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many profiles ({len(batch.profiles)} > {settings.BATCH_MAX_PROFILES})",
+        )
+
+    index_version = engine.index_version
+    try:
+        all_results = await asyncio.to_thread(
+            engine.search_batch,
+            user_queries=[build_search_query(user) for user in batch.profiles],
+            max_education_levels=[user.education_level_id for user in batch.profiles],
+            top_k=batch.top_k,
+            min_salaries=[user.min_salary for user in batch.profiles],
+            min_growths=[user.min_growth for user in batch.profiles],
+        )
+    except Exception as e:
+        print(f"{request_tag()}❌ BATCH SEARCH ERROR: {e}")
+        raise HTTPException(status_code=500, detail=f"Search Error: {str(e)}")
+
+    # At most BATCH_ADVICE_CONCURRENCY advisor calls in flight, so a large batch
+    # neither holds a worker thread per LLM call nor floods the LLM API
+    limit = asyncio.Semaphore(max(1, settings.BATCH_ADVICE_CONCURRENCY))
+
+    async def advise(user, results):
+        if not batch.include_advice or not results:
+            return None
+        async with limit:
+            return await advisor.agenerate_advice(user_profile=user.dict(), jobs=results)
+
+    with stage("advisor"):
+        summaries = await asyncio.gather(*(
+            advise(user, results) for user, results in zip(batch.profiles, all_results)
+        ))
+
+    items = [
+        {"user_summary": summary, "recommendations": results}
+        for summary, results in zip(summaries, all_results)
+    ]
+    return {"results": items, "index_version": index_version}
+
+
+@app.get("/api/careers/{soc_code}/related", response_model=RelatedCareersResponse)
+def get_related_careers(
+    soc_code: str,
+    max_education_level: int = Query(5, ge=1, le=5),
+    top_k: int = Query(5, ge=1, le=50),
+):
+    engine = service_container.get("engine")
+    if not engine:
+        raise HTTPException(status_code=500, detail="Services not initialized")
+    # Related careers always come from the local index
+    index_version = engine.local_index_version
+    try:
+        related = engine.related(soc_code, max_education_level=max_education_level, top_k=top_k)
+    except Exception as e:
+        print(f"{request_tag()}❌ RELATED ERROR: {e}")
+        raise HTTPException(status_code=500, detail=f"Search Error: {str(e)}")
+    if related is None:
+        raise HTTPException(status_code=404, detail=f"Unknown career '{soc_code}'")
+    return {**related, "index_version": index_version}
+
+
+@app.post("/api/admin/reload", response_model=ReloadResponse)
+def reload_index(force: bool = False, x_admin_token: str | None = Header(None)):
+    """
+    Swap in the latest local index store without restarting. Runs in the
+    threadpool, so searches keep being served from the current snapshot while
+    the new one loads. Only this worker reloads; the others pick the new
+    store up through their index watcher.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not secrets.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    engine = service_container.get("engine")
+    if not engine:
+        raise HTTPException(status_code=500, detail="Services not initialized")
+    try:
+        return engine.reload_index(force=force)
+    except Exception as e:
+        print(f"{request_tag()}❌ RELOAD ERROR: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload Error: {str(e)}")
+
+def _cache_metrics():
+    engine = service_container.get("engine")
+    advisor = service_container.get("advisor")
+    response_cache = service_container.get("response_cache")
+    caches = {}
+    if engine:
+        caches["embedding"] = engine.embedding_cache.stats()
+    if advisor:
+        advice = advisor.cache_stats()
+        caches["advice_memory"] = advice["memory"]
+        caches["advice_disk"] = advice["disk"]
+    if response_cache:
+        responses = response_cache.stats()
+        caches["response_memory"] = responses["memory"]
+        caches["response_disk"] = responses["disk"]
+    return metrics.cache_counter_lines(caches)
+
+
+metrics.register_collector(_cache_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    engine = service_container.get("engine")
+    advisor = service_container.get("advisor")
+    response_cache = service_container.get("response_cache")
+    search = engine.backend_status() if engine else None
+    if search is None or search["active_backend"] == "none":
+        status = "unavailable"
+    elif search["active_backend"] == "local" and search["qdrant"] is not None:
+        status = "degraded"
+    else:
+        status = "ok"
+    return {
+        "status": status,
+        "index_version": engine.index_version if engine else None,
+        "search": search,
+        "embedding_cache": engine.embedding_cache.stats() if engine else None,
+        "encoder_batching": engine.encoder.stats() if engine and engine.encoder else None,
+        "advice_cache": advisor.cache_stats() if advisor else None,
+        "response_cache": response_cache.stats() if response_cache else None,
+    }
\ No newline at end of file
@@ -1,60 +1,226 @@
+import asyncio
+import hashlib
+import json
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from app.core.config import settings
+from app.services.cache import LRUCache, DiskCache
+
+# Start of the text returned in place of advice when the LLM call fails
+ADVICE_ERROR_PREFIX = "Could not generate advice"
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value).lower().split())
 
 class CareerAdvisor:
     def __init__(self):
         # We try to load the API key from environment
         # If no key is found, we will use "Mock Mode"
         api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key) if api_key else None
+        self.client = OpenAI(api_key=api_key, timeout=settings.ADVISOR_TIMEOUT) if api_key else None
+        self.async_client = AsyncOpenAI(api_key=api_key, timeout=settings.ADVISOR_TIMEOUT) if api_key else None
+        self.model_name = settings.ADVISOR_MODEL
 
-    def generate_advice(self, user_profile: dict, jobs: list):
-        """
-        user_profile: Dict with 'interests', 'skills', 'age'
-        jobs: List of top matching career dictionaries
-        """
-        
-        # --- Mock Mode (Fallback if no API Key) ---
-        if not self.client:
-            print("⚠️ No API Key found. Using Mock Advisor.")
-            top_job = jobs[0]['title']
-            return (
-                f"Based on your interest in '{user_profile['interests']}', "
-                f"I highly recommend looking into **{top_job}**. "
-                f"Your skills in {user_profile['skills']} align perfectly with this role."
-            )
+        # Response cache: only successful LLM completions are stored
+        self.cache = LRUCache(maxsize=settings.ADVICE_CACHE_SIZE, ttl=settings.ADVICE_CACHE_TTL)
+        self.disk_cache = None
+        if settings.ADVICE_DISK_CACHE_ENABLED:
+            cache_dir = settings.ADVICE_DISK_CACHE_DIR or os.path.join(settings.DATA_DIR, "advice_cache")
+            try:
+                self.disk_cache = DiskCache(
+                    cache_dir,
+                    ttl=settings.ADVICE_CACHE_TTL,
+                    max_entries=settings.ADVICE_DISK_CACHE_MAX_ENTRIES,
+                )
+            except OSError as e:
+                print(f"⚠️ Advice disk cache disabled: {e}")
 
-        # --- Real AI Mode ---
+    def cache_key(self, user_profile: dict, jobs: list) -> str:
+        """Hash of everything the prompt depends on, plus the model name."""
+        material = {
+            "interests": _normalize(user_profile['interests']),
+            "skills": _normalize(user_profile['skills']),
+            "age": user_profile['age'],
+            "titles": [j['title'] for j in jobs],
+            "model": self.model_name,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _disk_get(self, key):
+        advice = self.disk_cache.get(key)
+        if advice is not None:
+            self.cache.set(key, advice)
+        return advice
+
+    def _cache_get(self, key):
+        advice = self.cache.get(key)
+        if advice is None and self.disk_cache is not None:
+            advice = self._disk_get(key)
+        return advice
+
+    def _cache_set(self, key, advice):
+        if not advice:
+            return
+        self.cache.set(key, advice)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, advice)
+
+    def cache_stats(self):
+        return {
+            "memory": self.cache.stats(),
+            "disk": self.disk_cache.stats() if self.disk_cache is not None else None,
+        }
+
+    async def _acache_get(self, key):
+        advice = self.cache.get(key)
+        if advice is None and self.disk_cache is not None:
+            advice = await asyncio.to_thread(self._disk_get, key)
+        return advice
+
+    async def _acache_set(self, key, advice):
+        if self.disk_cache is not None:
+            await asyncio.to_thread(self._cache_set, key, advice)
+        else:
+            self._cache_set(key, advice)
+
+    @staticmethod
+    def _mock_advice(user_profile: dict, jobs: list):
+        print("⚠️ No API Key found. Using Mock Advisor.")
+        if not jobs:
+            return f"No careers matched your interest in '{user_profile['interests']}' this time."
+        top_job = jobs[0]['title']
+        return (
+            f"Based on your interest in '{user_profile['interests']}', "
+            f"I highly recommend looking into **{top_job}**. "
+            f"Your skills in {user_profile['skills']} align perfectly with this role."
+        )
+
+    def _build_request(self, user_profile: dict, jobs: list):
         # 1. Construct the Prompt (The "Context")
         system_prompt = "You are an expert Career Counselor. Be encouraging, professional, and concise."
-        
+
         user_prompt = f"""
         Analyze this user profile:
         - Interests: {user_profile['interests']}
         - Skills: {user_profile['skills']}
         - Age: {user_profile['age']}
-        
+
         We have identified these top career matches from our database:
         { [j['title'] for j in jobs] }
-        
+
         Task:
         1. Select the #1 best option and explain WHY it fits their specific skills.
         2. Suggest one "alternative path" from the list for variety.
         3. Keep the response under 100 words.
         """
 
-        # 2. Call the LLM
+        return dict(
+            model=self.model_name, # Or gpt-4o / gemini-pro
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.7,
+            max_tokens=150
+        )
+
+    def generate_advice(self, user_profile: dict, jobs: list):
+        """
+        user_profile: Dict with 'interests', 'skills', 'age'
+        jobs: List of top matching career dictionaries
+        """
+
+        # --- Mock Mode (Fallback if no API Key) ---
+        if not self.client:
+            return self._mock_advice(user_profile, jobs)
+
+        # --- Real AI Mode ---
+        key = self.cache_key(user_profile, jobs)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo", # Or gpt-4o / gemini-pro
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=150
+            response = self.client.chat.completions.create(**self._build_request(user_profile, jobs))
+            advice = response.choices[0].message.content
+            self._cache_set(key, advice)
+            return advice
+        except Exception as e:
+            return f"{ADVICE_ERROR_PREFIX}: {str(e)}"
+
+    async def agenerate_advice(self, user_profile: dict, jobs: list):
+        """
+        Async `generate_advice`. The LLM call is bounded by ADVISOR_TIMEOUT and is
+        cancelled with the calling task (e.g. when the client disconnects).
+        """
+        if not self.async_client:
+            return self._mock_advice(user_profile, jobs)
+
+        key = self.cache_key(user_profile, jobs)
+        cached = await self._acache_get(key)
+        if cached is not None:
+            return cached
+        try:
+            response = await asyncio.wait_for(
+                self.async_client.chat.completions.create(**self._build_request(user_profile, jobs)),
+                timeout=settings.ADVISOR_TIMEOUT,
             )
-            return response.choices[0].message.content
+            advice = response.choices[0].message.content
+            await self._acache_set(key, advice)
+            return advice
+        except asyncio.TimeoutError:
+            return f"{ADVICE_ERROR_PREFIX}: timed out after {settings.ADVISOR_TIMEOUT}s"
         except Exception as e:
-            return f"Could not generate advice: {str(e)}"
\ No newline at end of file
+            return f"{ADVICE_ERROR_PREFIX}: {str(e)}"
+
+    async def astream_advice(self, user_profile: dict, jobs: list):
+        """
+        Yield the advice text in chunks as the LLM produces them (stream=True).
+        Mock mode streams the mock advice word by word.
+
+        ADVISOR_TIMEOUT bounds the whole stream, from the request to the last
+        chunk: a stream that stalls midway raises TimeoutError like one that
+        never starts.
+        """
+        if not self.async_client:
+            text = self._mock_advice(user_profile, jobs)
+            for i, word in enumerate(text.split(" ")):
+                yield word if i == 0 else " " + word
+            return
+
+        key = self.cache_key(user_profile, jobs)
+        cached = await self._acache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.ADVISOR_TIMEOUT
+
+        async def before_deadline(awaitable):
+            try:
+                return await asyncio.wait_for(awaitable, timeout=max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"timed out after {settings.ADVISOR_TIMEOUT}s") from None
+
+        stream = await before_deadline(
+            self.async_client.chat.completions.create(**self._build_request(user_profile, jobs), stream=True)
+        )
+        chunks = []
+        try:
+            while True:
+                try:
+                    chunk = await before_deadline(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks.append(chunk.choices[0].delta.content)
+                    yield chunks[-1]
+        finally:
+            await stream.close()
+        # Only a stream that ran to completion is cached
+        await self._acache_set(key, "".join(chunks))
+
+    async def aclose(self):
+        if self.async_client:
+            await self.async_client.close()
@@ -0,0 +1,259 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+
+ANN_FILES = ("ann.centroids.npy", "ann.order.npy", "ann.offsets.npy", "ann.zones.npy")
+
+
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _assign(vectors, centroids, block=16384):
+    """Index of the most similar centroid for every vector, in blocks to bound memory."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+        labels[start:start + block] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+def _kmeans(sample, nlist, iterations, rng):
+    """Spherical k-means: centroids stay unit length so assignment is a dot product."""
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        counts = np.bincount(labels, minlength=nlist)
+        order = np.argsort(labels, kind="stable")
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        centroids[nonempty] = _normalize(sums)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            # Re-seed empty lists with random points so every list stays useful
+            centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the local index vectors (NumPy only).
+
+    A k-means coarse quantizer splits the vectors into `nlist` lists. Each list
+    stores its row numbers sorted by job zone, so an education filter is a
+    prefix of every list rather than a scan. A search scores the centroids,
+    probes the `nprobe` best lists that have rows under the filter, and scores
+    only their rows exactly.
+
+    The index holds row numbers, not vectors: candidates are ranked by the
+    `LocalIndex` it was built for (`rank_rows`).
+    """
+
+    def __init__(self, centroids, order, offsets, zones):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.zones = zones
+        # Lowest job zone in each list (inf for empty lists), to skip lists the filter empties
+        counts = np.diff(offsets)
+        self.min_zone = np.full(len(centroids), np.inf, dtype=np.float32)
+        self.min_zone[counts > 0] = zones[offsets[:-1][counts > 0]]
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.order)
+
+    @staticmethod
+    def default_nlist(count):
+        return max(1, min(count, int(round(np.sqrt(count)))))
+
+    @classmethod
+    def build(cls, vectors, job_zone, nlist=None, iterations=10, sample_size=None, seed=0):
+        """Train the coarse quantizer on a sample of `vectors` and fill the inverted lists."""
+        count = len(vectors)
+        nlist = min(nlist or settings.LOCAL_ANN_NLIST or cls.default_nlist(count), count)
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, sample_size or max(64 * nlist, 10000))
+        rows = np.sort(rng.choice(count, sample_size, replace=False)) if sample_size < count else slice(None)
+        centroids = _kmeans(_normalize(vectors[rows]), nlist, iterations, rng)
+
+        labels = _assign(vectors, centroids)
+        job_zone = np.asarray(job_zone, dtype=np.float32)
+        order = np.lexsort((job_zone, labels)).astype(np.int32 if count < 2 ** 31 else np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+        return cls(centroids, order, offsets, job_zone[order])
+
+    # --- Persistence (files next to the local index store) ---
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, "ann.json"))
+
+    def save(self, directory):
+        for name, array in zip(ANN_FILES, (self.centroids, self.order, self.offsets, self.zones)):
+            np.save(os.path.join(directory, name), array)
+        meta = {"nlist": self.nlist, "count": len(self), "created": time.time()}
+        # ann.json is written last: the index only counts as present once it is complete
+        tmp = os.path.join(directory, "ann.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "ann.json"))
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        arrays = [np.load(os.path.join(directory, name), mmap_mode=mmap_mode) for name in ANN_FILES]
+        centroids, order, offsets, zones = arrays
+        return cls(np.asarray(centroids), order, np.asarray(offsets), zones)
+
+    # --- Search ---
+
+    def probed_rows(self, nprobe=None):
+        """Rows a search scans on average when it probes `nprobe` lists."""
+        nprobe = nprobe or settings.LOCAL_ANN_NPROBE
+        return len(self.order) * min(nprobe, self.nlist) // max(1, self.nlist)
+
+    def search(self, index, queries, max_job_zone=5, top_k=5, nprobe=None, row_mask=None):
+        """
+        Approximate top-k for each (normalized) query among rows with job zone
+        <= `max_job_zone` (and, with `row_mask`, only the rows it marks).
+        Returns a list of (rows, scores), best first.
+        """
+        nprobe = nprobe or settings.LOCAL_ANN_NPROBE
+        eligible = self.min_zone <= float(max_job_zone)
+        nprobe = min(nprobe, int(eligible.sum()))
+        if top_k <= 0 or nprobe == 0:
+            empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+            return [empty for _ in range(len(queries))]
+
+        centroid_scores = queries @ self.centroids.T
+        centroid_scores[:, ~eligible] = -np.inf
+        probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        results = []
+        for query, lists in zip(queries, probes):
+            starts = self.offsets[lists]
+            # Within a list rows are sorted by zone, so the filter keeps a prefix
+            ends = [
+                start + np.searchsorted(self.zones[start:stop], max_job_zone, side="right")
+                for start, stop in zip(starts, self.offsets[lists + 1])
+            ]
+            candidates = np.sort(np.concatenate([self.order[s:e] for s, e in zip(starts, ends)]))
+            if row_mask is not None:
+                candidates = candidates[row_mask[candidates]]
+            results.append(index.rank_rows(query, candidates, top_k))
+        return results
+
+
+def build_for_store(directory=None, nlist=None):
+    """
+    Build the IVF index for an existing local index store and publish it as a
+    new store version (the live files are never rewritten; see
+    `republish_store`). Returns the index it was built from, the IVF index and
+    the new version.
+    """
+    from app.services.local_index import LocalIndex, republish_store
+
+    index = LocalIndex.load(directory, use_ann=False)
+    ann = IVFIndex.build(index.vectors, index.job_zone, nlist=nlist)
+    version = republish_store(ann.save, {"ann_nlist": ann.nlist}, replaces=("ann.",), directory=index.directory)
+    return index, ann, version
+
+
+# --- Recall evaluation ---
+
+def synthetic_catalog(count, dim=384, clusters=2000, seed=0):
+    """Clustered unit vectors with job zones 1-5, shaped like embedded job postings."""
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((clusters, dim), dtype=np.float32))
+    labels = rng.integers(0, clusters, count)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 65536):
+        part = labels[start:start + 65536]
+        noise = rng.standard_normal((len(part), dim), dtype=np.float32) * 0.05
+        vectors[start:start + 65536] = _normalize(centers[part] + noise)
+    job_zone = rng.integers(1, 6, count).astype(np.float32)
+    return vectors, job_zone
+
+
+def sample_queries(vectors, count, seed=1, noise=0.04):
+    """Queries near catalog vectors (a stand-in for real query embeddings)."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), count, replace=len(vectors) < count)
+    base = np.asarray(vectors[np.sort(rows)], dtype=np.float32)
+    return _normalize(base + rng.standard_normal(base.shape, dtype=np.float32) * noise)
+
+
+def evaluate_recall(index, queries, top_k=10, nprobes=(1, 2, 4, 8, 16, 32), zones=(2, 5)):
+    """
+    Recall@k of the IVF search against exact search on `index` (a LocalIndex
+    with `ann` set), with per-query latency, for each probe count and zone filter.
+    """
+    rows = []
+    for zone in zones:
+        # Timed one query at a time, the way the API serves them
+        t0 = time.perf_counter()
+        exact = [index.search_rows(q, max_job_zone=zone, top_k=top_k, exact=True)[0] for q in queries]
+        exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        truth = [set(r.tolist()) for r, _ in exact]
+        for nprobe in nprobes:
+            t0 = time.perf_counter()
+            approx = index.search_rows(queries, max_job_zone=zone, top_k=top_k, nprobe=nprobe)
+            ann_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+            hits = sum(len(t & set(r.tolist())) for t, (r, _) in zip(truth, approx))
+            rows.append({
+                "max_job_zone": zone, "nprobe": nprobe, f"recall@{top_k}": round(hits / max(1, sum(map(len, truth))), 4),
+                "ann_ms": round(ann_ms, 3), "exact_ms": round(exact_ms, 3),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or evaluate the IVF index for the local search backend")
+    parser.add_argument("command", choices=["build", "eval"])
+    parser.add_argument("--nlist", type=int, help="number of inverted lists (default ~sqrt(count))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="evaluate on N synthetic vectors instead of the built store")
+    args = parser.parse_args()
+
+    from app.services.local_index import LocalIndex
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        index, ann, version = build_for_store(nlist=args.nlist)
+        print(f"✅ IVF index built for {len(index)} vectors: nlist={ann.nlist} in {time.perf_counter() - t0:.1f}s "
+              f"(store version {version})")
+    else:
+        if args.synthetic:
+            vectors, job_zone = synthetic_catalog(args.synthetic)
+            names = np.arange(args.synthetic).astype(str)
+            index = LocalIndex(vectors, job_zone, names, names, names, names, normalized=True)
+            t0 = time.perf_counter()
+            index.ann = IVFIndex.build(vectors, job_zone, nlist=args.nlist)
+            print(f"🔧 Built IVF over {len(index)} synthetic vectors (nlist={index.ann.nlist}) "
+                  f"in {time.perf_counter() - t0:.1f}s")
+        else:
+            index = LocalIndex.load(use_ann=False)
+            index.ann = IVFIndex.load(index.directory) if IVFIndex.exists(index.directory) else \
+                IVFIndex.build(index.vectors, index.job_zone, nlist=args.nlist)
+        queries = sample_queries(index.vectors, args.queries)
+        for row in evaluate_recall(index, queries, top_k=args.top_k, nprobes=args.nprobe):
+            print(json.dumps(row))
@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchingEncoder:
+    """
+    Coalesces concurrent single-query encode calls into one batched forward pass.
+
+    Callers block on `encode(text)` (or wait on the Future from `submit(text)`)
+    while a background thread collects the queries that arrive within
+    `max_wait_ms` (or until `max_batch_size` is reached), encodes them with a
+    single `model.encode(list)` call and hands each caller back its own vector.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=3.0):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="batching-encoder", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue `text` for encoding and return a Future for its vector."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, text: str):
+        return self.submit(text).result()
+
+    def _collect(self):
+        """
+        The next batch of queued items. Futures cancelled by their caller
+        (e.g. an async request that went away) are dropped here; the others
+        are marked running, so they can no longer be cancelled under us.
+        """
+        batch = []
+        item = self._queue.get()
+        deadline = time.perf_counter() + self.max_wait
+        while True:
+            if item[1].set_running_or_notify_cancel():
+                batch.append(item)
+            if len(batch) >= self.max_batch_size:
+                break
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = self.model.encode(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._record(batch, started)
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def _record(self, batch, started):
+        delays = [started - enqueued for _, _, enqueued in batch]
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.total_queue_delay += sum(delays)
+            self.max_queue_delay = max(self.max_queue_delay, max(delays))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_queue_delay_ms": round(self.total_queue_delay / self.items * 1000, 3) if self.items else 0.0,
+                "max_queue_delay_ms": round(self.max_queue_delay * 1000, 3),
+                "pending": self._queue.qsize(),
+            }
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe LRU cache with an optional TTL (in seconds).
+
+    A `ttl` of 0 or None means entries never expire; they are only
+    evicted when the cache is full. With `max_bytes`, callers pass each
+    entry's size to `set` and the total is kept under that budget too.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self.max_bytes = max_bytes or None
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at, nbytes = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.bytes -= nbytes
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, nbytes=0):
+        if self.maxsize <= 0 or (self.max_bytes and nbytes > self.max_bytes):
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._data[key] = (value, expires_at, nbytes)
+            self.bytes += nbytes
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+                _, (_, _, evicted_bytes) = self._data.popitem(last=False)
+                self.bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                **({"bytes": self.bytes, "max_bytes": self.max_bytes} if self.max_bytes else {}),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class DiskCache:
+    """
+    Optional on-disk tier: one JSON file per key under `directory`.
+
+    Entries older than `ttl` seconds are treated as misses and removed. When
+    more than `max_entries` files exist, the oldest ones are pruned.
+    """
+
+    def __init__(self, directory, ttl=None, max_entries=10000):
+        self.directory = directory
+        self.ttl = ttl or None
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._count = sum(1 for name in os.listdir(directory) if name.endswith(".json"))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return default
+        if self.ttl and entry.get("created", 0) + self.ttl <= time.time():
+            try:
+                os.remove(path)
+                with self._lock:
+                    self._count -= 1
+            except OSError:
+                pass
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.hits += 1
+        return entry.get("value", default)
+
+    def set(self, key, value):
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Disk cache write failed: {e}")
+            return
+        with self._lock:
+            if is_new:
+                self._count += 1
+            over_limit = self._count > self.max_entries
+        if over_limit:
+            self._prune()
+
+    def _prune(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        entries.sort()
+        removed = 0
+        for _, path in entries[:max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self.evictions += removed
+            self._count = len(entries) - removed
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._count,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -1,60 +1,169 @@
 import pandas as pd
+import argparse
 import os
 import sys
+import time
 
 sys.path.append(os.getcwd())
 from app.core.config import settings
 
-def load_and_process_data():
+CODE = "O*NET-SOC Code"
+WAGE_COLUMN = "Median Annual Wage"
+GROWTH_COLUMN = "Percent Change"
+
+# O*NET element tables (same schema as Skills.txt) that can be folded into the
+# search text, keyed by the label used in `combined_text`.
+EXTRA_ELEMENT_FILES = {
+    "Knowledge": "Knowledge.txt",
+    "Abilities": "Abilities.txt",
+    "Work Activities": "Work Activities.txt",
+}
+
+ZONE_MAP = {
+    1: "Entry Level", 2: "High School", 3: "Associate/Vocational",
+    4: "Bachelor's Degree", 5: "Master's or Higher"
+}
+
+
+def _timed(timings, stage, started):
+    timings[stage] = time.perf_counter() - started
+    return time.perf_counter()
+
+
+def aggregate_elements(path, min_importance=3.0):
+    """
+    Comma-joined names of the important elements per occupation, from an O*NET
+    element table (Skills, Knowledge, Abilities, Work Activities).
+    Only the four needed columns are parsed, with categorical codes.
+    """
+    elements = pd.read_csv(
+        path,
+        sep="\t",
+        usecols=[CODE, "Element Name", "Scale ID", "Data Value"],
+        dtype={CODE: "category", "Element Name": "category", "Scale ID": "category", "Data Value": "float32"},
+    )
+    important = elements[(elements["Scale ID"] == "IM") & (elements["Data Value"] >= min_importance)]
+    return (
+        important["Element Name"].astype(str)
+        .groupby(important[CODE], observed=True, sort=False)
+        .agg(", ".join)
+    )
+
+
+def load_wages(path):
+    """
+    Numeric median wage (Int32, nullable) and growth % (float32) per occupation.
+    Older generated files stored wages as "$55,000" strings; those are parsed too.
+    """
+    wages = pd.read_csv(path, sep="\t", usecols=[CODE, WAGE_COLUMN, GROWTH_COLUMN], dtype={CODE: str})
+    wages = wages.drop_duplicates(CODE).set_index(CODE)
+    wage = pd.to_numeric(wages[WAGE_COLUMN].astype(str).str.replace(r"[$,]", "", regex=True), errors="coerce")
+    return pd.DataFrame({
+        WAGE_COLUMN: wage.round().astype("Int32"),
+        GROWTH_COLUMN: pd.to_numeric(wages[GROWTH_COLUMN], errors="coerce").astype("float32"),
+    })
+
+
+def processed_path(fmt="parquet"):
+    name = settings.PROCESSED_PARQUET_FILE if fmt == "parquet" else settings.PROCESSED_DATA_FILE
+    return os.path.join(settings.DATA_DIR, name)
+
+
+def read_processed_data(columns=None):
+    """Load the processed dataset, preferring Parquet over the legacy CSV export."""
+    if os.path.exists(processed_path("parquet")):
+        return pd.read_parquet(processed_path("parquet"), columns=columns)
+    return pd.read_csv(processed_path("csv"), usecols=columns)
+
+
+def iter_processed_chunks(chunk_size):
+    """Yield the processed dataset in DataFrames of at most `chunk_size` rows."""
+    if os.path.exists(processed_path("parquet")):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(processed_path("parquet")).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(processed_path("csv"), chunksize=chunk_size)
+
+
+def load_and_process_data(extra_tables=(), export_csv=False):
     print("⏳ Starting Data Pipeline (Clean Version)...")
-    
+    timings = {}
+    t = time.perf_counter()
+
     # 1. Load Occupations
     occ_path = os.path.join(settings.DATA_DIR, settings.RAW_DATA_FILE)
-    occupations = pd.read_csv(occ_path, sep="\t")
+    occupations = pd.read_csv(
+        occ_path, sep="\t", usecols=[CODE, "Title", "Description"], dtype={CODE: "category"}
+    ).set_index(CODE)
 
     # 2. Load Job Zones (Education)
     zones_path = os.path.join(settings.DATA_DIR, "Job Zones.txt")
-    job_zones = pd.read_csv(zones_path, sep="\t")[["O*NET-SOC Code", "Job Zone"]]
-
-    # 3. Load Skills
-    skills_path = os.path.join(settings.DATA_DIR, settings.RAW_SKILLS_FILE)
-    skills = pd.read_csv(skills_path, sep="\t")
-    
-    important_skills = skills[(skills["Scale ID"] == "IM") & (skills["Data Value"] >= 3.0)]
-    skills_aggregated = (
-        important_skills.groupby("O*NET-SOC Code")["Element Name"]
-        .apply(lambda x: ", ".join(x))
-        .reset_index()
-    )
-    skills_aggregated.rename(columns={"Element Name": "Skills"}, inplace=True)
+    job_zones = pd.read_csv(
+        zones_path, sep="\t", usecols=[CODE, "Job Zone"], dtype={CODE: "category", "Job Zone": "Int8"}
+    ).set_index(CODE)["Job Zone"]
 
-    # 4. Merge Data
+    # 2b. Load Wages (optional; generate_wages.py creates a mock file)
+    wages_path = os.path.join(settings.DATA_DIR, settings.WAGES_FILE)
+    if os.path.exists(wages_path):
+        wages = load_wages(wages_path)
+    else:
+        print(f"   ⚠️ {settings.WAGES_FILE} not found — salary/growth filters will match nothing "
+              f"(run `python generate_wages.py`)")
+        wages = pd.DataFrame({WAGE_COLUMN: pd.Series(dtype="Int32"), GROWTH_COLUMN: pd.Series(dtype="float32")})
+    t = _timed(timings, "read", t)
+
+    # 3. Load Skills (+ any extra element tables)
+    element_columns = {"Skills": aggregate_elements(os.path.join(settings.DATA_DIR, settings.RAW_SKILLS_FILE))}
+    for label in extra_tables:
+        element_columns[label] = aggregate_elements(os.path.join(settings.DATA_DIR, EXTRA_ELEMENT_FILES[label]))
+    t = _timed(timings, "aggregate", t)
+
+    # 4. Merge Data (one index-aligned join for every table)
     print("   🔗 Merging datasets...")
-    full_data = pd.merge(occupations[["O*NET-SOC Code", "Title", "Description"]], skills_aggregated, on="O*NET-SOC Code", how="left")
-    full_data = pd.merge(full_data, job_zones, on="O*NET-SOC Code", how="left")
+    full_data = occupations.join(
+        [job_zones.to_frame(), wages] + [s.rename(label).to_frame() for label, s in element_columns.items()]
+    )
+    full_data.index = full_data.index.astype(str)
+    full_data = full_data.rename_axis(CODE).reset_index()
 
     # 5. Cleanup
     full_data["Skills"] = full_data["Skills"].fillna("General Skills")
-    full_data["Job Zone"] = full_data["Job Zone"].fillna(1)
-
-    zone_map = {
-        1: "Entry Level", 2: "High School", 3: "Associate/Vocational",
-        4: "Bachelor's Degree", 5: "Master's or Higher"
-    }
-    full_data["Education_Level"] = full_data["Job Zone"].map(zone_map)
-
-    # 6. Create Search Text
-    full_data["combined_text"] = (
-        "Job Title: " + full_data["Title"] + ". " +
-        "Education: " + full_data["Education_Level"].astype(str) + ". " +
-        "Skills: " + full_data["Skills"] + ". " +
-        "Description: " + full_data["Description"]
-    )
+    for label in extra_tables:
+        full_data[label] = full_data[label].fillna("")
+    full_data["Job Zone"] = full_data["Job Zone"].fillna(1).astype("int8")
+    full_data["Education_Level"] = full_data["Job Zone"].map(ZONE_MAP)
+    t = _timed(timings, "merge", t)
+
+    # 6. Create Search Text (single pass over the rows)
+    extras = [full_data[label] for label in extra_tables]
+    full_data["combined_text"] = [
+        f"Job Title: {title}. Education: {education}. Skills: {skills}. Description: {description}"
+        + "".join(f". {label}: {value}" for label, value in zip(extra_tables, extra) if value)
+        for title, education, skills, description, *extra in zip(
+            full_data["Title"], full_data["Education_Level"], full_data["Skills"], full_data["Description"], *extras
+        )
+    ]
+    t = _timed(timings, "text", t)
+
+    # 7. Save (Parquet is canonical; CSV is an optional export)
+    full_data.to_parquet(processed_path("parquet"), index=False)
+    print(f"   🎉 Clean Data saved to: {settings.PROCESSED_PARQUET_FILE}")
+    if export_csv:
+        full_data.to_csv(processed_path("csv"), index=False)
+        print(f"   📄 CSV export saved to: {settings.PROCESSED_DATA_FILE}")
+    _timed(timings, "write", t)
+
+    total = sum(timings.values())
+    print("   ⏱️  " + ", ".join(f"{stage}={secs:.3f}s" for stage, secs in timings.items()) + f", total={total:.3f}s")
+    return full_data
 
-    # 7. Save
-    output_path = os.path.join(settings.DATA_DIR, settings.PROCESSED_DATA_FILE)
-    full_data.to_csv(output_path, index=False)
-    print(f"   🎉 Clean Data saved to: {settings.PROCESSED_DATA_FILE}")
 
 if __name__ == "__main__":
-    load_and_process_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the processed career dataset from the O*NET tables")
+    parser.add_argument("--extra", nargs="*", default=[], choices=sorted(EXTRA_ELEMENT_FILES),
+                        help="additional O*NET element tables to fold into the search text")
+    parser.add_argument("--csv", action="store_true", help=f"also export {settings.PROCESSED_DATA_FILE}")
+    args = parser.parse_args()
+    load_and_process_data(extra_tables=args.extra, export_csv=args.csv)
@@ -0,0 +1,249 @@
+"""
+Sentence encoder shared by the engine (query vectors) and the indexer (job
+vectors), so both sides always embed with the same model and backend.
+
+Backends (ENCODER_BACKEND):
+  float32  the SentenceTransformer as published
+  int8     the same model with its Linear layers dynamically quantized to int8
+           (weights stored as int8, activations quantized on the fly); the
+           attention/feed-forward matmuls dominate CPU encode time
+
+    python -m app.services.encoder parity --queries 500
+
+compares int8 with float32 on the processed O*NET catalog: cosine drift of
+the job vectors, top-5 overlap of query results, encode latency and memory.
+"""
+import argparse
+import gc
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+
+BACKENDS = ("float32", "int8")
+
+
+def encoder_id(backend=None, model_name=None, max_seq_length=None):
+    """
+    Identifies the vectors an encoder configuration produces (model, backend,
+    max sequence length), without loading it. The indexer folds it into every
+    point's content hash, so changing ENCODER_* settings re-encodes the catalog.
+    """
+    backend = backend or settings.ENCODER_BACKEND
+    model_name = model_name or settings.ENCODER_MODEL_NAME
+    max_seq_length = max_seq_length or settings.ENCODER_MAX_SEQ_LENGTH
+    return f"{model_name}/{backend}/{max_seq_length or 'default'}"
+
+
+def is_uncased(model):
+    """
+    True if `model` (an Encoder or a SentenceTransformer) lowercases its input
+    in the tokenizer, so the case of a text cannot change its vector. Models
+    that do not say so (cased tokenizers, stub encoders) count as cased.
+    """
+    model = model.model if isinstance(model, Encoder) else model
+    return bool(getattr(getattr(model, "tokenizer", None), "do_lower_case", False))
+
+
+def set_torch_threads(threads):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+class Encoder:
+    """
+    A loaded sentence encoder. `encode` takes the same arguments as
+    SentenceTransformer.encode, so the engine, the batcher and the indexer (and
+    the benchmarks' stub encoders) all call it the same way.
+    """
+
+    def __init__(self, model, backend, model_name):
+        self.model = model
+        self.backend = backend
+        self.model_name = model_name
+
+    @classmethod
+    def load(cls, backend=None, model_name=None, max_seq_length=None, num_threads=None):
+        from sentence_transformers import SentenceTransformer
+
+        backend = backend or settings.ENCODER_BACKEND
+        model_name = model_name or settings.ENCODER_MODEL_NAME
+        max_seq_length = max_seq_length or settings.ENCODER_MAX_SEQ_LENGTH
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported ENCODER_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+        if num_threads:
+            set_torch_threads(num_threads)
+
+        model = SentenceTransformer(model_name, device="cpu")
+        model.eval()
+        if max_seq_length:
+            model.max_seq_length = max_seq_length
+        if backend == "int8":
+            import torch
+
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        print(f"✅ Encoder loaded: {model_name} ({backend}, max_seq_length={model.max_seq_length})")
+        return cls(model, backend, model_name)
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        kwargs.setdefault("show_progress_bar", False)
+        return self.model.encode(texts, batch_size=batch_size, **kwargs)
+
+    def size_mb(self):
+        """Serialized size of the weights: int8 Linear layers count at their packed size."""
+        import torch
+
+        buffer = io.BytesIO()
+        torch.save(self.model.state_dict(), buffer)
+        return buffer.tell() / 1e6
+
+    def describe(self):
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "max_seq_length": self.model.max_seq_length,
+        }
+
+
+# --- Parity check ---
+
+def _rss_mb():
+    """Current resident set size of this process in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top5(queries, catalog):
+    scores = queries @ catalog.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :5]
+
+
+def _overlap(a, b):
+    return float(np.mean([len(set(x) & set(y)) / len(x) for x, y in zip(a, b)]))
+
+
+def _profile_queries(df, count, seed=0):
+    """Profile-style queries ("<interests>. My skills are: <skills>.") built from catalog skill lists."""
+    rng = np.random.default_rng(seed)
+    skills = [s.split(", ") for s in df["Skills"].astype(str)]
+    queries = []
+    for _ in range(count):
+        a, b = (skills[i] for i in rng.integers(0, len(skills), 2))
+        interests = ", ".join(rng.choice(a, min(2, len(a)), replace=False))
+        queries.append(f"{interests}. My skills are: {', '.join(rng.choice(b, min(3, len(b)), replace=False))}.")
+    return queries
+
+
+def _measure(backend, catalog_texts, queries, batch_size):
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    encoder = Encoder.load(backend)
+    load_s = time.perf_counter() - t0
+    encoder.encode(queries[:8])  # warm-up
+
+    t0 = time.perf_counter()
+    catalog = _normalize(encoder.encode(catalog_texts, batch_size=batch_size))
+    catalog_s = time.perf_counter() - t0
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        t0 = time.perf_counter()
+        query_vectors.append(encoder.encode(query))
+        latencies.append(time.perf_counter() - t0)
+    ms = np.asarray(latencies) * 1000
+    stats = {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "weights_mb": round(encoder.size_mb(), 1),
+        # RSS added by loading and running this backend (torch itself is imported beforehand)
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+        "query_p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "query_p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "catalog_rows_per_s": round(len(catalog_texts) / catalog_s, 1),
+    }
+    del encoder
+    gc.collect()
+    return stats, catalog, _normalize(query_vectors)
+
+
+def parity(backend="int8", queries=500, batch_size=64, seed=0):
+    import sentence_transformers  # noqa: F401 -- imported up front so its memory is not charged to a backend
+    import torch
+
+    from app.services.data_processor import read_processed_data
+
+    df = read_processed_data(columns=["Skills", "combined_text"])
+    catalog_texts = df["combined_text"].astype(str).tolist()
+    query_texts = _profile_queries(df, queries, seed)
+    print(f"🔬 Encoder parity: float32 vs {backend} on {len(catalog_texts)} jobs, {len(query_texts)} queries "
+          f"(torch threads: {torch.get_num_threads()})")
+
+    base, base_catalog, base_queries = _measure("float32", catalog_texts, query_texts, batch_size)
+    other, other_catalog, other_queries = _measure(backend, catalog_texts, query_texts, batch_size)
+
+    drift = 1.0 - np.sum(base_catalog * other_catalog, axis=1)
+    truth = _top5(base_queries, base_catalog)
+    result = {
+        "jobs": len(catalog_texts),
+        "queries": len(query_texts),
+        "cosine_drift_mean": round(float(drift.mean()), 5),
+        "cosine_drift_p99": round(float(np.percentile(drift, 99)), 5),
+        "cosine_drift_max": round(float(drift.max()), 5),
+        # Catalog and queries both re-encoded with the new backend (a full reindex)
+        "top5_overlap_reindexed": round(_overlap(truth, _top5(other_queries, other_catalog)), 4),
+        # Only the queries use the new backend (catalog still indexed with float32)
+        "top5_overlap_queries_only": round(_overlap(truth, _top5(other_queries, base_catalog)), 4),
+        "backends": [base, other],
+    }
+    for stats in result["backends"]:
+        print(f"   {stats['backend']:<8} weights={stats['weights_mb']:.1f}MB rss+={stats['rss_growth_mb']:.0f}MB "
+              f"query p50={stats['query_p50_ms']:.2f}ms p95={stats['query_p95_ms']:.2f}ms "
+              f"catalog={stats['catalog_rows_per_s']:.0f} rows/s load={stats['load_s']:.1f}s")
+    print(f"   cosine drift mean={result['cosine_drift_mean']} p99={result['cosine_drift_p99']} "
+          f"max={result['cosine_drift_max']}")
+    print(f"   top-5 overlap: reindexed={result['top5_overlap_reindexed']:.4f} "
+          f"queries only={result['top5_overlap_queries_only']:.4f}")
+    return result
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["parity"])
+    parser.add_argument("--backend", default="int8", choices=[b for b in BACKENDS if b != "float32"])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64, help="catalog encode batch size")
+    parser.add_argument("--threads", type=int, help="torch threads (default: TORCH_NUM_THREADS or torch's own)")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    threads = args.threads or settings.TORCH_NUM_THREADS
+    if threads:
+        set_torch_threads(threads)
+    result = parity(args.backend, queries=args.queries, batch_size=args.batch_size)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"📄 Results written to {args.output}")
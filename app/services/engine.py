@@ -1,164 +1,519 @@
-from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
-from qdrant_client.models import Filter, FieldCondition, Range
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Filter, FieldCondition, Range, QueryRequest, SearchParams, QuantizationSearchParams,
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 import sys
+import threading
+import time
+
+import numpy as np
 
 sys.path.append(os.getcwd())
 from app.core.config import settings
+from app.core.metrics import SEARCH_FALLBACKS, request_tag, set_backend, stage
+from app.services.local_index import LocalIndex, default_store_dir
+from app.services.cache import LRUCache
+from app.services.batcher import BatchingEncoder
+from app.services.health import CircuitBreaker
+from app.services.watcher import FileWatcher, Poller
+from app.services.encoder import is_uncased
+
+
+def normalize_query(text: str, lowercase: bool = False) -> str:
+    """
+    Canonical form of a query used as the embedding cache key: whitespace is
+    collapsed, and case folded only for an uncased encoder (`lowercase`), so
+    two queries share a key only if they embed to the same vector.
+    """
+    text = " ".join(text.split())
+    return text.lower() if lowercase else text
 
 
 class CareerEngine:
-    def __init__(self):
+    def __init__(self, model=None, client=None, local_index=None, use_qdrant=True):
+        """
+        Dependencies can be injected (the benchmarks do): `model` is anything with
+        SentenceTransformer's `encode` (by default an `Encoder` built from the
+        ENCODER_* settings), `client` a QdrantClient and `local_index` a
+        LocalIndex. `use_qdrant=False` skips connecting to Qdrant altogether.
+        """
+        self.async_client = None
+        self.qdrant_version = None
+        if client is not None or not use_qdrant:
+            self.client = client
+        else:
+            self._connect_qdrant()
+
+        self.collection = "careers"
+        if self.client is not None:
+            self.refresh_qdrant_version()
+
+        # Local fallback index. The built store is memory-mapped, so it is cheap to
+        # open up front; the legacy npy + CSV pair is only loaded when needed.
+        # `reload_index()` swaps in a rebuilt store by replacing this one reference;
+        # searches hold on to the snapshot they started with.
+        self.local_index = local_index
+        self.index_loaded_at = time.time() if local_index is not None else None
+        self.index_watcher = None
+        self.qdrant_watcher = None
+        if self.client is None or LocalIndex.store_exists():
+            self._ensure_local_data_loaded()
+
+        # Query encoder, used with both backends (the same model and backend as the indexer)
+        if model is None:
+            from app.services.encoder import Encoder
+
+            model = Encoder.load()
+        self.model = model
+        self.lowercase_queries = is_uncased(model)
+        self._init_process_state()
+
+    def _init_process_state(self):
+        """Locks, threads, pools and caches: everything that must not be inherited across fork."""
+        self.qdrant_breaker = CircuitBreaker(
+            failure_threshold=settings.QDRANT_FAILURE_THRESHOLD,
+            cooldown=settings.QDRANT_COOLDOWN_SECONDS,
+            probe=self._probe_qdrant,
+            name="Qdrant",
+        )
+        self._reload_lock = threading.Lock()
+        self.embedding_cache = LRUCache(
+            maxsize=settings.EMBEDDING_CACHE_SIZE,
+            ttl=settings.EMBEDDING_CACHE_TTL,
+        )
+        self.encoder = None
+        if settings.ENCODE_BATCHING_ENABLED:
+            self.encoder = BatchingEncoder(
+                self.model,
+                max_batch_size=settings.ENCODE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.ENCODE_MAX_WAIT_MS,
+            )
+        # Bounded pool for CPU encoding on the async path when batching is disabled
+        self.encode_executor = ThreadPoolExecutor(
+            max_workers=settings.ENCODE_EXECUTOR_WORKERS,
+            thread_name_prefix="encode",
+        )
+
+    def after_fork(self):
+        """
+        Re-initialize per-process state in a worker forked from a preloading master.
+
+        The model weights and the local index (memory-mapped) stay as inherited and
+        are shared copy-on-write; threads, locks, pools and the remote Qdrant
+        connections are recreated, since none of them survive fork. An embedded
+        Qdrant client is kept: its storage is read-only here and its file lock is
+        the master's.
+        """
+        if self.async_client is not None:
+            self._connect_qdrant()
+        self._init_process_state()
+
+    def _connect_qdrant(self):
         print("⚙️  Connecting to Qdrant...")
         db_path = getattr(settings, "QDRANT_LOCAL_PATH", os.path.join(settings.DATA_DIR, "qdrant_db"))
 
         # Try to connect to remote or local Qdrant; fall back to an in-process local search
         try:
             if settings.QDRANT_URL and settings.QDRANT_API_KEY:
-                self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+                self.client = QdrantClient(
+                    url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY, timeout=settings.QDRANT_TIMEOUT
+                )
+                self.async_client = AsyncQdrantClient(
+                    url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY, timeout=settings.QDRANT_TIMEOUT
+                )
             else:
+                # Embedded storage is locked by a single client, so the async path
+                # runs this client's calls in a worker thread instead.
                 self.client = QdrantClient(path=db_path)
             print("✅ Qdrant client initialized")
         except Exception as e:
             print(f"⚠️ Qdrant initialization failed: {e} — falling back to local search")
             self.client = None
+            self.async_client = None
 
-            # Local fallback: load precomputed embeddings and job metadata
-            try:
-                import numpy as _np
-                import pandas as _pd
-
-                emb_path = os.path.join(settings.DATA_DIR, "career_embeddings.npy")
-                csv_path = os.path.join(settings.DATA_DIR, "career_gold_dataset.csv")
-                self.embeddings = _np.load(emb_path)
-                df = _pd.read_csv(csv_path)
-                self.local_jobs = df.to_dict(orient="records")
-                print(f"✅ Loaded local fallback data: {len(self.local_jobs)} jobs")
-            except Exception as e2:
-                print(f"❌ Failed to load local fallback data: {e2}")
-                self.embeddings = None
-                self.local_jobs = []
-
-        # SentenceTransformer used both with Qdrant (to create query vectors)
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.collection = "careers"
-        # Local fallback data (loaded on demand)
-        self.embeddings = getattr(self, 'embeddings', None)
-        self.local_jobs = getattr(self, 'local_jobs', [])
+    def _cache_vector(self, key, vector):
+        vector.flags.writeable = False
+        self.embedding_cache.set(key, vector)
+        return vector
+
+    def encode_query(self, user_query: str):
+        """Encode a query, reusing the cached vector for repeated queries."""
+        key = normalize_query(user_query, self.lowercase_queries)
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            vector = self.encoder.encode(key) if self.encoder else self.model.encode(key)
+            vector = self._cache_vector(key, vector)
+        return vector
+
+    async def aencode_query(self, user_query: str):
+        """Async `encode_query`: the forward pass runs off the event loop."""
+        key = normalize_query(user_query, self.lowercase_queries)
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            if self.encoder:
+                future = self.encoder.submit(key)
+            else:
+                future = self.encode_executor.submit(self.model.encode, key)
+            vector = self._cache_vector(key, await asyncio.wrap_future(future))
+        return vector
+
+    def encode_queries(self, user_queries):
+        """Encode many queries at once; only cache misses go through one model.encode call."""
+        keys = [normalize_query(q, self.lowercase_queries) for q in user_queries]
+        vectors = {}
+        for key in keys:
+            if key not in vectors:
+                vectors[key] = self.embedding_cache.get(key)
+        missing = [key for key, vec in vectors.items() if vec is None]
+        if missing:
+            encoded = self.model.encode(missing, batch_size=min(len(missing), 64))
+            for key, vector in zip(missing, encoded):
+                vectors[key] = self._cache_vector(key, vector)
+        return np.stack([vectors[key] for key in keys])
+
+    def _probe_qdrant(self):
+        self.client.get_collection(self.collection)
+
+    def _use_qdrant(self) -> bool:
+        if self.client is None:
+            return False
+        if self.qdrant_breaker.allow_request():
+            return True
+        SEARCH_FALLBACKS.inc(reason="circuit_open")
+        return False
+
+    def _qdrant_failed(self, e, what="query"):
+        # Other Qdrant/runtime errors: try local fallback if possible
+        self.qdrant_breaker.record_failure(e)
+        SEARCH_FALLBACKS.inc(reason="error")
+        print(f"{request_tag()}⚠️ Qdrant {what} failed: {e} — attempting local fallback")
+        self._ensure_local_data_loaded()
+        # if local data missing, re-raise original error
+        if self.local_index is None:
+            raise e
+
+    def backend_status(self):
+        """Which backend is serving searches right now, and the state of each."""
+        if self.client is not None and self.qdrant_breaker.state == CircuitBreaker.CLOSED:
+            active = "qdrant"
+        elif self.local_index is not None:
+            active = "local"
+        else:
+            active = "none"
+        return {
+            "active_backend": active,
+            "qdrant": (
+                {**self.qdrant_breaker.snapshot(), "version": self.qdrant_version}
+                if self.client is not None else None
+            ),
+            "local_index": {
+                "loaded": self.local_index is not None,
+                "jobs": len(self.local_index) if self.local_index is not None else 0,
+                "version": self.local_index_version,
+                "loaded_at": self.index_loaded_at,
+                "ann": (
+                    {"nlist": self.local_index.ann.nlist, "nprobe": settings.LOCAL_ANN_NPROBE}
+                    if self.local_index is not None and self.local_index.ann is not None else None
+                ),
+            },
+            "encoder": self.model.describe() if hasattr(self.model, "describe") else None,
+        }
 
     def _ensure_local_data_loaded(self):
-        if self.embeddings is not None and getattr(self, 'local_jobs', None):
+        if self.local_index is not None:
             return
         try:
-            import numpy as _np
-            import pandas as _pd
-
-            emb_path = os.path.join(settings.DATA_DIR, "career_embeddings.npy")
-            csv_path = os.path.join(settings.DATA_DIR, "career_gold_dataset.csv")
-            self.embeddings = _np.load(emb_path)
-            df = _pd.read_csv(csv_path)
-            self.local_jobs = df.to_dict(orient="records")
-            print(f"✅ Loaded local fallback data: {len(self.local_jobs)} jobs")
+            self.local_index = LocalIndex.load_default()
+            self.index_loaded_at = time.time()
+            print(f"✅ Loaded local fallback data: {len(self.local_index)} jobs")
         except Exception as e:
             print(f"❌ Failed to load local fallback data: {e}")
-            self.embeddings = None
-            self.local_jobs = []
-
-    def search(self, user_query: str, max_education_level: int = 5, top_k=5):
-        import time
-        t0 = time.time()
-        # If Qdrant is available, use it as before
-        if self.client:
-            # If the remote collection is missing, fall back to local search instead of raising.
+            self.local_index = None
+
+    @property
+    def local_index_version(self):
+        """Version of the active local index snapshot."""
+        local_index = self.local_index
+        return local_index.version if local_index is not None else None
+
+    @property
+    def index_version(self):
+        """
+        Version of the index serving searches right now: the Qdrant collection
+        while Qdrant is in use, otherwise the local snapshot. Cached responses
+        are keyed by it, so it changes whenever the served results can.
+        """
+        if (self.qdrant_version is not None and self.client is not None
+                and self.qdrant_breaker.state == CircuitBreaker.CLOSED):
+            return self.qdrant_version
+        return self.local_index_version
+
+    def _fetch_qdrant_version(self):
+        """
+        '<collection>:<digest>' for the collection behind the alias. The indexer
+        stores a content digest in the collection metadata; collections indexed
+        before that fall back to their point count.
+        """
+        target = self.collection
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection:
+                target = alias.collection_name
+                break
+        info = self.client.get_collection(target)
+        digest = (info.config.metadata or {}).get("content_digest")
+        return f"{target}:{digest[:16] if digest else info.points_count}"
+
+    def refresh_qdrant_version(self):
+        """Re-read the served Qdrant collection's version; it stays as it was if Qdrant cannot be reached."""
+        try:
+            version = self._fetch_qdrant_version()
+        except Exception as e:
+            print(f"⚠️ Could not read the Qdrant index version: {e}")
+            return self.qdrant_version
+        if version != self.qdrant_version:
+            if self.qdrant_version is not None:
+                print(f"🔄 Qdrant index changed: {self.qdrant_version} -> {version}")
+            self.qdrant_version = version
+        return version
+
+    def reload_index(self, force=False):
+        """
+        Load the current local index store and swap it in if its version changed.
+
+        The new snapshot is opened and warmed up (id map, one search) before the
+        swap, so requests never see a half-loaded index; in-flight searches
+        finish on the snapshot they already hold.
+        """
+        with self._reload_lock:
+            previous = self.local_index_version
+            if not LocalIndex.store_exists():
+                return {"reloaded": False, "version": previous, "detail": "no local index store"}
+            snapshot = LocalIndex.load()
+            if snapshot.version == previous and not force:
+                return {"reloaded": False, "version": previous, "detail": "already up to date"}
+            snapshot.row_of("")
+            snapshot.search(np.zeros(snapshot.dim, dtype=np.float32), top_k=1)
+
+            self.local_index = snapshot
+            self.index_loaded_at = time.time()
+            print(f"🔄 Local index reloaded: {previous} -> {snapshot.version} ({len(snapshot)} jobs)")
+            return {"reloaded": True, "version": snapshot.version, "previous_version": previous}
+
+    def start_index_watcher(self):
+        """
+        Every INDEX_WATCH_INTERVAL seconds: reload the local store when its
+        meta.json is replaced, and re-read the Qdrant collection's version, so
+        a reindex from another host also reaches `index_version`.
+        """
+        if settings.INDEX_WATCH_INTERVAL <= 0:
+            return
+        if self.index_watcher is None:
+            self.index_watcher = FileWatcher(
+                os.path.join(default_store_dir(), "meta.json"),
+                interval=settings.INDEX_WATCH_INTERVAL,
+                on_change=self.reload_index,
+                name="index-watcher",
+            ).start()
+        if self.client is not None and self.qdrant_watcher is None:
+            self.qdrant_watcher = Poller(
+                self.refresh_qdrant_version,
+                interval=settings.INDEX_WATCH_INTERVAL,
+                name="qdrant-version-watcher",
+            ).start()
+
+    def _require_local_index(self):
+        self._ensure_local_data_loaded()
+        if self.local_index is None or len(self.local_index) == 0:
+            raise RuntimeError("No search backend available (Qdrant unavailable and local fallback missing)")
+        return self.local_index
+
+    def _local_search(self, query_vector, max_education_level, top_k, min_salary=None, min_growth=None):
+        local_index = self._require_local_index()
+        set_backend("local")
+        try:
+            with stage("local_scoring"):
+                return local_index.search(
+                    query_vector, max_job_zone=max_education_level, top_k=top_k,
+                    min_salary=min_salary, min_growth=min_growth,
+                )
+        except Exception as e:
+            raise RuntimeError(f"Local search failed: {e}")
+
+    @staticmethod
+    def _build_filter(max_education_level, min_salary=None, min_growth=None):
+        """Job zone range plus optional salary/growth minimums, all served by payload indexes."""
+        must = [
+            FieldCondition(
+                key="job_zone",
+                range=Range(lte=max_education_level)
+            )
+        ]
+        if min_salary is not None:
+            must.append(FieldCondition(key="median_wage", range=Range(gte=min_salary)))
+        if min_growth is not None:
+            must.append(FieldCondition(key="growth_pct", range=Range(gte=min_growth)))
+        return Filter(must=must)
+
+    @staticmethod
+    def _format_hits(points):
+        results = []
+        for hit in points:
+            payload = hit.payload
+            results.append({
+                "id": payload.get('soc_code', str(hit.id)),
+                "title": payload.get('title', 'Unknown'),
+                "match_score": round(hit.score * 100, 2),
+                "education_requirement": payload.get('education', ''),
+                "description": payload.get('description', ''),
+                "median_wage": payload.get('median_wage'),
+                "growth_pct": payload.get('growth_pct'),
+            })
+        return results
+
+    @staticmethod
+    def _search_params():
+        """Rescore oversampled candidates with the original vectors when the collection is quantized."""
+        if not settings.QDRANT_QUANTIZATION:
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=True,
+                oversampling=settings.QDRANT_OVERSAMPLING,
+            )
+        )
+
+    def _query_kwargs(self, query_vector, max_education_level, top_k, min_salary=None, min_growth=None):
+        return dict(
+            collection_name=self.collection,
+            query=query_vector.tolist(),
+            limit=top_k,
+            with_payload=True,
+            query_filter=self._build_filter(max_education_level, min_salary, min_growth),
+            search_params=self._search_params(),
+        )
+
+    def search(self, user_query: str, max_education_level: int = 5, top_k=5, min_salary=None, min_growth=None):
+        with stage("encode"):
+            query_vector = self.encode_query(user_query)
+        # Use Qdrant unless its circuit breaker is open
+        if self._use_qdrant():
             # If the remote collection is missing, query_points will raise an exception
             # and fall back to local search.
             try:
+                set_backend("qdrant")
+                with stage("vector_query"):
+                    search_result = self.client.query_points(
+                        **self._query_kwargs(query_vector, max_education_level, top_k, min_salary, min_growth)
+                    )
+                self.qdrant_breaker.record_success()
+                return self._format_hits(search_result.points)
+            except Exception as e:
+                self._qdrant_failed(e)
 
-                t1 = time.time()
-                query_vector = self.model.encode(user_query).tolist()
-                t2 = time.time()
-
-                search_result = self.client.query_points(
-                    collection_name=self.collection,
-                    query=query_vector,
-                    limit=top_k,
-                    with_payload=True,
-                    query_filter=Filter(
-                        must=[
-                            FieldCondition(
-                                key="job_zone",
-                                range=Range(lte=max_education_level)
-                            )
-                        ]
+        # Local fallback search using the in-memory index
+        return self._local_search(query_vector, max_education_level, top_k, min_salary, min_growth)
+
+    async def asearch(self, user_query: str, max_education_level: int = 5, top_k=5, min_salary=None, min_growth=None):
+        """Async `search`: Qdrant I/O is awaited and CPU work runs off the event loop."""
+        with stage("encode"):
+            query_vector = await self.aencode_query(user_query)
+        if self._use_qdrant():
+            try:
+                kwargs = self._query_kwargs(query_vector, max_education_level, top_k, min_salary, min_growth)
+                set_backend("qdrant")
+                with stage("vector_query"):
+                    if self.async_client:
+                        search_result = await self.async_client.query_points(**kwargs)
+                    else:
+                        search_result = await asyncio.to_thread(self.client.query_points, **kwargs)
+                self.qdrant_breaker.record_success()
+                return self._format_hits(search_result.points)
+            except Exception as e:
+                await asyncio.to_thread(self._qdrant_failed, e)
+
+        return await asyncio.to_thread(
+            self._local_search, query_vector, max_education_level, top_k, min_salary, min_growth
+        )
+
+    def search_batch(self, user_queries, max_education_levels, top_k=5, min_salaries=None, min_growths=None):
+        """
+        Search many queries at once. Returns one result list per query, in input order.
+        Queries are grouped by (education level, min salary, min growth) so each
+        group shares one filter.
+        """
+        if not user_queries:
+            return []
+        with stage("encode"):
+            vectors = self.encode_queries(user_queries)
+
+        min_salaries = min_salaries or [None] * len(user_queries)
+        min_growths = min_growths or [None] * len(user_queries)
+        keys = list(zip(max_education_levels, min_salaries, min_growths))
+        groups = {}
+        for i, key in enumerate(keys):
+            groups.setdefault(key, []).append(i)
+
+        if self._use_qdrant():
+            try:
+                filters = {key: self._build_filter(*key) for key in groups}
+                params = self._search_params()
+                requests = [
+                    QueryRequest(
+                        query=vectors[i].tolist(),
+                        filter=filters[keys[i]],
+                        limit=top_k,
+                        with_payload=True,
+                        params=params,
                     )
+                    for i in range(len(user_queries))
+                ]
+                set_backend("qdrant")
+                with stage("vector_query"):
+                    responses = self.client.query_batch_points(
+                        collection_name=self.collection,
+                        requests=requests,
+                    )
+                self.qdrant_breaker.record_success()
+                return [self._format_hits(r.points) for r in responses]
+            except Exception as e:
+                self._qdrant_failed(e, what="batch query")
+
+        local_index = self._require_local_index()
+        set_backend("local")
+        results = [None] * len(user_queries)
+        with stage("local_scoring"):
+            for (level, min_salary, min_growth), rows in groups.items():
+                hits = local_index.search_batch(
+                    vectors[rows], max_job_zone=level, top_k=top_k, min_salary=min_salary, min_growth=min_growth
                 )
+                for i, row_hits in zip(rows, hits):
+                    results[i] = row_hits
+        return results
 
-                results = []
-                for hit in search_result.points:
-                    payload = hit.payload
-                    results.append({
-                        "id": payload.get('soc_code', str(hit.id)),
-                        "title": payload.get('title', 'Unknown'),
-                        "match_score": round(hit.score * 100, 2),
-                        "education_requirement": payload.get('education', ''),
-                        "description": payload.get('description', '')
-                    })
-
-                t3 = time.time()
-                print(f"[TIMING] Qdrant: encode={t2-t1:.3f}s, query={t3-t2:.3f}s, total={t3-t0:.3f}s")
-                return results
-            except Exception as e:
-                # Other Qdrant/runtime errors: try local fallback if possible
-                print(f"⚠️ Qdrant query failed: {e} — attempting local fallback")
-                self._ensure_local_data_loaded()
-                # if local data missing, re-raise original error
-                if self.embeddings is None or not self.local_jobs:
-                    raise
-
-        # Local fallback search using precomputed embeddings
-        # Ensure local data is loaded
-        self._ensure_local_data_loaded()
-        if self.embeddings is None or not getattr(self, 'local_jobs', None) or len(self.local_jobs) == 0:
-            raise RuntimeError("No search backend available (Qdrant unavailable and local fallback missing)")
+    def related(self, soc_code: str, max_education_level: int = 5, top_k=5):
+        """
+        Careers most similar to `soc_code`, served from the local index's
+        precomputed neighbor table. Returns None for an unknown code.
+        """
+        local_index = self._require_local_index()
+        set_backend("local")
+        row = local_index.row_of(soc_code)
+        if row is None:
+            return None
+        job = local_index.job(row)
+        return {
+            "id": job["id"],
+            "title": job["title"],
+            "related": local_index.related(row, max_job_zone=max_education_level, top_k=top_k),
+        }
 
-        # Compute similarity between query vector and embeddings
-        t4 = time.time()
-        query_vec = self.model.encode(user_query).reshape(1, -1)
-        t5 = time.time()
-        try:
-            from sklearn.metrics.pairwise import cosine_similarity
-            import numpy as _np
-
-            sims = cosine_similarity(query_vec, self.embeddings)[0]
-            # Filter by job_zone (csv column 'Job Zone' -- numeric), then take top_k
-            indexed = list(enumerate(sims))
-            # Apply education/job zone filter
-            filtered = []
-            for idx, score in indexed:
-                try:
-                    job_zone = float(self.local_jobs[idx].get('Job Zone', self.local_jobs[idx].get('Job_Zone', 5)))
-                except Exception:
-                    job_zone = 5.0
-                if job_zone <= float(max_education_level):
-                    filtered.append((idx, score))
-
-            filtered.sort(key=lambda x: x[1], reverse=True)
-            top = filtered[:top_k]
-
-            results = []
-            for idx, score in top:
-                row = self.local_jobs[idx]
-                results.append({
-                    "id": row.get('O*NET-SOC Code') or row.get('O*NET_SOC Code') or str(idx),
-                    "title": row.get('Title') or row.get('title') or 'Unknown',
-                    "match_score": round(float(score) * 100, 2),
-                    "education_requirement": row.get('Education_Level') or row.get('Education Level') or '',
-                    "description": row.get('Description') or ''
-                })
-
-            t6 = time.time()
-            print(f"[TIMING] Local: encode={t5-t4:.3f}s, similarity+filter={t6-t5:.3f}s, total={t6-t0:.3f}s")
-            return results
-        except Exception as e:
-            raise RuntimeError(f"Local search failed: {e}")
\ No newline at end of file
+    async def aclose(self):
+        for watcher in (self.index_watcher, self.qdrant_watcher):
+            if watcher:
+                watcher.stop()
+        if self.async_client:
+            await self.async_client.close()
+        self.encode_executor.shutdown(wait=False)
@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of a backend and stops calling it while it is failing.
+
+    - closed: requests go to the backend; consecutive failures are counted.
+    - open: after `failure_threshold` failures requests skip the backend
+      for `cooldown` seconds.
+    - half_open: once the cooldown has elapsed, `probe()` runs in a
+      background thread. Success closes the breaker, failure re-opens it.
+      Requests keep skipping the backend until the probe succeeds.
+
+    `clock` returns seconds (time.monotonic by default).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, cooldown=30.0, probe=None, name="backend", clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.probe = probe
+        self.name = name
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                threading.Thread(target=self._run_probe, name=f"{self.name}-probe", daemon=True).start()
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                self.consecutive_failures = 0
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.last_error = str(error) if error is not None else None
+            if self.state != self.CLOSED:
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self._open()
+                print(f"⚡ {self.name} circuit opened after {self.consecutive_failures} failures")
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self.trips += 1
+
+    def _run_probe(self):
+        try:
+            if self.probe is not None:
+                self.probe()
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            print(f"⚠️ {self.name} probe failed: {e}")
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+        print(f"✅ {self.name} probe succeeded — circuit closed")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "trips": self.trips,
+                "open_for_s": round(self.clock() - self.opened_at, 1) if self.opened_at else None,
+                "last_error": self.last_error,
+            }
@@ -1,10 +1,22 @@
 import pandas as pd
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from qdrant_client import QdrantClient
 # FIXED IMPORT LINE BELOW:
-from qdrant_client.models import PointStruct, VectorParams, Distance, PayloadSchemaType
+from qdrant_client.models import (
+    PointStruct, VectorParams, Distance, PayloadSchemaType, PointIdsList,
+    CreateAliasOperation, CreateAlias, DeleteAliasOperation, DeleteAlias,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+)
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import hashlib
+import json
 import os
+import random
 import sys
+import time
+import uuid
 from dotenv import load_dotenv
 
 # Load .env file explicitly
@@ -13,94 +25,455 @@ load_dotenv()
 # Add project root to path
 sys.path.append(os.getcwd())
 from app.core.config import settings
+from app.services.local_index import LocalIndexWriter
+from app.services.data_processor import iter_processed_chunks, processed_path, WAGE_COLUMN, GROWTH_COLUMN
+from app.services.encoder import encoder_id
 
-def index_to_qdrant():
-    print("🚀 Starting Indexing Process...")
+COLLECTION_NAME = "careers"
+BATCH_SIZE = 100          # points per upsert request
+CHUNK_SIZE = 2000         # dataset rows read, encoded and uploaded at a time
+ENCODE_BATCH_SIZE = 64
+UPLOAD_WORKERS = 4
+MAX_IN_FLIGHT = 8         # upsert batches queued before the reader waits
+MAX_RETRIES = 5
+# Fixed namespace so a SOC code always maps to the same point ID
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2a8e-4b7d-5e9a-9c3f-2d8b1a7e4c60")
+# Payload fields with a Qdrant index, so range filters on them are resolved by the index
+PAYLOAD_INDEXES = {
+    "job_zone": PayloadSchemaType.INTEGER,
+    "median_wage": PayloadSchemaType.INTEGER,
+    "growth_pct": PayloadSchemaType.FLOAT,
+}
 
-    # --- 1. CONNECT (Hybrid Cloud/Local Logic) ---
+
+def point_id(soc_code: str) -> str:
+    """Stable Qdrant point ID derived from the O*NET SOC code."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, soc_code))
+
+
+def _numeric_column(chunk, name):
+    """Column as float64 with NaN for missing values (also when the dataset predates it)."""
+    if name not in chunk.columns:
+        return np.full(len(chunk), np.nan)
+    return pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def build_payloads(chunk) -> list:
+    # Handle potential float/NaN issues in Job Zone
+    job_zones = pd.to_numeric(chunk['Job Zone'], errors="coerce").fillna(1).astype(int)
+    payloads = [
+        {
+            "title": title,
+            "soc_code": soc_code,
+            "education": education,
+            "job_zone": int(jz),
+            "description": str(description)[:400]
+        }
+        for title, soc_code, education, jz, description in zip(
+            chunk['Title'], chunk['O*NET-SOC Code'], chunk['Education_Level'],
+            job_zones, chunk['Description'],
+        )
+    ]
+    # Unknown wages are left out of the payload, so range filters never match them
+    for payload, wage, growth in zip(payloads, _numeric_column(chunk, WAGE_COLUMN), _numeric_column(chunk, GROWTH_COLUMN)):
+        if not np.isnan(wage):
+            payload["median_wage"] = int(wage)
+        if not np.isnan(growth):
+            payload["growth_pct"] = float(growth)
+    return payloads
+
+
+def content_hash(text: str, payload: dict, encoder: str) -> str:
+    """Hash of everything that ends up in a point (including the encoder), used to skip unchanged rows."""
+    material = json.dumps([text, payload, encoder], sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+
+def connect():
     qdrant_url = os.getenv("QDRANT_URL")
     qdrant_key = os.getenv("QDRANT_API_KEY")
 
     if qdrant_url and qdrant_key:
         print(f"☁️  Cloud Detected. Connecting to: {qdrant_url[:20]}...")
         try:
-            client = QdrantClient(url=qdrant_url, api_key=qdrant_key, timeout=60)
+            return QdrantClient(url=qdrant_url, api_key=qdrant_key, timeout=60)
         except Exception as e:
             print(f"⚠️ Cloud Connection Failed: {e}")
-            return
-    else:
-        print("💾 No Cloud Keys found. Using Local Disk (app/data/qdrant_db)...")
-        db_path = os.path.join(settings.DATA_DIR, "qdrant_db")
-        client = QdrantClient(path=db_path)
-    
-    COLLECTION_NAME = "careers"
-
-    # --- 2. RESET COLLECTION & CREATE INDEX ---
-    try:
-        print("   Recreating Collection...")
-        client.recreate_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE),
-        )
-        
-        # *** INDEX CREATION (Fixed) ***
-        print("   Creating Index for 'job_zone' filtering...")
+            return None
+    print("💾 No Cloud Keys found. Using Local Disk (app/data/qdrant_db)...")
+    db_path = os.path.join(settings.DATA_DIR, "qdrant_db")
+    return QdrantClient(path=db_path)
+
+
+def resolve_live_collection(client):
+    """Name of the collection currently served as COLLECTION_NAME (via alias or directly)."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == COLLECTION_NAME:
+            return alias.collection_name
+    if client.collection_exists(COLLECTION_NAME):
+        return COLLECTION_NAME
+    return None
+
+
+def quantization_config():
+    """Scalar int8 quantization for the collection, or None when QDRANT_QUANTIZATION is unset."""
+    if not settings.QDRANT_QUANTIZATION:
+        return None
+    if settings.QDRANT_QUANTIZATION != "int8":
+        raise ValueError(f"Unsupported QDRANT_QUANTIZATION '{settings.QDRANT_QUANTIZATION}' (expected 'int8')")
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+    )
+
+
+def create_collection(client, name, size):
+    quantization = quantization_config()
+    client.create_collection(
+        collection_name=name,
+        # With quantization the int8 copy stays in RAM and the originals (used
+        # only for rescoring) move to disk.
+        vectors_config=VectorParams(size=size, distance=Distance.COSINE, on_disk=quantization is not None),
+        quantization_config=quantization,
+    )
+
+    ensure_payload_indexes(client, name)
+
+
+def ensure_payload_indexes(client, name):
+    """Create the payload indexes in PAYLOAD_INDEXES that `name` does not have yet."""
+    existing = client.get_collection(name).payload_schema or {}
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field in existing:
+            continue
+        print(f"   Creating Index for '{field}' filtering...")
         client.create_payload_index(
-            collection_name=COLLECTION_NAME,
-            field_name="job_zone",
-            field_schema=PayloadSchemaType.INTEGER  # Use the Enum, not a raw string
+            collection_name=name,
+            field_name=field,
+            field_schema=schema  # Use the Enum, not a raw string
         )
-        print("   ✅ Collection ready.")
-        
-    except Exception as e:
-        print(f"❌ Critical Error creating collection: {e}")
-        return
 
-    # --- 3. LOAD DATA ---
-    csv_path = os.path.join(settings.DATA_DIR, settings.PROCESSED_DATA_FILE)
-    if not os.path.exists(csv_path):
-        print(f"❌ Error: Data file not found at {csv_path}")
+
+def ensure_quantization(client, name):
+    """Enable scalar quantization on an existing collection built without it."""
+    quantization = quantization_config()
+    if quantization is None:
         return
+    if client.get_collection(name).config.quantization_config is None:
+        print("   Enabling int8 scalar quantization on the existing collection...")
+        client.update_collection(collection_name=name, quantization_config=quantization)
+
+
+def fetch_existing_hashes(client, name) -> dict:
+    """Map of point ID -> content_hash for every point in `name`."""
+    hashes = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=name,
+            limit=1000,
+            offset=offset,
+            with_payload=["content_hash"],
+            with_vectors=False,
+        )
+        for p in points:
+            hashes[str(p.id)] = (p.payload or {}).get("content_hash")
+        if offset is None:
+            return hashes
+
+
+def collection_digest(hashes: dict) -> str:
+    """Digest of a whole collection: every point ID with its content hash."""
+    material = json.dumps(sorted(hashes.items()))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def collection_metadata(client, name) -> dict:
+    return client.get_collection(name).config.metadata or {}
+
+
+def record_collection_metadata(client, name, **metadata):
+    """
+    Store the collection's `content_digest` (read by the engine as part of the
+    index version, so response caches notice a reindex) and `encoder`.
+    """
+    try:
+        if {**collection_metadata(client, name), **metadata} == collection_metadata(client, name):
+            return
+        client.update_collection(collection_name=name, metadata=metadata)
+    except Exception as e:
+        print(f"   ⚠️ Could not record the collection metadata: {e}")
+
+
+def fetch_vectors(client, name, ids) -> dict:
+    vectors = {}
+    for i in range(0, len(ids), 1000):
+        for p in client.retrieve(collection_name=name, ids=ids[i : i + 1000], with_vectors=True):
+            vectors[str(p.id)] = np.asarray(p.vector, dtype=np.float32)
+    return vectors
 
-    df = pd.read_csv(csv_path).fillna("Unknown")
-    
-    print(f"   🧠 Vectorizing {len(df)} jobs...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    vectors = model.encode(df['combined_text'].tolist(), show_progress_bar=True)
 
-    points = []
-    for idx, row in df.iterrows():
-        # Handle potential float/NaN issues in Job Zone
+def upsert_with_retry(client, name, points, max_retries=MAX_RETRIES):
+    """Upsert one batch, retrying with exponential backoff and jitter."""
+    for attempt in range(max_retries + 1):
         try:
-            jz = int(row['Job Zone'])
-        except:
-            jz = 1
-
-        points.append(PointStruct(
-            id=idx,
-            vector=vectors[idx].tolist(),
-            payload={
-                "title": row['Title'],
-                "soc_code": row['O*NET-SOC Code'],
-                "education": row['Education_Level'],
-                "job_zone": jz,
-                "description": str(row['Description'])[:400]
-            }
-        ))
-
-    # --- 4. UPLOAD IN BATCHES ---
-    print(f"   📤 Uploading {len(points)} points...")
-    
-    BATCH_SIZE = 100
-    for i in range(0, len(points), BATCH_SIZE):
-        batch = points[i : i + BATCH_SIZE]
+            client.upsert(collection_name=name, points=points, wait=True)
+            return len(points)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+            print(f"      ⚠️ Upload of {len(points)} points failed ({e}); retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class Uploader:
+    """
+    Uploads point batches from a thread pool while the caller encodes the next
+    chunk. At most `max_in_flight` batches are queued, which bounds memory.
+    """
+
+    def __init__(self, client, name, workers=UPLOAD_WORKERS, max_in_flight=MAX_IN_FLIGHT):
+        self.client = client
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="upload")
+        self.pending = deque()
+        self.uploaded = 0
+        self.failed = []
+
+    def submit(self, points):
+        for i in range(0, len(points), BATCH_SIZE):
+            while len(self.pending) >= self.max_in_flight:
+                self._wait_oldest()
+            self.pending.append(self.pool.submit(upsert_with_retry, self.client, self.name, points[i : i + BATCH_SIZE]))
+
+    def _wait_oldest(self):
         try:
-            client.upsert(collection_name=COLLECTION_NAME, points=batch)
-            print(f"      - Uploaded batch {i} to {i + len(batch)}")
+            self.uploaded += self.pending.popleft().result()
         except Exception as e:
-            print(f"      ❌ Failed to upload batch {i}: {e}")
+            self.failed.append(str(e))
+            print(f"      ❌ Batch failed after {MAX_RETRIES} retries: {e}")
+
+    def close(self):
+        while self.pending:
+            self._wait_oldest()
+        self.pool.shutdown()
+
+
+def iter_chunks(chunk_size, seen):
+    """Yield cleaned dataset chunks, skipping SOC codes already in `seen` (which is updated)."""
+    for chunk in iter_processed_chunks(chunk_size):
+        text_columns = chunk.select_dtypes(exclude="number").columns
+        chunk[text_columns] = chunk[text_columns].fillna("Unknown")
+        chunk = chunk.drop_duplicates(subset="O*NET-SOC Code")
+        chunk = chunk[~chunk["O*NET-SOC Code"].isin(seen)].reset_index(drop=True)
+        seen.update(chunk["O*NET-SOC Code"])
+        if len(chunk):
+            yield chunk
+
+
+def switch_alias(client, target, previous):
+    """Point COLLECTION_NAME at `target` in one atomic alias update."""
+    if previous == COLLECTION_NAME:
+        # One-time migration: a concrete collection cannot share its name with an alias.
+        print(f"   Dropping legacy collection '{COLLECTION_NAME}' to make room for the alias...")
+        client.delete_collection(COLLECTION_NAME)
+        previous = None
+    operations = []
+    if previous:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=COLLECTION_NAME)))
+    operations.append(CreateAliasOperation(
+        create_alias=CreateAlias(collection_name=target, alias_name=COLLECTION_NAME)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    print(f"   🔀 Alias '{COLLECTION_NAME}' -> '{target}'")
+    if previous and previous != target:
+        client.delete_collection(previous)
+        print(f"   🗑️  Removed previous collection '{previous}'")
+
+
+def index_to_qdrant(full=False, shadow=False, chunk_size=CHUNK_SIZE, workers=UPLOAD_WORKERS):
+    """
+    Sync the processed dataset into Qdrant.
+
+    By default only new or changed rows (by content hash) are re-encoded and
+    upserted, and points whose SOC code disappeared are deleted. `full`
+    rebuilds the collection from scratch. `shadow` builds a fresh collection
+    next to the live one and switches the alias over atomically, so search
+    never sees a half-built index.
+
+    The dataset is streamed in chunks of `chunk_size` rows: each chunk is encoded
+    while the previous one uploads from a thread pool, so memory stays flat
+    as the catalog grows.
+    """
+    print("🚀 Starting Indexing Process...")
+    started = time.time()
+
+    # --- 1. CONNECT (Hybrid Cloud/Local Logic) ---
+    client = connect()
+    if client is None:
+        return False
+    if not (os.getenv("QDRANT_URL") and os.getenv("QDRANT_API_KEY")):
+        workers = 1  # embedded Qdrant storage is not built for concurrent writers
+
+    if not any(os.path.exists(processed_path(fmt)) for fmt in ("parquet", "csv")):
+        print(f"❌ Error: Data file not found at {processed_path('parquet')}")
+        return False
+
+    # --- 2. PICK TARGET COLLECTION ---
+    encoder = encoder_id()
+    model = None
+    try:
+        live = resolve_live_collection(client)
+        if full and live and live != COLLECTION_NAME:
+            # Dropping an aliased collection would also drop the alias.
+            print("   Live collection is behind an alias — rebuilding as a shadow collection.")
+            shadow = True
+        live_encoder = collection_metadata(client, live).get("encoder") if live else None
+        if live and not full and not shadow and live_encoder not in (None, encoder):
+            # Every vector changes: build them next to the live ones rather than mixing models in place
+            print(f"   Encoder changed ({live_encoder} -> {encoder}) — rebuilding as a shadow collection.")
+            shadow = True
+        existing = {}
+        if live and not full:
+            existing = fetch_existing_hashes(client, live)
+
+        if shadow or live is None or full:
+            # A new collection is sized for the encoder's vectors
+            from app.services.encoder import Encoder
+
+            model = Encoder.load()
+            dim = model.dim
+        else:
+            dim = client.get_collection(live).config.params.vectors.size
+
+        if shadow:
+            target = f"{COLLECTION_NAME}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            print(f"   Building shadow collection '{target}'...")
+            create_collection(client, target, dim)
+        elif live is None or full:
+            target = live or COLLECTION_NAME
+            print("   Recreating Collection...")
+            if live:
+                client.delete_collection(target)
+            create_collection(client, target, dim)
+        else:
+            target = live
+            ensure_quantization(client, target)
+            ensure_payload_indexes(client, target)
+        print("   ✅ Collection ready.")
+    except Exception as e:
+        print(f"❌ Critical Error preparing collection: {e}")
+        return False
+
+    # --- 3. STREAM: DIFF -> ENCODE -> UPLOAD, chunk by chunk ---
+    seen = set()
+    uploader = Uploader(client, target, workers=workers)
+    # Memory-mapped store for the engine's local fallback, built from the same vectors
+    writer = LocalIndexWriter()
+    indexed_hashes = {}
+    rows = encoded = unchanged_rows = 0
+    encode_time = 0.0
+    try:
+        for chunk in iter_chunks(chunk_size, seen):
+            texts = chunk['combined_text'].tolist()
+            payloads = build_payloads(chunk)
+            ids = [point_id(p["soc_code"]) for p in payloads]
+            for pid, text, payload in zip(ids, texts, payloads):
+                payload["content_hash"] = indexed_hashes[pid] = content_hash(text, payload, encoder)
+
+            vectors = np.zeros((len(chunk), dim), dtype=np.float32)
+            unchanged = [i for i, pid in enumerate(ids) if existing.get(pid) == payloads[i]["content_hash"]]
+            known = fetch_vectors(client, live, [ids[i] for i in unchanged]) if unchanged else {}
+            for i in unchanged:
+                if ids[i] in known:
+                    vectors[i] = known[ids[i]]
+            changed = [i for i, pid in enumerate(ids) if pid not in known]
+
+            if changed:
+                if model is None:
+                    from app.services.encoder import Encoder
+
+                    model = Encoder.load()
+                    if model.dim != dim:
+                        raise RuntimeError(
+                            f"encoder vectors have {model.dim} dimensions but '{target}' holds {dim} "
+                            f"— rebuild with --shadow"
+                        )
+                t0 = time.time()
+                vectors[changed] = model.encode(
+                    [texts[i] for i in changed], batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False
+                )
+                encode_time += time.time() - t0
+
+            # A shadow collection starts empty, so it also needs the unchanged points.
+            to_upload = range(len(ids)) if shadow else changed
+            uploader.submit([PointStruct(id=ids[i], vector=vectors[i].tolist(), payload=payloads[i]) for i in to_upload])
+            writer.append_dataframe(chunk, vectors)
+
+            rows += len(chunk)
+            encoded += len(changed)
+            unchanged_rows += len(ids) - len(changed)
+            print(f"   🧠 {rows} rows read, {encoded} encoded, {uploader.uploaded} points uploaded...")
+    except Exception as e:
+        uploader.close()
+        writer.abort()
+        if shadow:
+            print(f"❌ Indexing aborted: {e} — leaving the live index untouched.")
+            client.delete_collection(target)
+        else:
+            print(f"❌ Indexing aborted: {e} — live collection may be partially updated; rerun to converge.")
+        return False
+    uploader.close()
+
+    if uploader.failed:
+        if shadow:
+            print(f"❌ {len(uploader.failed)} batches could not be uploaded — leaving the live index untouched.")
+            client.delete_collection(target)
+        else:
+            # Upserts went straight into the live collection, so the batches that
+            # made it are already served; the next run re-encodes the rest.
+            print(f"❌ {len(uploader.failed)} batches could not be uploaded — "
+                  f"live collection partially updated; rerun to converge.")
+        writer.abort()
+        return False
+
+    # --- 4. DELETE REMOVED ROWS / SWITCH ALIAS ---
+    removed = sorted(set(existing) - {point_id(soc) for soc in seen})
+    if removed and target == live:
+        client.delete(collection_name=target, points_selector=PointIdsList(points=removed))
+        print(f"   🗑️  Deleted {len(removed)} removed points")
+
+    record_collection_metadata(client, target, content_digest=collection_digest(indexed_hashes), encoder=encoder)
+    if shadow:
+        switch_alias(client, target, live)
+
+    try:
+        version = writer.finalize()
+        if writer.published:
+            print(f"   💾 Local index store written (version {version})")
+        else:
+            print(f"   💾 Local index store unchanged (version {version})")
+    except Exception as e:
+        writer.abort()
+        print(f"   ⚠️ Failed to write local index store: {e}")
+
+    elapsed = time.time() - started
+    print(f"   🎉 Indexing Complete in {elapsed:.1f}s!")
+    print(
+        f"   📊 {rows} rows ({encoded} encoded, {unchanged_rows} unchanged, {len(removed)} removed), "
+        f"{uploader.uploaded} points uploaded | {rows / elapsed:.0f} rows/s overall"
+        + (f", {encoded / encode_time:.0f} rows/s encoding" if encode_time else "")
+    )
+    return True
 
-    print("   🎉 Indexing Complete!")
 
 if __name__ == "__main__":
-    index_to_qdrant()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index the processed career dataset into Qdrant")
+    parser.add_argument("--full", action="store_true", help="rebuild from scratch instead of syncing changed rows")
+    parser.add_argument("--shadow", action="store_true", help="build a new collection and switch the alias atomically")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="dataset rows processed per chunk")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS, help="parallel upload threads")
+    args = parser.parse_args()
+    ok = index_to_qdrant(full=args.full, shadow=args.shadow, chunk_size=args.chunk_size, workers=args.workers)
+    sys.exit(0 if ok else 1)
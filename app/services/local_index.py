@@ -0,0 +1,802 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+from app.services.data_processor import WAGE_COLUMN, GROWTH_COLUMN
+
+
+def _first_column(df, names, default):
+    """Return the first column of `df` matching one of `names`, else a filled column."""
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series([default] * len(df), index=df.index)
+
+
+def default_store_dir():
+    return settings.LOCAL_INDEX_DIR or os.path.join(settings.DATA_DIR, "local_index")
+
+
+def _top_k(scores, k):
+    """Column indices and values of the `k` best scores in each row, best first."""
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class QuantizedVectors:
+    """
+    Compressed copy of the store vectors used for first-pass scoring.
+
+    int8 codes use a symmetric per-dimension scale (max |x| / 127), so a score
+    is `(query * scales) @ codes`; float16 codes are a plain half-precision
+    copy. Scores are approximate; callers rescore the best candidates against
+    the float32 vectors.
+    """
+
+    DTYPES = ("float16", "int8")
+    BLOCK = 16384
+
+    def __init__(self, codes, scales=None):
+        self.codes = codes
+        self.scales = scales
+
+    @property
+    def dtype(self):
+        return self.codes.dtype.name
+
+    @staticmethod
+    def exists(directory, dtype):
+        return os.path.exists(os.path.join(directory, f"vectors.{dtype}.npy"))
+
+    @classmethod
+    def write(cls, directory, vectors, dtype):
+        """Write the `dtype` codes for `vectors` (read block by block) into `directory`."""
+        if dtype not in cls.DTYPES:
+            raise ValueError(f"Unsupported vector dtype '{dtype}' (expected one of {cls.DTYPES})")
+        codes = np.lib.format.open_memmap(
+            os.path.join(directory, f"vectors.{dtype}.npy"), mode="w+", dtype=dtype, shape=vectors.shape
+        )
+        scales = None
+        if dtype == "int8":
+            max_abs = np.zeros(vectors.shape[1], dtype=np.float32)
+            for start in range(0, len(vectors), cls.BLOCK):
+                np.maximum(max_abs, np.abs(vectors[start:start + cls.BLOCK]).max(axis=0), out=max_abs)
+            scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            np.save(os.path.join(directory, "vectors.scales.npy"), scales)
+        for start in range(0, len(vectors), cls.BLOCK):
+            block = np.asarray(vectors[start:start + cls.BLOCK], dtype=np.float32)
+            if scales is not None:
+                block = np.clip(np.rint(block / scales), -127, 127)
+            codes[start:start + cls.BLOCK] = block.astype(dtype)
+        codes.flush()
+        del codes
+        return cls.load(directory, dtype)
+
+    @classmethod
+    def load(cls, directory, dtype, mmap_mode="r"):
+        codes = np.load(os.path.join(directory, f"vectors.{dtype}.npy"), mmap_mode=mmap_mode)
+        scales = np.load(os.path.join(directory, "vectors.scales.npy")) if dtype == "int8" else None
+        return cls(codes, scales)
+
+    def scores(self, queries, rows):
+        """Approximate scores of `queries` against `rows`, converted to float32 a block at a time."""
+        queries = queries * self.scales if self.scales is not None else queries
+        out = np.empty((len(queries), len(rows)), dtype=np.float32)
+        for start in range(0, len(rows), self.BLOCK):
+            block = self.codes[rows[start:start + self.BLOCK]].astype(np.float32)
+            out[:, start:start + self.BLOCK] = (block @ queries.T).T
+        return out
+
+
+class StringColumn:
+    """
+    Column of strings stored as one UTF-8 byte buffer plus int64 offsets.
+
+    Both arrays are plain .npy files, so a saved column can be memory-mapped
+    and shared between processes instead of living as per-row Python objects.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [str(v).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @classmethod
+    def load(cls, directory, name, mmap_mode="r"):
+        return cls(
+            np.load(os.path.join(directory, f"{name}.data.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode=mmap_mode),
+        )
+
+
+class ContentDigest:
+    """
+    SHA-256 of everything a local index store is built from: normalized
+    vectors, job zones, wages and string columns. Each field is hashed on its
+    own, so the result does not depend on how the rows were split into chunks.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+
+    def update(self, field, data):
+        self._hashes.setdefault(field, hashlib.sha256()).update(data)
+
+    def update_rows(self, vectors, job_zone, median_wage, growth_pct, strings):
+        """Hash one block of rows; `strings` maps each string column to its UTF-8 values."""
+        self.update("vectors", np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.update("job_zone", np.asarray(job_zone, dtype=np.float32).tobytes())
+        self.update("median_wage", np.asarray(median_wage, dtype=np.float32).tobytes())
+        self.update("growth_pct", np.asarray(growth_pct, dtype=np.float32).tobytes())
+        for name, encoded in strings.items():
+            self.update(name, b"".join(encoded))
+            self.update(f"{name}.lengths", np.asarray([len(b) for b in encoded], dtype=np.int64).tobytes())
+
+    def hexdigest(self, **extra):
+        material = {"fields": {name: h.hexdigest() for name, h in self._hashes.items()}, **extra}
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def read_meta(directory=None):
+    """The store's meta.json, or None when there is no store."""
+    try:
+        with open(os.path.join(directory or default_store_dir(), "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def swap_in_store(staging, directory):
+    """
+    Replace the store at `directory` with the complete store in `staging` by
+    renaming. Processes that mapped the old files keep reading them (the
+    unlinked inodes live on) until they reload, and the new meta.json tells
+    their index watcher to do so.
+    """
+    old_dir = None
+    if os.path.exists(directory):
+        old_dir = f"{directory}.old-{uuid.uuid4().hex[:8]}"
+        os.rename(directory, old_dir)
+    os.rename(staging, directory)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def republish_store(update, changes, replaces, directory=None):
+    """
+    Add or rebuild derived files of a published store (IVF index, compressed
+    vectors, neighbor table) without writing to files that workers have mapped.
+
+    The store is staged in a sibling directory: every file except those whose
+    name starts with one of `replaces` is hard-linked (copied across
+    filesystems), `update(staging_dir)` writes the new files there, and the
+    staged store is swapped in under a new version. `changes` describes the
+    rebuild and is recorded in meta.json. Returns the new version.
+    """
+    directory = directory or default_store_dir()
+    meta = read_meta(directory)
+    if meta is None:
+        raise FileNotFoundError(f"No local index store in {directory}")
+    staging = f"{directory}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(staging)
+    try:
+        for name in os.listdir(directory):
+            if name == "meta.json" or name.startswith(tuple(replaces)):
+                continue
+            src, dst = os.path.join(directory, name), os.path.join(staging, name)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+        update(staging)
+        created = time.time()
+        digest = hashlib.sha256(json.dumps(
+            {"base": meta.get("digest", meta.get("version")), "changes": changes, "created": created},
+            sort_keys=True, default=str,
+        ).encode("utf-8")).hexdigest()
+        meta = {
+            **meta, "version": digest[:16], "digest": digest, "created": created,
+            "derived": {**meta.get("derived", {}), **changes},
+        }
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    swap_in_store(staging, directory)
+    return meta["version"]
+
+
+class LocalIndex:
+    """
+    In-memory vector index used when Qdrant is not available.
+
+    Vectors are L2-normalized float32 so cosine similarity is a single
+    matrix-vector product. Job metadata is kept as columns (NumPy arrays)
+    instead of a list of row dicts, so filtering is a boolean mask.
+
+    `save()` (or `LocalIndexWriter` when streaming) writes the index as a
+    directory of .npy files at build time; `load()` memory-maps them, so
+    workers start quickly and share pages through the OS page cache.
+
+    Large stores also carry an IVF index (`app.services.ann`); when it is
+    loaded, searches probe a few inverted lists instead of scanning every row.
+    With `LOCAL_VECTOR_DTYPE` set, candidates are first scored on compressed
+    vectors and only the best few are rescored on the float32 ones.
+    A precomputed neighbor table (`app.services.neighbors`) serves related jobs.
+
+    Median wage and growth are float32 columns with NaN where unknown; a
+    minimum salary or growth filter never matches an unknown value.
+    """
+
+    STRING_COLUMNS = ("ids", "titles", "education", "descriptions")
+    NUMERIC_COLUMNS = ("median_wage", "growth_pct")
+
+    def __init__(self, vectors, job_zone, ids, titles, education, descriptions,
+                 normalized=False, version=None, ann=None, directory=None, quantized=None,
+                 neighbors=None, median_wage=None, growth_pct=None):
+        if not normalized:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+        columns = [
+            col if isinstance(col, StringColumn) else StringColumn.from_strings(col)
+            for col in (ids, titles, education, descriptions)
+        ]
+        if vectors.ndim != 2 or len(vectors) != len(columns[0]):
+            raise ValueError(
+                f"Embeddings shape {vectors.shape} does not match {len(columns[0])} jobs"
+            )
+        self.vectors = vectors
+        self.job_zone = np.asarray(job_zone, dtype=np.float32)
+        self.ids, self.titles, self.education, self.descriptions = columns
+        self.median_wage, self.growth_pct = (
+            np.full(len(vectors), np.nan, dtype=np.float32) if col is None else np.asarray(col, dtype=np.float32)
+            for col in (median_wage, growth_pct)
+        )
+        self.version = version
+        self.ann = ann
+        self.directory = directory
+        self.quantized = quantized
+        self.neighbors = neighbors
+        self._rows_by_id = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    @staticmethod
+    def columns_from_dataframe(df, start=0):
+        """Job zone and string columns for the rows of `df` (row numbers start at `start`)."""
+        ids = _first_column(df, ["O*NET-SOC Code", "O*NET_SOC Code"], None)
+        ids = [str(v) if isinstance(v, str) else str(start + i) for i, v in enumerate(ids)]
+        job_zone = pd.to_numeric(
+            _first_column(df, ["Job Zone", "Job_Zone"], 5), errors="coerce"
+        ).fillna(5)
+        titles = _first_column(df, ["Title", "title"], "Unknown").fillna("Unknown")
+        education = _first_column(df, ["Education_Level", "Education Level"], "").fillna("")
+        descriptions = _first_column(df, ["Description"], "").fillna("")
+        median_wage, growth_pct = (
+            pd.to_numeric(_first_column(df, [name], np.nan), errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+            for name in (WAGE_COLUMN, GROWTH_COLUMN)
+        )
+        return dict(
+            job_zone=job_zone.to_numpy(dtype=np.float32),
+            median_wage=median_wage,
+            growth_pct=growth_pct,
+            ids=ids,
+            titles=titles.astype(str).to_numpy(),
+            education=education.astype(str).to_numpy(),
+            descriptions=descriptions.astype(str).to_numpy(),
+        )
+
+    @classmethod
+    def from_dataframe(cls, df, embeddings):
+        return cls(vectors=embeddings, **cls.columns_from_dataframe(df))
+
+    @classmethod
+    def from_files(cls, emb_path=None, data_path=None):
+        """Build from the legacy `career_embeddings.npy` + processed dataset pair."""
+        from app.services.data_processor import read_processed_data
+
+        emb_path = emb_path or os.path.join(settings.DATA_DIR, settings.EMBEDDINGS_FILE)
+        embeddings = np.load(emb_path)
+        df = pd.read_csv(data_path) if data_path else read_processed_data()
+        index = cls.from_dataframe(df, embeddings)
+        # No meta.json to carry a version: derive one from the content, so a
+        # rebuilt pair of files is still seen as a new index
+        index.version = "legacy-" + index.content_digest()[:16]
+        return index
+
+    def content_digest(self):
+        digest = ContentDigest()
+        digest.update_rows(
+            self.vectors, self.job_zone, self.median_wage, self.growth_pct,
+            {name: [s.encode("utf-8") for s in getattr(self, name)] for name in self.STRING_COLUMNS},
+        )
+        return digest.hexdigest()
+
+    # --- On-disk store ---
+
+    @staticmethod
+    def store_exists(directory=None):
+        return os.path.exists(os.path.join(directory or default_store_dir(), "meta.json"))
+
+    def save(self, directory=None):
+        """Write the index as memory-mappable .npy files (see `LocalIndexWriter`)."""
+        writer = LocalIndexWriter(directory)
+        try:
+            writer.append(
+                self.vectors,
+                job_zone=self.job_zone,
+                **{name: getattr(self, name) for name in self.STRING_COLUMNS + self.NUMERIC_COLUMNS},
+            )
+            self.version = writer.finalize()
+        except Exception:
+            writer.abort()
+            raise
+        return self.version
+
+    @classmethod
+    def load(cls, directory=None, mmap_mode="r", use_ann=None, vector_dtype=None):
+        from app.services.ann import IVFIndex
+        from app.services.neighbors import NeighborTable
+
+        directory = directory or default_store_dir()
+        meta = read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"No local index store in {directory}")
+        use_ann = settings.LOCAL_ANN_ENABLED if use_ann is None else use_ann
+        ann = IVFIndex.load(directory, mmap_mode) if use_ann and IVFIndex.exists(directory) else None
+        if ann is not None and len(ann) != meta.get("count"):
+            print(f"⚠️ IVF index covers {len(ann)} rows but the store has {meta.get('count')} — using exact search")
+            ann = None
+        vector_dtype = vector_dtype or settings.LOCAL_VECTOR_DTYPE
+        quantized = None
+        if vector_dtype != "float32":
+            if QuantizedVectors.exists(directory, vector_dtype):
+                quantized = QuantizedVectors.load(directory, vector_dtype, mmap_mode)
+            else:
+                print(f"⚠️ No {vector_dtype} vectors in the local index store — scoring float32 "
+                      f"(run `python -m app.services.local_index quantize`)")
+        return cls(
+            vectors=np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode),
+            job_zone=np.load(os.path.join(directory, "job_zone.npy")),
+            normalized=True,
+            version=meta.get("version"),
+            ann=ann,
+            directory=directory,
+            quantized=quantized,
+            neighbors=NeighborTable.load(directory, mmap_mode) if NeighborTable.exists(directory) else None,
+            **{name: StringColumn.load(directory, name, mmap_mode) for name in cls.STRING_COLUMNS},
+            # Stores written before wages were indexed have no numeric columns
+            **{name: np.load(os.path.join(directory, f"{name}.npy"))
+               for name in cls.NUMERIC_COLUMNS if os.path.exists(os.path.join(directory, f"{name}.npy"))},
+        )
+
+    @classmethod
+    def load_default(cls):
+        """Memory-map the built store if present, else fall back to the legacy files."""
+        if cls.store_exists():
+            return cls.load()
+        print("ℹ️ No local index store found — building from embeddings + processed data "
+              "(run `python -m app.services.local_index build` to create it)")
+        return cls.from_files()
+
+    # --- Search ---
+
+    def search(self, query_vector, max_job_zone=5, top_k=5, min_salary=None, min_growth=None):
+        """Return the `top_k` jobs with job zone <= `max_job_zone` (and the salary/growth minimums), best first."""
+        return self.search_batch(
+            np.asarray(query_vector).reshape(1, -1), max_job_zone, top_k,
+            min_salary=min_salary, min_growth=min_growth,
+        )[0]
+
+    def search_batch(self, query_vectors, max_job_zone=5, top_k=5, nprobe=None, min_salary=None, min_growth=None):
+        """Search several queries sharing one set of filters."""
+        return [
+            self._format(rows, scores)
+            for rows, scores in self.search_rows(
+                query_vectors, max_job_zone, top_k, nprobe=nprobe, min_salary=min_salary, min_growth=min_growth
+            )
+        ]
+
+    def filter_mask(self, max_job_zone=5, min_salary=None, min_growth=None):
+        """Rows passing every filter, as a boolean mask."""
+        mask = self.job_zone <= float(max_job_zone)
+        if min_salary is not None:
+            mask &= self.median_wage >= min_salary
+        if min_growth is not None:
+            mask &= self.growth_pct >= min_growth
+        return mask
+
+    def search_rows(self, query_vectors, max_job_zone=5, top_k=5, nprobe=None, exact=False,
+                    min_salary=None, min_growth=None):
+        """
+        Top-k row numbers and scores per query. Uses the IVF index when one is
+        loaded, otherwise one matrix product over all rows. `exact` forces a
+        full float32 scan (no IVF, no compressed first pass).
+
+        Salary/growth filters are masks over the rows. With the IVF index, a
+        filter selective enough to leave fewer rows than the probed lists hold
+        is answered by scoring just those rows.
+        """
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        extra_filters = min_salary is not None or min_growth is not None
+        use_ann = self.ann is not None and not exact
+        if use_ann and not extra_filters:
+            return self.ann.search(self, queries, max_job_zone, top_k, nprobe=nprobe)
+
+        mask = self.filter_mask(max_job_zone, min_salary, min_growth)
+        candidates = np.flatnonzero(mask)
+        if top_k <= 0 or len(candidates) == 0:
+            return [(candidates, np.zeros(0, dtype=np.float32)) for _ in range(len(queries))]
+
+        if use_ann and len(candidates) > self.ann.probed_rows(nprobe):
+            results = self.ann.search(self, queries, max_job_zone, top_k, nprobe=nprobe, row_mask=mask)
+            want = min(top_k, len(candidates))
+            # The probed lists can hold too few matching rows: those queries get the full scan
+            short = [i for i, (rows, _) in enumerate(results) if len(rows) < want]
+            if short:
+                for i, result in zip(short, self._scan(queries[short], candidates, top_k, gather=True)):
+                    results[i] = result
+            return results
+        return self._scan(queries, candidates, top_k, gather=extra_filters and len(candidates) < len(self) // 2)
+
+    def _scan(self, queries, candidates, top_k, gather=False):
+        """Top-k among `candidates` for every query, scoring all of them."""
+        if self.quantized is not None:
+            approx = self.quantized.scores(queries, candidates)
+            first, _ = _top_k(approx, self._first_pass_size(top_k))
+            return [self._rescore(query, candidates[r], top_k) for query, r in zip(queries, first)]
+
+        # A selective filter scores only its rows; otherwise one product over all rows is faster
+        if gather:
+            scores = queries @ self.vectors[candidates].T
+        else:
+            scores = (queries @ self.vectors.T)[:, candidates]
+        rows, top_scores = _top_k(scores, top_k)
+        return [(candidates[r], s) for r, s in zip(rows, top_scores)]
+
+    def rank_rows(self, query, rows, top_k):
+        """Best `top_k` of `rows` for one normalized query (used by the IVF search)."""
+        if top_k <= 0 or len(rows) == 0:
+            return rows[:0], np.zeros(0, dtype=np.float32)
+        if self.quantized is not None:
+            approx = self.quantized.scores(query[None], rows)
+            first, _ = _top_k(approx, self._first_pass_size(top_k))
+            return self._rescore(query, rows[first[0]], top_k)
+        return self._rescore(query, rows, top_k)
+
+    @staticmethod
+    def _first_pass_size(top_k):
+        return top_k * max(1, settings.LOCAL_RESCORE_OVERSAMPLING)
+
+    def _rescore(self, query, rows, top_k):
+        """Exact float32 scores for `rows`, best `top_k` first."""
+        rows = np.sort(rows)  # ascending rows read the memory-mapped vectors in file order
+        scores = (self.vectors[rows] @ query)[None]
+        best, top_scores = _top_k(scores, min(top_k, len(rows)))
+        return rows[best[0]], top_scores[0]
+
+    # --- Related jobs ---
+
+    def row_of(self, job_id):
+        """Row number of the job with id `job_id`, or None (the id map is built on first use)."""
+        if self._rows_by_id is None:
+            self._rows_by_id = {job_id: row for row, job_id in enumerate(self.ids)}
+        return self._rows_by_id.get(job_id)
+
+    def job(self, row):
+        return self._format([row], [1.0])[0]
+
+    def related(self, row, max_job_zone=5, top_k=5):
+        """Jobs most similar to job `row`, from the neighbor table when it covers `top_k`."""
+        if self.neighbors is not None and top_k <= self.neighbors.k:
+            rows, scores = self.neighbors.lookup(row, max_job_zone, top_k)
+        else:
+            query = np.asarray(self.vectors[row], dtype=np.float32)
+            rows, scores = self.search_rows(query, max_job_zone, top_k + 1, exact=True)[0]
+            keep = rows != row
+            rows, scores = rows[keep][:top_k], scores[keep][:top_k]
+        return self._format(rows, scores)
+
+    def _format(self, rows, scores):
+        return [
+            {
+                "id": self.ids[i],
+                "title": self.titles[i],
+                "match_score": round(float(s) * 100, 2),
+                "education_requirement": self.education[i],
+                "description": self.descriptions[i],
+                "median_wage": None if np.isnan(self.median_wage[i]) else int(self.median_wage[i]),
+                "growth_pct": None if np.isnan(self.growth_pct[i]) else float(self.growth_pct[i]),
+            }
+            for i, s in zip(rows, scores)
+        ]
+
+
+class LocalIndexWriter:
+    """
+    Streams a local index store to disk chunk by chunk with bounded memory.
+
+    Vectors and string bytes are appended to raw files in a temporary
+    directory; `finalize()` converts them to .npy, writes meta.json and swaps
+    the directory into place with a rename, so processes that already mapped
+    the old files keep reading them until they reload.
+
+    The store's version is derived from a digest of its content and build
+    settings. When that matches the store already in place, `finalize()`
+    discards the new files and keeps the current version (`published` stays
+    False), so an unchanged rebuild does not make every worker reload.
+    """
+
+    COPY_BLOCK = 64 * 1024 * 1024
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_store_dir()
+        os.makedirs(os.path.dirname(os.path.abspath(self.directory)), exist_ok=True)
+        self.tmp_dir = f"{self.directory}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.tmp_dir)
+        self.count = 0
+        self.dim = None
+        self._vectors = open(os.path.join(self.tmp_dir, "vectors.raw"), "wb")
+        self._job_zone = []
+        self._numeric = {name: [] for name in LocalIndex.NUMERIC_COLUMNS}
+        self._strings = {name: open(os.path.join(self.tmp_dir, f"{name}.raw"), "wb")
+                         for name in LocalIndex.STRING_COLUMNS}
+        self._offsets = {name: [np.zeros(1, dtype=np.int64)] for name in LocalIndex.STRING_COLUMNS}
+        self._string_bytes = {name: 0 for name in LocalIndex.STRING_COLUMNS}
+        self._digest = ContentDigest()
+        self.published = False
+
+    def append_dataframe(self, df, vectors):
+        self.append(vectors, **LocalIndex.columns_from_dataframe(df, start=self.count))
+
+    def append(self, vectors, job_zone, median_wage=None, growth_pct=None, **columns):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Vector dim {vectors.shape[1]} does not match {self.dim}")
+        vectors = vectors / norms
+        vectors.tofile(self._vectors)
+        job_zone = np.asarray(job_zone, dtype=np.float32)
+        self._job_zone.append(job_zone)
+        numeric = [
+            np.full(len(vectors), np.nan, dtype=np.float32) if values is None else np.asarray(values, dtype=np.float32)
+            for values in (median_wage, growth_pct)
+        ]
+        for name, values in zip(LocalIndex.NUMERIC_COLUMNS, numeric):
+            self._numeric[name].append(values)
+        strings = {}
+        for name in LocalIndex.STRING_COLUMNS:
+            encoded = strings[name] = [str(v).encode("utf-8") for v in columns[name]]
+            if len(encoded) != len(vectors):
+                raise ValueError(f"Column '{name}' has {len(encoded)} rows, expected {len(vectors)}")
+            self._strings[name].write(b"".join(encoded))
+            ends = self._string_bytes[name] + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+            if len(ends):
+                self._string_bytes[name] = int(ends[-1])
+            self._offsets[name].append(ends)
+        self._digest.update_rows(vectors, job_zone, *numeric, strings)
+        self.count += len(vectors)
+
+    def _build_options(self):
+        """Settings that shape the derived files (IVF, neighbors, compressed vectors)."""
+        return {
+            "ann": settings.LOCAL_ANN_ENABLED and self.count >= settings.LOCAL_ANN_MIN_SIZE,
+            "ann_nlist": settings.LOCAL_ANN_NLIST,
+            "neighbors_k": settings.LOCAL_NEIGHBORS_K if self.count <= settings.LOCAL_NEIGHBORS_MAX_JOBS else 0,
+            "vector_dtype": settings.LOCAL_VECTOR_DTYPE,
+        }
+
+    def _raw_to_npy(self, raw_name, npy_name, dtype, shape):
+        raw_path = os.path.join(self.tmp_dir, raw_name)
+        out = np.lib.format.open_memmap(os.path.join(self.tmp_dir, npy_name), mode="w+", dtype=dtype, shape=shape)
+        flat = out.reshape(-1).view(np.uint8)
+        with open(raw_path, "rb") as f:
+            pos = 0
+            while True:
+                block = f.read(self.COPY_BLOCK)
+                if not block:
+                    break
+                flat[pos:pos + len(block)] = np.frombuffer(block, dtype=np.uint8)
+                pos += len(block)
+        out.flush()
+        del out, flat
+        os.remove(raw_path)
+
+    def finalize(self):
+        """Publish the store and return its version (the current one if nothing changed)."""
+        self._vectors.close()
+        for f in self._strings.values():
+            f.close()
+        digest = self._digest.hexdigest(dim=self.dim, build=self._build_options())
+        current = read_meta(self.directory)
+        if current is not None and current.get("digest") == digest:
+            self.abort()
+            return current["version"]
+
+        self._raw_to_npy("vectors.raw", "vectors.npy", np.float32, (self.count, self.dim or 0))
+        job_zone = np.concatenate(self._job_zone) if self._job_zone else np.zeros(0, dtype=np.float32)
+        np.save(os.path.join(self.tmp_dir, "job_zone.npy"), job_zone)
+        for name, parts in self._numeric.items():
+            np.save(os.path.join(self.tmp_dir, f"{name}.npy"),
+                    np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32))
+        for name in LocalIndex.STRING_COLUMNS:
+            self._raw_to_npy(f"{name}.raw", f"{name}.data.npy", np.uint8, (self._string_bytes[name],))
+            np.save(os.path.join(self.tmp_dir, f"{name}.offsets.npy"), np.concatenate(self._offsets[name]))
+
+        version = digest[:16]
+        meta = {"version": version, "digest": digest, "count": self.count, "dim": self.dim, "created": time.time()}
+        if settings.LOCAL_ANN_ENABLED and self.count >= settings.LOCAL_ANN_MIN_SIZE:
+            self._build_ann(job_zone)
+        if 0 < settings.LOCAL_NEIGHBORS_K and self.count <= settings.LOCAL_NEIGHBORS_MAX_JOBS:
+            self._build_neighbors(job_zone)
+        if settings.LOCAL_VECTOR_DTYPE != "float32":
+            vectors = np.load(os.path.join(self.tmp_dir, "vectors.npy"), mmap_mode="r")
+            QuantizedVectors.write(self.tmp_dir, vectors, settings.LOCAL_VECTOR_DTYPE)
+            del vectors
+        with open(os.path.join(self.tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        swap_in_store(self.tmp_dir, self.directory)
+        self.published = True
+        return version
+
+    def _build_ann(self, job_zone):
+        from app.services.ann import IVFIndex
+
+        t0 = time.perf_counter()
+        vectors = np.load(os.path.join(self.tmp_dir, "vectors.npy"), mmap_mode="r")
+        ann = IVFIndex.build(vectors, job_zone)
+        ann.save(self.tmp_dir)
+        del vectors
+        print(f"   🧭 IVF index: {ann.nlist} lists over {self.count} vectors in {time.perf_counter() - t0:.1f}s")
+
+    def _build_neighbors(self, job_zone):
+        from app.services.neighbors import NeighborTable
+
+        t0 = time.perf_counter()
+        vectors = np.load(os.path.join(self.tmp_dir, "vectors.npy"), mmap_mode="r")
+        NeighborTable.build(vectors, job_zone).save(self.tmp_dir)
+        del vectors
+        print(f"   🔗 Related-careers table for {self.count} jobs in {time.perf_counter() - t0:.1f}s")
+
+    def abort(self):
+        self._vectors.close()
+        for f in self._strings.values():
+            f.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def quantize_store(dtype, directory=None):
+    """Add `dtype` codes to a published store as a new store version (see `republish_store`)."""
+    index = LocalIndex.load(directory, use_ann=False, vector_dtype="float32")
+    return republish_store(
+        lambda staging: QuantizedVectors.write(staging, index.vectors, dtype),
+        {"vector_dtype": dtype},
+        replaces=(f"vectors.{dtype}.npy", "vectors.scales.npy"),
+        directory=index.directory,
+    )
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _measure(mode):
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        index = LocalIndex.from_files()
+    else:
+        index = LocalIndex.load(use_ann=False, vector_dtype="int8" if mode == "store-int8" else "float32")
+    t1 = time.perf_counter()
+    rss1 = _rss_mb()
+    index.search(np.ones(index.dim, dtype=np.float32), max_job_zone=5, top_k=5)
+    rss2 = _rss_mb()
+    print(json.dumps({
+        "mode": mode, "jobs": len(index), "startup_ms": round((t1 - t0) * 1000, 1),
+        "rss_after_load_mb": round(rss1 - rss0, 1), "rss_after_search_mb": round(rss2 - rss0, 1),
+    }))
+
+
+def _parity(dtype, queries=500, top_k=5):
+    """Compare compressed-first-pass search with exact float32 search on the built store."""
+    from app.services.ann import sample_queries
+
+    index = LocalIndex.load(use_ann=False, vector_dtype=dtype)
+    if index.quantized is None:
+        raise SystemExit(f"❌ No {dtype} vectors in the store — run `quantize --dtype {dtype}` first")
+    sample = sample_queries(index.vectors, queries)
+    identical = overlap = 0
+    for zone in (2, 5):
+        exact = index.search_rows(sample, max_job_zone=zone, top_k=top_k, exact=True)
+        approx = index.search_rows(sample, max_job_zone=zone, top_k=top_k)
+        for (e, _), (a, _) in zip(exact, approx):
+            identical += int(np.array_equal(e, a))
+            overlap += len(set(e.tolist()) & set(a.tolist())) / max(1, len(e))
+    total = 2 * len(sample)
+    print(json.dumps({
+        "dtype": dtype, "queries": total, f"identical_top{top_k}": round(identical / total, 4),
+        f"overlap@{top_k}": round(overlap / total, 4),
+        "vector_mb": round(index.vectors.nbytes / 2 ** 20, 1),
+        "compressed_mb": round(index.quantized.codes.nbytes / 2 ** 20, 1),
+    }))
+
+
+if __name__ == "__main__":
+    import argparse
+    import subprocess
+
+    parser = argparse.ArgumentParser(description="Build or measure the memory-mapped local index store")
+    parser.add_argument("command", choices=["build", "quantize", "parity", "measure"])
+    parser.add_argument("--dtype", choices=QuantizedVectors.DTYPES, default="int8",
+                        help="compressed vector type for quantize/parity")
+    parser.add_argument("--mode", choices=["legacy", "store", "store-int8"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = LocalIndex.from_files()
+        version = index.save()
+        print(f"✅ Local index store written to {default_store_dir()} ({len(index)} jobs, version {version})")
+    elif args.command == "quantize":
+        version = quantize_store(args.dtype)
+        print(f"✅ Wrote {args.dtype} vectors to {default_store_dir()} (store version {version})")
+    elif args.command == "parity":
+        _parity(args.dtype)
+    elif args.mode:
+        _measure(args.mode)
+    else:
+        # Each mode runs in a fresh interpreter so RSS numbers are not mixed up.
+        print("RSS is the growth over the interpreter baseline; 'after search' scans every vector.")
+        modes = ["legacy", "store"]
+        if QuantizedVectors.exists(default_store_dir(), "int8"):
+            modes.append("store-int8")
+        for mode in modes:
+            subprocess.run([sys.executable, "-m", "app.services.local_index", "measure", "--mode", mode], check=True)
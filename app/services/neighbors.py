@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+
+# O*NET job zones; the table keeps a neighbor list for each "job zone <= z" filter
+ZONES = (1, 2, 3, 4, 5)
+NEIGHBOR_FILES = ("neighbors.rows.npy", "neighbors.scores.npy")
+
+
+class NeighborTable:
+    """
+    Precomputed job-to-job "related careers" table.
+
+    `rows[i, z, :]` holds the `k` jobs most similar to job `i` among jobs with
+    job zone <= ZONES[z] (best first, -1 padded), and `scores` their cosine
+    similarity. Rows are int32 and scores float16, so serving a related list
+    is one array lookup.
+    """
+
+    def __init__(self, rows, scores):
+        self.rows = rows
+        self.scores = scores
+
+    @property
+    def k(self):
+        return self.rows.shape[2]
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def build(cls, vectors, job_zone, k=None, memory_mb=None):
+        """
+        All-pairs top-k from normalized `vectors` with a blocked matrix product.
+        Each block of rows is scored against every job at once; the block size
+        keeps the score matrices within `memory_mb`.
+        """
+        k = k or settings.LOCAL_NEIGHBORS_K
+        memory_mb = memory_mb or settings.LOCAL_NEIGHBORS_MEMORY_MB
+        count = len(vectors)
+        job_zone = np.asarray(job_zone, dtype=np.float32)
+        # Columns sorted by zone: every zone filter is then a prefix of the columns
+        perm = np.argsort(job_zone, kind="stable")
+        position = np.empty(count, dtype=np.int64)
+        position[perm] = np.arange(count)
+        zone_ends = np.searchsorted(job_zone[perm], ZONES, side="right")
+
+        rows = np.full((count, len(ZONES), k), -1, dtype=np.int32)
+        scores = np.zeros((count, len(ZONES), k), dtype=np.float16)
+        # Two block x count float32 matrices (raw and column-permuted scores)
+        block = max(1, int(memory_mb * 2 ** 20 // (2 * 4 * max(count, 1))))
+        for start in range(0, count, block):
+            chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+            sims = (chunk @ np.asarray(vectors).T)[:, perm]
+            sims[np.arange(len(chunk)), position[start:start + len(chunk)]] = -np.inf  # not its own neighbor
+            for z, end in enumerate(zone_ends):
+                kk = min(k, int(end))
+                if kk <= 0:
+                    continue
+                sub = sims[:, :end]
+                part = np.argpartition(-sub, kk - 1, axis=1)[:, :kk]
+                part_scores = np.take_along_axis(sub, part, axis=1)
+                order = np.argsort(-part_scores, axis=1, kind="stable")
+                best = np.take_along_axis(part, order, axis=1)
+                best_scores = np.take_along_axis(part_scores, order, axis=1)
+                valid = np.isfinite(best_scores)
+                rows[start:start + len(chunk), z, :kk] = np.where(valid, perm[best], -1)
+                scores[start:start + len(chunk), z, :kk] = np.where(valid, best_scores, 0)
+        return cls(rows, scores)
+
+    # --- Persistence (files next to the local index store) ---
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, "neighbors.json"))
+
+    def save(self, directory):
+        for name, array in zip(NEIGHBOR_FILES, (self.rows, self.scores)):
+            np.save(os.path.join(directory, name), array)
+        tmp = os.path.join(directory, "neighbors.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"k": self.k, "count": len(self), "zones": list(ZONES), "created": time.time()}, f)
+        os.replace(tmp, os.path.join(directory, "neighbors.json"))
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        return cls(*(np.load(os.path.join(directory, name), mmap_mode=mmap_mode) for name in NEIGHBOR_FILES))
+
+    # --- Lookup ---
+
+    def lookup(self, row, max_job_zone=5, top_k=5):
+        """Related rows and scores for job `row` under a `job zone <= max_job_zone` filter."""
+        z = int(np.searchsorted(ZONES, np.floor(max_job_zone), side="right")) - 1
+        if z < 0 or top_k <= 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        related = self.rows[row, z, :top_k]
+        keep = related >= 0
+        return related[keep], self.scores[row, z, :top_k][keep].astype(np.float32)
+
+
+def build_for_store(directory=None, k=None):
+    """
+    Build the related-careers table for an existing local index store and
+    publish it as a new store version (the live files are never rewritten; see
+    `republish_store`). Returns the table and the new version.
+    """
+    from app.services.local_index import LocalIndex, republish_store
+
+    index = LocalIndex.load(directory, use_ann=False, vector_dtype="float32")
+    table = NeighborTable.build(index.vectors, index.job_zone, k=k)
+    version = republish_store(table.save, {"neighbors_k": table.k}, replaces=("neighbors.",), directory=index.directory)
+    return table, version
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the related-careers table for the local index store")
+    parser.add_argument("--k", type=int, help="neighbors kept per job and zone")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    table, version = build_for_store(k=args.k)
+    print(f"✅ Related-careers table for {len(table)} jobs (k={table.k}) in {time.perf_counter() - t0:.1f}s "
+          f"(store version {version})")
@@ -0,0 +1,57 @@
+"""
+Preforked serving: load the CareerEngine once in the gunicorn master and share
+it with the workers copy-on-write (see gunicorn.conf.py).
+
+After fork, nothing in the model weights or the memory-mapped index is written
+to, so those pages stay physically shared between all workers. Two things keep
+it that way: `gc.freeze()` in the master moves every object loaded so far out
+of the collector's reach (a collection would otherwise write to each object's
+header and copy its page), and torch runs single-threaded in the master, since
+an OpenMP thread pool started before fork is not usable in the children.
+"""
+import gc
+import os
+import sys
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+from app.services.encoder import set_torch_threads
+
+
+def torch_threads_per_worker(workers):
+    """TORCH_NUM_THREADS if set, otherwise an even share of the cores."""
+    if settings.TORCH_NUM_THREADS:
+        return settings.TORCH_NUM_THREADS
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def preload_services(container):
+    """Master side: build the engine before any worker is forked."""
+    from app.services.engine import CareerEngine
+
+    set_torch_threads(1)
+    print("🚀 Preloading CareerEngine in the master process...")
+    try:
+        engine = CareerEngine()
+    except Exception as e:
+        # Workers build their own engine in lifespan, as without preloading
+        print(f"⚠️ Preloading CareerEngine failed: {e}")
+        return
+    if engine.local_index is not None:
+        # Build the id -> row lookup once here rather than once per worker
+        engine.local_index.row_of("")
+    container["engine"] = engine
+    gc.collect()
+    gc.freeze()
+    print("✅ CareerEngine preloaded; workers will share it copy-on-write")
+
+
+def init_worker(container, workers):
+    """Worker side, right after fork: thread budget and per-process engine state."""
+    threads = torch_threads_per_worker(workers)
+    set_torch_threads(threads)
+    engine = container.get("engine")
+    if engine is not None:
+        engine.after_fork()
+    print(f"👷 Worker {os.getpid()} ready: {threads} torch thread(s), "
+          f"{'preloaded' if engine is not None else 'own'} engine")
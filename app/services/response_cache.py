@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+
+from app.core.config import settings
+from app.services.cache import LRUCache, DiskCache
+
+
+def _normalize(value, lowercase) -> str:
+    text = " ".join(str(value).split())
+    return text.lower() if lowercase else text
+
+
+def profile_key(profile: dict, top_k: int, index_version, lowercase=False) -> str:
+    """
+    Canonical hash of a recommendation request. Text fields are compared the
+    way the encoder sees them (see `normalize_query`): retries that only differ
+    in spacing share an entry, and with `lowercase` (an uncased encoder) in
+    case too.
+    """
+    material = {
+        "interests": _normalize(profile["interests"], lowercase),
+        "skills": _normalize(profile["skills"], lowercase),
+        "age": profile["age"],
+        "education_level_id": profile["education_level_id"],
+        "min_salary": profile.get("min_salary"),
+        "min_growth": profile.get("min_growth"),
+        "top_k": top_k,
+        "index_version": index_version,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag) -> bool:
+    """True if an If-None-Match header value lists `etag` (weak comparison) or is `*`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class ResponseCache:
+    """
+    Serialized API responses with their ETag: an LRU bounded by entry count and
+    bytes, plus an optional DiskCache tier.
+
+    Keys include the index version, and the first lookup under a new version
+    drops the memory tier, so a rebuilt index never serves old results. Disk
+    entries of old versions are simply never asked for again and age out.
+    """
+
+    def __init__(self):
+        self.cache = LRUCache(
+            maxsize=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+        )
+        self.version = None
+        self._lock = threading.Lock()
+        self.disk_cache = None
+        if settings.RESPONSE_DISK_CACHE_ENABLED:
+            cache_dir = settings.RESPONSE_DISK_CACHE_DIR or os.path.join(settings.DATA_DIR, "response_cache")
+            try:
+                self.disk_cache = DiskCache(
+                    cache_dir,
+                    ttl=settings.RESPONSE_CACHE_TTL,
+                    max_entries=settings.RESPONSE_DISK_CACHE_MAX_ENTRIES,
+                )
+            except OSError as e:
+                print(f"⚠️ Response disk cache disabled: {e}")
+
+    def _check_version(self, index_version):
+        if index_version == self.version:
+            return
+        with self._lock:
+            if index_version != self.version:
+                if self.version is not None:
+                    print(f"🧹 Index version changed ({self.version} -> {index_version}): response cache cleared")
+                self.cache.clear()
+                self.version = index_version
+
+    def _disk_get(self, key):
+        entry = self.disk_cache.get(key)
+        if entry is None:
+            return None
+        body = entry["body"].encode("utf-8")
+        self.cache.set(key, (body, entry["etag"]), nbytes=len(body))
+        return body, entry["etag"]
+
+    def _disk_set(self, key, body, etag):
+        self.disk_cache.set(key, {"body": body.decode("utf-8"), "etag": etag})
+
+    async def aget(self, key, index_version):
+        """`(body, etag)` for `key`, or None."""
+        self._check_version(index_version)
+        entry = self.cache.get(key)
+        if entry is None and self.disk_cache is not None:
+            entry = await asyncio.to_thread(self._disk_get, key)
+        return entry
+
+    async def aset(self, key, index_version, body: bytes, etag: str):
+        """Store `body`, unless it was computed against an index that has since been replaced."""
+        if index_version != self.version:
+            return
+        self.cache.set(key, (body, etag), nbytes=len(body))
+        if self.disk_cache is not None:
+            await asyncio.to_thread(self._disk_set, key, body, etag)
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "memory": self.cache.stats(),
+            "disk": self.disk_cache.stats() if self.disk_cache is not None else None,
+        }
+
+    async def aclose(self):
+        pass
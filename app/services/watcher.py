@@ -0,0 +1,77 @@
+import os
+import threading
+
+
+class Poller:
+    """
+    Calls `poll()` every `interval` seconds in a background thread and
+    `on_change()` (if given) whenever the value it returns changes. A poll that
+    raises or returns None is skipped, so a transient failure never counts as
+    a change.
+    """
+
+    def __init__(self, poll, interval, on_change=None, name="poller"):
+        self.poll = poll
+        self.interval = interval
+        self.on_change = on_change
+        self.name = name
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = self._safe_poll()
+
+    def _safe_poll(self):
+        try:
+            return self.poll()
+        except Exception as e:
+            print(f"⚠️ {self.name}: poll failed: {e}")
+            return None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            signature = self._safe_poll()
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            if self.on_change is None:
+                continue
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"⚠️ {self.name}: {self._describe_failure()} failed: {e}")
+
+    def _describe_failure(self):
+        return "update after change"
+
+
+class FileWatcher(Poller):
+    """
+    Polls a file and calls `on_change()` when it is replaced or modified (its
+    mtime or inode changes).
+
+    Used to pick up a rebuilt local index store: the writer swaps the store
+    directory in with a rename, so `meta.json` changes inode on every build.
+    """
+
+    def __init__(self, path, interval, on_change, name="file-watcher"):
+        self.path = path
+        super().__init__(self._stat, interval, on_change, name=name)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_ino
+
+    def _describe_failure(self):
+        return f"reload after change to {self.path}"
@@ -0,0 +1,12 @@
+"""
+Offline benchmarks for the recommend pipeline.
+
+    python -m benchmarks.search   # CareerEngine.search latency, local and in-process Qdrant
+    python -m benchmarks.recall   # recall of the IVF / quantized local paths vs exact search
+    python -m benchmarks.load     # load generator against the FastAPI app
+    python -m benchmarks.compare OLD.json NEW.json
+
+Everything runs on synthetic catalogs with a stub encoder and a stub advisor,
+so no model download, API key or server is needed. Results are written as
+JSON under benchmarks/results/ for comparison between commits.
+"""
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import zlib
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+
+DIM = 384
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+WORDS = (
+    "python data analysis design marketing finance nursing teaching writing sales cooking "
+    "carpentry welding law biology chemistry music art logistics security robotics research "
+    "statistics customer service management accounting electrical plumbing healthcare software"
+).split()
+
+
+class HashEncoder:
+    """
+    Stand-in for SentenceTransformer: a deterministic unit vector per text
+    (seeded by its CRC32), with an optional fixed cost per call.
+    """
+
+    def __init__(self, dim=DIM, cost_ms=0.0):
+        self.dim = dim
+        self.cost = cost_ms / 1000.0
+
+    def _vector(self, text):
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        v = rng.standard_normal(self.dim).astype(np.float32)
+        return v / np.linalg.norm(v)
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        if self.cost:
+            time.sleep(self.cost)
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(t) for t in texts])
+
+
+class StubAdvisor:
+    """CareerAdvisor look-alike returning canned advice after `latency_ms`."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+
+    def _advice(self, jobs):
+        return "Consider " + ", ".join(job["title"] for job in jobs[:3]) + "."
+
+    def generate_advice(self, user_profile, jobs):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._advice(jobs)
+
+    async def agenerate_advice(self, user_profile, jobs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._advice(jobs)
+
+    async def astream_advice(self, user_profile, jobs):
+        for word in self._advice(jobs).split(" "):
+            if self.latency:
+                await asyncio.sleep(self.latency / 10)
+            yield word + " "
+
+    def cache_stats(self):
+        return {"memory": None, "disk": None}
+
+    async def aclose(self):
+        pass
+
+
+def iter_catalog(count, chunk_size=50000, clusters=2000, noise=0.05, seed=0):
+    """Clustered synthetic job vectors with job zones 1-5, yielded in chunks (bounded memory)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIM), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    for start in range(0, count, chunk_size):
+        n = min(chunk_size, count - start)
+        vectors = centers[rng.integers(0, clusters, n)] + rng.standard_normal((n, DIM), dtype=np.float32) * noise
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        job_zone = rng.integers(1, 6, n).astype(np.float32)
+        ids = np.array([f"SYN-{i:07d}" for i in range(start, start + n)])
+        yield start, vectors, job_zone, ids
+
+
+def build_store(count, seed=0, rebuild=False):
+    """
+    Local index store for a synthetic catalog of `count` jobs, with an IVF index
+    and int8 vectors, cached under benchmarks/.cache between runs.
+    """
+    from app.services.ann import IVFIndex
+    from app.services.local_index import LocalIndex, LocalIndexWriter, QuantizedVectors
+
+    directory = os.path.join(CACHE_DIR, f"catalog-{count}-{seed}")
+    if LocalIndex.store_exists(directory) and not rebuild:
+        return directory
+    print(f"🔧 Building synthetic catalog: {count} jobs -> {directory}")
+    # The benchmark builds its own IVF index / int8 copy below, whatever the settings say
+    saved = settings.LOCAL_ANN_ENABLED, settings.LOCAL_NEIGHBORS_K, settings.LOCAL_VECTOR_DTYPE
+    settings.LOCAL_ANN_ENABLED, settings.LOCAL_NEIGHBORS_K, settings.LOCAL_VECTOR_DTYPE = False, 0, "float32"
+    writer = LocalIndexWriter(directory)
+    try:
+        for _, vectors, job_zone, ids in iter_catalog(count, seed=seed):
+            titles = np.char.add("Job ", ids)
+            writer.append(vectors, job_zone, ids=ids, titles=titles, education=job_zone.astype(int).astype(str),
+                          descriptions=np.char.add("Synthetic posting ", ids))
+        writer.finalize()
+    except Exception:
+        writer.abort()
+        raise
+    finally:
+        settings.LOCAL_ANN_ENABLED, settings.LOCAL_NEIGHBORS_K, settings.LOCAL_VECTOR_DTYPE = saved
+    index = LocalIndex.load(directory, use_ann=False, vector_dtype="float32")
+    IVFIndex.build(index.vectors, index.job_zone).save(directory)
+    QuantizedVectors.write(directory, index.vectors, "int8")
+    return directory
+
+
+def load_variant(directory, variant):
+    """Open the store as one of the local search variants: exact, ivf, int8, ivf+int8."""
+    from app.services.local_index import LocalIndex
+
+    return LocalIndex.load(
+        directory,
+        use_ann="ivf" in variant,
+        vector_dtype="int8" if "int8" in variant else "float32",
+    )
+
+
+def build_qdrant(count, seed=0, batch_size=1000):
+    """In-process (in-memory) Qdrant collection holding the same synthetic catalog."""
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import PointStruct
+
+    from app.services.indexer import COLLECTION_NAME, create_collection
+
+    client = QdrantClient(":memory:")
+    create_collection(client, COLLECTION_NAME, DIM)
+    for start, vectors, job_zone, ids in iter_catalog(count, seed=seed):
+        for b in range(0, len(vectors), batch_size):
+            client.upsert(
+                collection_name=COLLECTION_NAME,
+                points=[
+                    PointStruct(
+                        id=start + i,
+                        vector=vectors[i].tolist(),
+                        payload={"soc_code": ids[i], "title": f"Job {ids[i]}", "job_zone": int(job_zone[i]),
+                                 "education": str(int(job_zone[i])), "description": f"Synthetic posting {ids[i]}"},
+                    )
+                    for i in range(b, min(b + batch_size, len(vectors)))
+                ],
+                wait=True,
+            )
+    return client
+
+
+def make_queries(count, seed=1):
+    """Distinct profile-style query texts (distinct so the embedding cache does not hide encode cost)."""
+    rng = np.random.default_rng(seed)
+    return [
+        "Interests: " + " ".join(rng.choice(WORDS, 3)) + f". Skills: {' '.join(rng.choice(WORDS, 3))} #{i}"
+        for i in range(count)
+    ]
+
+
+def make_profiles(count, seed=1):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "interests": " ".join(rng.choice(WORDS, 3)),
+            "skills": " ".join(rng.choice(WORDS, 4)),
+            "age": int(rng.integers(18, 65)),
+            "education_level_id": int(rng.integers(1, 6)),
+        }
+        for _ in range(count)
+    ]
+
+
+def latency_summary(samples_s, wall_s=None):
+    """p50/p95/p99/mean/max in ms (and throughput when the wall-clock time is given)."""
+    ms = np.asarray(samples_s, dtype=np.float64) * 1000
+    summary = {
+        "count": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+    if wall_s:
+        summary["throughput_rps"] = round(len(ms) / wall_s, 1)
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(benchmark, results, config, output=None):
+    """Write `{benchmark, commit, environment, config, results}` JSON and return its path."""
+    commit = _git_commit()
+    payload = {
+        "benchmark": benchmark,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{benchmark}-{time.strftime('%Y%m%d%H%M%S')}-{commit or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"📄 Results written to {output}")
+    return output
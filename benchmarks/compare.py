@@ -0,0 +1,75 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/search-A.json benchmarks/results/search-B.json
+
+Rows are matched by name. Latencies (*_ms) regress when they grow, throughput
+and recall when they shrink, by more than --threshold (relative). Exits with
+status 1 if anything regressed, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "pss_mb", "startup_s")
+HIGHER_IS_BETTER = ("throughput_rps", "identical_ratio")
+
+
+def metric_direction(key):
+    if key in LOWER_IS_BETTER:
+        return -1
+    if key in HIGHER_IS_BETTER or key.startswith("recall@"):
+        return 1
+    return 0
+
+
+def compare(old, new, threshold):
+    old_rows = {row["name"]: row for row in old["results"]}
+    regressions, lines = [], []
+    for row in new["results"]:
+        base = old_rows.get(row["name"])
+        if base is None:
+            lines.append(f"  {row['name']}: new")
+            continue
+        for key, value in row.items():
+            direction = metric_direction(key)
+            if not direction or key not in base or not isinstance(value, (int, float)):
+                continue
+            before = base[key]
+            change = (value - before) / before if before else 0.0
+            # Recall is absolute: compare the drop in points, not relative to a value near 1
+            if key.startswith("recall@") or key == "identical_ratio":
+                change = value - before
+            worse = -direction * change > threshold
+            flag = "❌" if worse else ("✅" if direction * change > threshold else "  ")
+            lines.append(f"{flag} {row['name']:<40} {key:<16} {before:>10} -> {value:<10} ({change:+.1%})")
+            if worse:
+                regressions.append((row["name"], key))
+    return regressions, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if old.get("benchmark") != new.get("benchmark"):
+        sys.exit(f"Cannot compare a '{old.get('benchmark')}' run with a '{new.get('benchmark')}' run")
+
+    print(f"{old['benchmark']}: {old.get('git_commit')} ({old['created']}) -> {new.get('git_commit')} ({new['created']})")
+    regressions, lines = compare(old, new, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
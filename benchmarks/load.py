@@ -0,0 +1,120 @@
+"""
+Load generator for the recommend API.
+
+    python -m benchmarks.load --endpoint /api/recommend --concurrency 32 --requests 2000
+
+By default the FastAPI app runs in-process (httpx ASGI transport, no network)
+with a CareerEngine over a synthetic local catalog, a stub encoder and a stub
+advisor, so the numbers cover the app's own overhead: routing, validation,
+search, serialization and middleware. --encode-ms / --advisor-ms add fixed
+costs to stand in for the model and the LLM. --url targets a running server
+instead (its own engine and advisor are used).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+from benchmarks.common import (
+    HashEncoder, StubAdvisor, build_store, latency_summary, load_variant, make_profiles, write_results,
+)
+
+ENDPOINTS = ("/api/recommend", "/api/recommend/stream", "/api/recommend/batch", "/health")
+
+
+def request_for(endpoint, profiles, i, batch_size):
+    if endpoint == "/health":
+        return "GET", None
+    if endpoint == "/api/recommend/batch":
+        start = (i * batch_size) % len(profiles)
+        return "POST", {"profiles": (profiles * 2)[start:start + batch_size], "include_advice": True}
+    return "POST", profiles[i % len(profiles)]
+
+
+async def run_load(client, endpoint, profiles, total, concurrency, batch_size):
+    samples, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, body = request_for(endpoint, profiles, i, batch_size)
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, endpoint, json=body)
+                await response.aread()
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            samples.append(time.perf_counter() - t0)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    return {**latency_summary(samples, wall), "errors": errors, "wall_s": round(wall, 3)}
+
+
+def in_process_app(args):
+    from app import main as app_main
+    from app.services.engine import CareerEngine
+
+    settings.LOG_REQUEST_TIMINGS = False
+    directory = build_store(args.catalog_size)
+    engine = CareerEngine(
+        model=HashEncoder(cost_ms=args.encode_ms),
+        local_index=load_variant(directory, args.variant),
+        use_qdrant=False,
+    )
+    app_main.service_container.update(engine=engine, advisor=StubAdvisor(latency_ms=args.advisor_ms))
+    return app_main.app
+
+
+async def main_async(args):
+    profiles = make_profiles(args.profiles)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        transport = httpx.ASGITransport(app=in_process_app(args))
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+    async with client:
+        # Warm-up fills the embedding cache for the first profiles and JITs nothing else
+        await run_load(client, args.endpoint, profiles, min(50, args.requests), args.concurrency, args.batch_size)
+        results = []
+        for concurrency in args.concurrency_levels or [args.concurrency]:
+            summary = await run_load(client, args.endpoint, profiles, args.requests, concurrency, args.batch_size)
+            row = {"name": f"load{args.endpoint}/c={concurrency}", "endpoint": args.endpoint,
+                   "concurrency": concurrency, **summary}
+            results.append(row)
+            print(f"   {row['name']:<32} {row['throughput_rps']} rps  p50={row['p50_ms']:.2f}ms "
+                  f"p95={row['p95_ms']:.2f}ms p99={row['p99_ms']:.2f}ms errors={row['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="/api/recommend")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--concurrency-levels", type=int, nargs="+", help="sweep several concurrency levels")
+    parser.add_argument("--profiles", type=int, default=500, help="distinct user profiles cycled through")
+    parser.add_argument("--batch-size", type=int, default=20, help="profiles per /api/recommend/batch request")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--variant", default="exact", choices=["exact", "ivf", "int8", "ivf+int8"])
+    parser.add_argument("--encode-ms", type=float, default=0.0, help="stub encoder cost per call")
+    parser.add_argument("--advisor-ms", type=float, default=0.0, help="stub advisor latency")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--output", help="results file (default benchmarks/results/load-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    write_results("load", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
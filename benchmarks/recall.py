@@ -0,0 +1,72 @@
+"""
+Recall of the approximate / quantized local search paths against exact search.
+
+    python -m benchmarks.recall --sizes 10000 100000 --nprobe 4 8 16 32
+
+Queries are perturbed catalog vectors, so each has a meaningful neighborhood.
+For every variant it reports recall@k (overlap with the exact top-k), the
+share of queries whose top-k is identical in order, and per-query latency.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from app.services.ann import sample_queries
+from benchmarks.common import build_store, latency_summary, load_variant, write_results
+
+
+def compare(index, queries, truth, max_job_zone, top_k, nprobe=None):
+    samples, overlap, identical = [], 0, 0
+    for query, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        rows, _ = index.search_rows(query, max_job_zone=max_job_zone, top_k=top_k, nprobe=nprobe)[0]
+        samples.append(time.perf_counter() - t0)
+        overlap += len(set(rows.tolist()) & set(expected.tolist()))
+        identical += int(np.array_equal(rows, expected))
+    total = sum(len(t) for t in truth)
+    return {
+        f"recall@{top_k}": round(overlap / max(1, total), 4),
+        "identical_ratio": round(identical / len(queries), 4),
+        **latency_summary(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--max-education-level", type=int, nargs="+", default=[2, 5])
+    parser.add_argument("--rebuild", action="store_true", help="rebuild cached synthetic catalogs")
+    parser.add_argument("--output", help="results file (default benchmarks/results/recall-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        directory = build_store(size, rebuild=args.rebuild)
+        exact = load_variant(directory, "exact")
+        queries = sample_queries(exact.vectors, args.queries, seed=size)
+        variants = {name: load_variant(directory, name) for name in ("int8", "ivf", "ivf+int8")}
+        for zone in args.max_education_level:
+            truth = [rows for rows, _ in exact.search_rows(queries, max_job_zone=zone, top_k=args.top_k, exact=True)]
+            runs = [("int8", None)] + [(name, n) for name in ("ivf", "ivf+int8") for n in args.nprobe]
+            for name, nprobe in runs:
+                row = {
+                    "name": f"recall/{name}" + (f"/nprobe={nprobe}" if nprobe else "") + f"/zone<={zone}/n={size}",
+                    "variant": name, "size": size, "nprobe": nprobe, "max_education_level": zone,
+                    **compare(variants[name], queries, truth, zone, args.top_k, nprobe),
+                }
+                results.append(row)
+                print(f"   {row['name']:<40} recall@{args.top_k}={row[f'recall@{args.top_k}']:.4f} "
+                      f"identical={row['identical_ratio']:.3f} p50={row['p50_ms']:.3f}ms")
+
+    write_results("recall", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Microbenchmark of CareerEngine.search on synthetic catalogs.
+
+    python -m benchmarks.search --sizes 1000 10000 100000 1000000
+
+Local variants: exact (brute force), ivf (IVF index), int8 (compressed first
+pass + exact rescore) and ivf+int8. The in-process Qdrant backend (local
+mode, itself a brute-force scan) is run up to --qdrant-max jobs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+from benchmarks.common import (
+    HashEncoder, build_qdrant, build_store, latency_summary, load_variant, make_queries, write_results,
+)
+
+LOCAL_VARIANTS = ("exact", "ivf", "int8", "ivf+int8")
+
+
+def time_searches(engine, queries, max_education_level, top_k, warmup=20):
+    for query in queries[:warmup]:
+        engine.search(query + " warmup", max_education_level=max_education_level, top_k=top_k)
+    samples = []
+    started = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        engine.search(query, max_education_level=max_education_level, top_k=top_k)
+        samples.append(time.perf_counter() - t0)
+    return latency_summary(samples, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--max-education-level", type=int, default=3)
+    parser.add_argument("--variants", nargs="+", default=list(LOCAL_VARIANTS) + ["qdrant"],
+                        choices=list(LOCAL_VARIANTS) + ["qdrant"])
+    parser.add_argument("--qdrant-max", type=int, default=100000,
+                        help="largest catalog loaded into in-process Qdrant (it is slow to fill)")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild cached synthetic catalogs")
+    parser.add_argument("--output", help="results file (default benchmarks/results/search-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    from app.services.engine import CareerEngine
+
+    # Measure the search itself: no coalescing wait, no per-request log lines
+    settings.ENCODE_BATCHING_ENABLED = False
+    settings.LOG_REQUEST_TIMINGS = False
+
+    results = []
+    for size in args.sizes:
+        directory = build_store(size, rebuild=args.rebuild)
+        queries = make_queries(args.queries, seed=size)
+        for variant in args.variants:
+            if variant == "qdrant":
+                if size > args.qdrant_max:
+                    print(f"   ⏭️  qdrant n={size}: above --qdrant-max, skipped")
+                    continue
+                engine = CareerEngine(model=HashEncoder(), client=build_qdrant(size))
+            else:
+                engine = CareerEngine(model=HashEncoder(), local_index=load_variant(directory, variant),
+                                      use_qdrant=False)
+            summary = time_searches(engine, queries, args.max_education_level, args.top_k)
+            engine.encode_executor.shutdown(wait=False)
+            row = {"name": f"search/{variant}/n={size}", "variant": variant, "size": size, **summary}
+            results.append(row)
+            print(f"   {row['name']:<28} p50={row['p50_ms']:.3f}ms p95={row['p95_ms']:.3f}ms "
+                  f"p99={row['p99_ms']:.3f}ms {row['throughput_rps']} qps")
+
+    write_results("search", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
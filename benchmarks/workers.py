@@ -0,0 +1,163 @@
+"""
+Memory and throughput of the gunicorn deployment at several worker counts,
+with and without PRELOAD_ENGINE.
+
+    python -m benchmarks.workers --workers 1 4 8 --requests 2000 --concurrency 32
+
+Each configuration starts `gunicorn -c gunicorn.conf.py app.main:app` on a
+free port with the real model, index and advisor from the environment, waits
+until every worker answers, then measures:
+
+  - total RSS and PSS of the master plus its workers, idle and after the load
+    run (PSS charges each shared page to its processes pro rata, so unlike the
+    RSS sum it does not count the copy-on-write pages once per worker);
+  - throughput and latency percentiles of --endpoint under load (as in
+    benchmarks.load --url);
+  - time from launch to the first successful /health.
+
+Linux only (/proc/<pid>/smaps_rollup).
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.getcwd())
+from benchmarks.common import make_profiles, write_results
+from benchmarks.load import ENDPOINTS, run_load
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        children = []
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+
+def memory_mb(pid):
+    """Summed RSS and PSS (MB) of `pid` and all its descendants."""
+    totals = {"Rss": 0, "Pss": 0}
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in totals:
+                        totals[key] += int(value.split()[0])
+        except OSError:
+            continue
+    return {"rss_mb": round(totals["Rss"] / 1024, 1), "pss_mb": round(totals["Pss"] / 1024, 1)}
+
+
+async def wait_ready(url, master, workers, timeout):
+    """Seconds until /health answers and all `workers` processes exist."""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url, timeout=5) as client:
+        while time.perf_counter() - started < timeout:
+            if master.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {master.returncode}")
+            try:
+                healthy = (await client.get("/health")).status_code == 200
+            except httpx.HTTPError:
+                healthy = False
+            if healthy and len(process_tree(master.pid)) - 1 >= workers:
+                ready = time.perf_counter() - started
+                # The first worker up answers /health; give the others time to finish loading
+                await asyncio.gather(*(client.get("/health") for _ in range(workers * 4)))
+                return ready
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"server not ready after {timeout}s")
+
+
+async def measure(args, workers, preload):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        PRELOAD_ENGINE=str(preload).lower(),
+        LOG_REQUEST_TIMINGS="false",
+    )
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL if not args.verbose else None, stderr=subprocess.STDOUT,
+    )
+    try:
+        startup = await wait_ready(url, master, workers, args.startup_timeout)
+        await asyncio.sleep(args.settle)
+        idle = memory_mb(master.pid)
+        profiles = make_profiles(args.profiles)
+        async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+            summary = await run_load(client, args.endpoint, profiles, args.requests, args.concurrency, args.batch_size)
+        loaded = memory_mb(master.pid)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        try:
+            master.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            master.kill()
+    return {
+        "name": f"workers/{'preload' if preload else 'per-worker'}/w={workers}",
+        "workers": workers,
+        "preload": preload,
+        "startup_s": round(startup, 2),
+        "idle_rss_mb": idle["rss_mb"],
+        "idle_pss_mb": idle["pss_mb"],
+        "rss_mb": loaded["rss_mb"],
+        "pss_mb": loaded["pss_mb"],
+        **summary,
+    }
+
+
+async def main_async(args):
+    results = []
+    for workers in args.workers:
+        for preload in args.preload:
+            row = await measure(args, workers, preload)
+            results.append(row)
+            print(f"   {row['name']:<26} pss={row['pss_mb']:.0f}MB (idle {row['idle_pss_mb']:.0f}MB) "
+                  f"rss_sum={row['rss_mb']:.0f}MB {row['throughput_rps']} rps "
+                  f"p95={row['p95_ms']:.1f}ms startup={row['startup_s']}s errors={row['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--preload", type=lambda v: v.lower() in ("1", "true", "yes", "on"), nargs="+",
+                        default=[False, True], help="preload modes to run (default: both)")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="/api/recommend")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--profiles", type=int, default=5000, help="distinct profiles (keep above --requests to defeat caches)")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before the idle memory sample")
+    parser.add_argument("--verbose", action="store_true", help="show gunicorn's output")
+    parser.add_argument("--output", help="results file (default benchmarks/results/workers-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    write_results("workers", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
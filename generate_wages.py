@@ -1,52 +1,57 @@
 import pandas as pd
 import numpy as np
+import argparse
 import os
+import sys
+
+sys.path.append(os.getcwd())
 from app.core.config import settings
+from app.services.data_processor import CODE, WAGE_COLUMN, GROWTH_COLUMN
+
+
+def mock_wages(codes, job_zones, seed=42):
+    """
+    Realistic-looking wages for each SOC code, based on its job zone:
+    zone 1 (low skill) -> ~$45k, zone 5 (high skill) -> ~$105k, plus a
+    -$5k..+$20k variance, and a -2%..+14% growth projection.
+
+    The variance comes from a hash of (seed, SOC code) instead of a random
+    stream, so an occupation keeps its wage when others are added or removed.
+    """
+    codes = pd.Series(codes, dtype=str).to_numpy()
+    zones = pd.to_numeric(pd.Series(job_zones), errors="coerce").fillna(1).to_numpy(dtype=np.int64)
+    h = pd.util.hash_array(codes, hash_key=f"wages{seed:011d}"[:16])
+    salary = 30000 + zones * 15000 + (h % 25000).astype(np.int64) - 5000
+    growth = ((h // 25000) % 17).astype(np.int64) - 2
+    return pd.DataFrame({CODE: codes, WAGE_COLUMN: salary, GROWTH_COLUMN: growth.astype(np.float32)})
+
 
-def create_mock_wages():
+def create_mock_wages(seed=42):
     print("💰 Generating Realistic Wages Data...")
-    
-    # 1. Load your existing jobs to get the SOC Codes
-    processed_path = os.path.join(settings.DATA_DIR, settings.PROCESSED_DATA_FILE)
-    if not os.path.exists(processed_path):
-        print("❌ Error: Processed data not found. Run data_processor.py (v2) first.")
+
+    # SOC codes and job zones straight from the raw O*NET tables, so this can run
+    # before data_processor.py (which merges the result)
+    occ_path = os.path.join(settings.DATA_DIR, settings.RAW_DATA_FILE)
+    zones_path = os.path.join(settings.DATA_DIR, "Job Zones.txt")
+    if not os.path.exists(occ_path) or not os.path.exists(zones_path):
+        print(f"❌ Error: O*NET tables not found in {settings.DATA_DIR}.")
         return
 
-    df = pd.read_csv(processed_path)
-    
-    # 2. Create Realistic Logic
-    # We will base salary on "Job Zone" (Education Level)
-    # Zone 1 (Low skill) -> $30k - $45k
-    # Zone 5 (High skill) -> $90k - $150k
-    
-    wages_data = []
-    
-    for _, row in df.iterrows():
-        zone = row['Job Zone'] if 'Job Zone' in row else 3
-        
-        # Base salary logic
-        base_salary = 30000 + (zone * 15000)
-        random_variance = np.random.randint(-5000, 20000)
-        final_salary = base_salary + random_variance
-        
-        # Growth logic (-2% to +15%)
-        growth = np.random.randint(-2, 15)
-        
-        wages_data.append({
-            "O*NET-SOC Code": row['O*NET-SOC Code'],
-            "Median Annual Wage": f"${final_salary:,}", # Format as $55,000
-            "Percent Change": growth
-        })
-    
-    # 3. Save as the file we need
-    wages_df = pd.DataFrame(wages_data)
-    output_path = os.path.join(settings.DATA_DIR, "Wages and Employment.txt")
-    
-    # Save as Tab-Separated to mimic real O*NET
+    codes = pd.read_csv(occ_path, sep="\t", usecols=[CODE], dtype=str)[CODE]
+    zones = pd.read_csv(zones_path, sep="\t", usecols=[CODE, "Job Zone"], dtype={CODE: str})
+    zones = zones.drop_duplicates(CODE).set_index(CODE)["Job Zone"]
+    wages_df = mock_wages(codes, codes.map(zones), seed=seed)
+
+    # Save as Tab-Separated to mimic real O*NET, with plain numeric columns
+    output_path = os.path.join(settings.DATA_DIR, settings.WAGES_FILE)
     wages_df.to_csv(output_path, sep="\t", index=False)
-    
-    print(f"✅ Created 'Wages and Employment.txt' with {len(wages_df)} entries.")
+
+    print(f"✅ Created '{settings.WAGES_FILE}' with {len(wages_df)} entries.")
     print(f"   Sample: {wages_df.head(1).to_dict('records')}")
 
+
 if __name__ == "__main__":
-    create_mock_wages()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate mock wage and growth data per occupation")
+    parser.add_argument("--seed", type=int, default=42, help="same seed, same wages")
+    args = parser.parse_args()
+    create_mock_wages(seed=args.seed)
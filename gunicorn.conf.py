@@ -0,0 +1,40 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+WEB_CONCURRENCY sets the number of (uvicorn) workers. With PRELOAD_ENGINE=true
+the master loads the sentence-transformer and the local index once, before
+forking, and the workers share those pages copy-on-write instead of each
+loading its own copy (see app/services/preload.py). Every worker gets
+TORCH_NUM_THREADS torch threads, by default an even share of the cores.
+"""
+import os
+import sys
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.PRELOAD_ENGINE
+# Model load can take a while on a cold container
+timeout = 120
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before the first fork
+    if not preload_app:
+        return
+    from app.main import service_container
+    from app.services.preload import preload_services
+
+    preload_services(service_container)
+
+
+def post_fork(server, worker):
+    from app.main import service_container
+    from app.services.preload import init_worker
+
+    init_worker(service_container, server.num_workers)
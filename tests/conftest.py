@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+sys.path.append(os.getcwd())
+from app.core.config import settings
+from benchmarks.common import HashEncoder
+
+DIM = 32
+
+JOBS = [
+    {"soc_code": "15-1252.00", "title": "Software Developers", "job_zone": 4, "median_wage": 130000, "growth_pct": 17.0},
+    {"soc_code": "15-2051.00", "title": "Data Scientists", "job_zone": 5, "median_wage": 108000, "growth_pct": 35.0},
+    {"soc_code": "43-4051.00", "title": "Customer Service Representatives", "job_zone": 2, "median_wage": 39000, "growth_pct": -5.0},
+    {"soc_code": "35-2014.00", "title": "Cooks, Restaurant", "job_zone": 2, "median_wage": 34000, "growth_pct": 6.0},
+    {"soc_code": "47-2111.00", "title": "Electricians", "job_zone": 3, "median_wage": 61000, "growth_pct": 6.0},
+    {"soc_code": "29-1141.00", "title": "Registered Nurses", "job_zone": 3, "median_wage": 86000, "growth_pct": 6.0},
+]
+
+
+def job_points(encoder):
+    return [
+        PointStruct(
+            id=i,
+            vector=encoder.encode(job["title"].lower()).tolist(),
+            payload={**job, "education": f"Job zone {job['job_zone']}", "description": f"{job['title']} work."},
+        )
+        for i, job in enumerate(JOBS)
+    ]
+
+
+def populate(client, encoder, collection="careers"):
+    client.create_collection(collection, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE))
+    client.upsert(collection, points=job_points(encoder))
+
+
+def write_local_store(encoder, jobs=JOBS):
+    """Publish `jobs` as the local index store, embedded like `job_points`."""
+    from app.services.local_index import LocalIndexWriter
+
+    writer = LocalIndexWriter()
+    writer.append(
+        encoder.encode([job["title"].lower() for job in jobs]),
+        job_zone=[job["job_zone"] for job in jobs],
+        median_wage=[job["median_wage"] for job in jobs],
+        growth_pct=[job["growth_pct"] for job in jobs],
+        ids=[job["soc_code"] for job in jobs],
+        titles=[job["title"] for job in jobs],
+        education=[f"Job zone {job['job_zone']}" for job in jobs],
+        descriptions=[f"{job['title']} work." for job in jobs],
+    )
+    return writer.finalize()
+
+
+async def apopulate(client, encoder, collection="careers"):
+    await client.create_collection(collection, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE))
+    await client.upsert(collection, points=job_points(encoder))
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(tmp_path, monkeypatch):
+    """Keep every test away from the real data directory and background threads."""
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "LOCAL_INDEX_DIR", str(tmp_path / "local_index"))
+    monkeypatch.setattr(settings, "INDEX_WATCH_INTERVAL", 0)
+    monkeypatch.setattr(settings, "ADVICE_DISK_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "RESPONSE_DISK_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "LOG_REQUEST_TIMINGS", False)
+
+
+@pytest.fixture
+def encoder():
+    return HashEncoder(dim=DIM)
+
+
+@pytest.fixture
+def qdrant(encoder):
+    """In-process Qdrant holding the JOBS collection."""
+    client = QdrantClient(":memory:")
+    populate(client, encoder)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def engine(encoder, qdrant):
+    from app.services.engine import CareerEngine
+
+    engine = CareerEngine(model=encoder, client=qdrant)
+    yield engine
+    engine.encode_executor.shutdown(wait=False)
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    """
+    Minimal OpenAI-compatible chat completions server. Each request is recorded,
+    then answered after `delay` seconds (or as soon as the server is closed).
+    Streaming requests get `reply` word by word, `chunk_delay` seconds apart;
+    a non-200 `status` answers with an error instead.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeOpenAIHandler)
+        self.requests = []
+        self.received = threading.Event()
+        self.released = threading.Event()
+        self.delay = 0.0
+        self.reply = "Try Software Developers."
+        self.status = 200
+        self.chunk_delay = 0.0
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        self.server.received.set()
+        if self.server.delay:
+            self.server.released.wait(self.server.delay)
+        if self.server.status != 200:
+            return self.send_json({"error": {"message": "model overloaded", "type": "server_error"}}, self.server.status)
+        if body.get("stream"):
+            return self.send_stream(body)
+        self.send_json({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    def send_json(self, data, status=200):
+        payload = json.dumps(data).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (timeout or cancellation)
+
+    def send_stream(self, body):
+        words = self.server.reply.split(" ")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i, word in enumerate(words):
+                if i and self.server.chunk_delay:
+                    self.server.released.wait(self.server.chunk_delay)
+                chunk = {
+                    "id": "chatcmpl-test",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = FakeOpenAI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    yield server
+    server.released.set()
+    server.shutdown()
+    server.server_close()
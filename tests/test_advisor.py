@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.advisor import ADVICE_ERROR_PREFIX, CareerAdvisor
+
+PROFILE = {"interests": "Building apps", "skills": "Python", "age": 30}
+JOBS = [{"title": "Software Developers"}, {"title": "Data Scientists"}]
+
+
+async def advise(advisor, profile=PROFILE):
+    try:
+        return await advisor.agenerate_advice(user_profile=profile, jobs=JOBS)
+    finally:
+        await advisor.aclose()
+
+
+def test_agenerate_advice_calls_llm_and_caches(fake_openai):
+    advisor = CareerAdvisor()
+    assert asyncio.run(advise(advisor)) == fake_openai.reply
+    assert fake_openai.requests[0]["model"] == settings.ADVISOR_MODEL
+    # Same profile modulo case/spacing: served from the cache
+    profile = {**PROFILE, "interests": "  building APPS "}
+    assert asyncio.run(advise(advisor, profile)) == fake_openai.reply
+    assert len(fake_openai.requests) == 1
+
+
+def test_agenerate_advice_times_out(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, "ADVISOR_TIMEOUT", 0.3)
+    fake_openai.delay = 10
+    advisor = CareerAdvisor()
+    started = time.perf_counter()
+    advice = asyncio.run(advise(advisor))
+    assert time.perf_counter() - started < 3
+    assert advice.startswith(ADVICE_ERROR_PREFIX)
+    assert "timed out" in advice
+    # Failures are not cached
+    assert advisor.cache.get(advisor.cache_key(PROFILE, JOBS)) is None
+
+
+def test_agenerate_advice_is_cancelled_with_its_task(fake_openai):
+    fake_openai.delay = 10
+    advisor = CareerAdvisor()
+
+    async def scenario():
+        task = asyncio.ensure_future(advisor.agenerate_advice(user_profile=PROFILE, jobs=JOBS))
+        # Wait until the request is in flight at the server, then drop it
+        assert await asyncio.to_thread(fake_openai.received.wait, 5)
+        started = time.perf_counter()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await advisor.aclose()
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 1
+    assert advisor.cache.get(advisor.cache_key(PROFILE, JOBS)) is None
+
+
+def test_mock_mode_without_api_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    advisor = CareerAdvisor()
+    assert "Software Developers" in asyncio.run(advise(advisor))
+
+
+def test_mock_mode_without_jobs(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    advice = CareerAdvisor()._mock_advice(PROFILE, [])
+    assert PROFILE["interests"] in advice
+
+
+def test_astream_advice_times_out_when_the_stream_stalls(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, "ADVISOR_TIMEOUT", 0.5)
+    fake_openai.reply = "Try Software Developers."
+    fake_openai.chunk_delay = 10
+    advisor = CareerAdvisor()
+
+    async def scenario():
+        chunks = []
+        try:
+            with pytest.raises(asyncio.TimeoutError, match="timed out after 0.5s"):
+                async for chunk in advisor.astream_advice(user_profile=PROFILE, jobs=JOBS):
+                    chunks.append(chunk)
+        finally:
+            await advisor.aclose()
+        return chunks
+
+    started = time.perf_counter()
+    assert asyncio.run(scenario()) == ["Try"]
+    assert time.perf_counter() - started < 3
+    assert advisor.cache.get(advisor.cache_key(PROFILE, JOBS)) is None
+
+
+def test_astream_advice_streams_and_caches(fake_openai):
+    fake_openai.reply = "Try Software Developers."
+    advisor = CareerAdvisor()
+
+    async def scenario():
+        try:
+            return [chunk async for chunk in advisor.astream_advice(user_profile=PROFILE, jobs=JOBS)]
+        finally:
+            await advisor.aclose()
+
+    assert asyncio.run(scenario()) == ["Try", " Software", " Developers."]
+    assert advisor.cache.get(advisor.cache_key(PROFILE, JOBS)) == fake_openai.reply
@@ -0,0 +1,207 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import NO_MATCHES_SUMMARY, app, service_container
+from app.services.advisor import CareerAdvisor
+from app.services.response_cache import ResponseCache
+
+PROFILE = {
+    "interests": "Building apps",
+    "skills": "Python, SQL",
+    "age": 30,
+    "education_level_id": 3,
+}
+
+
+@pytest.fixture
+def services(engine, fake_openai, monkeypatch):
+    monkeypatch.setitem(service_container, "engine", engine)
+    monkeypatch.setitem(service_container, "advisor", CareerAdvisor())
+    monkeypatch.setitem(service_container, "response_cache", ResponseCache())
+    return service_container
+
+
+def call(*requests):
+    """Send (method, path, kwargs) requests in order through the ASGI app."""
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, path, **kwargs) for method, path, kwargs in requests]
+    return asyncio.run(scenario())
+
+
+def test_recommend(services, fake_openai):
+    (response,) = call(("POST", "/api/recommend", {"json": PROFILE}))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user_summary"] == fake_openai.reply
+    assert len(body["recommendations"]) == 4
+    assert all(r["id"][:2] != "15" for r in body["recommendations"])  # zones 4-5 filtered out
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_recommend_cache_and_conditional_requests(services, fake_openai):
+    first, second, not_modified, query = call(
+        ("POST", "/api/recommend", {"json": PROFILE}),
+        ("POST", "/api/recommend", {"json": {**PROFILE, "skills": "Python,  SQL "}}),
+        ("POST", "/api/recommend", {"json": PROFILE, "headers": {"If-None-Match": '"stale"'}}),
+        ("GET", "/api/recommend", {"params": PROFILE}),
+    )
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert len(fake_openai.requests) == 1
+    assert query.headers["X-Cache"] == "HIT"
+    assert query.headers["Cache-Control"] == f"public, max-age={settings.RESPONSE_CACHE_MAX_AGE}"
+
+    headers = {"If-None-Match": f'W/"other", W/{first.headers["ETag"]}'}
+    (revalidated,) = call(("POST", "/api/recommend", {"json": PROFILE, "headers": headers}))
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert not_modified.status_code == 200  # a different ETag gets the full body
+
+
+def test_recommend_cache_folds_case_only_for_uncased_encoders(services, fake_openai, monkeypatch):
+    lower = {**PROFILE, "skills": "python, sql"}
+    _, cased = call(("POST", "/api/recommend", {"json": PROFILE}), ("POST", "/api/recommend", {"json": lower}))
+    assert cased.headers["X-Cache"] == "MISS"
+
+    monkeypatch.setattr(services["engine"], "lowercase_queries", True)
+    _, uncased = call(("POST", "/api/recommend", {"json": PROFILE}), ("POST", "/api/recommend", {"json": lower}))
+    assert uncased.headers["X-Cache"] == "HIT"
+
+
+def test_recommend_advisor_timeout_is_not_cached(services, fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, "ADVISOR_TIMEOUT", 0.3)
+    fake_openai.delay = 10
+    service_container["advisor"] = CareerAdvisor()
+    first, second = call(
+        ("POST", "/api/recommend", {"json": PROFILE}),
+        ("POST", "/api/recommend", {"json": PROFILE}),
+    )
+    assert first.status_code == 200
+    assert "timed out" in first.json()["user_summary"]
+    assert first.headers["Cache-Control"] == "no-store"
+    assert second.headers["X-Cache"] == "MISS"
+
+
+def test_recommend_without_services(monkeypatch):
+    monkeypatch.setitem(service_container, "engine", None)
+    monkeypatch.setitem(service_container, "advisor", None)
+    (response,) = call(("POST", "/api/recommend", {"json": PROFILE}))
+    assert response.status_code == 500
+
+
+def test_serialization_is_timed_once(services, monkeypatch):
+    from app.core import metrics
+
+    recorded = []
+    record_stage = metrics.record_stage
+    monkeypatch.setattr(metrics, "record_stage", lambda name, seconds: (recorded.append(name), record_stage(name, seconds)))
+    call(("POST", "/api/recommend", {"json": PROFILE}), ("POST", "/api/recommend", {"json": PROFILE}))
+    # Built once by recommend() on the miss; the cache hit sends stored bytes
+    assert recorded.count("serialization") == 1
+    recorded.clear()
+    call(("GET", "/health", {}))
+    # Routes returning plain data are still timed by the middleware
+    assert recorded == ["serialization"]
+
+
+def test_reindex_invalidates_cached_responses(services, qdrant):
+    from app.services.indexer import collection_digest, record_collection_metadata
+
+    first, cached = call(("POST", "/api/recommend", {"json": PROFILE}), ("POST", "/api/recommend", {"json": PROFILE}))
+    assert cached.headers["X-Cache"] == "HIT"
+    # Reindexed elsewhere: the engine picks the new digest up on its next poll
+    record_collection_metadata(qdrant, "careers", content_digest=collection_digest({"p": "new"}))
+    services["engine"].refresh_qdrant_version()
+    (after,) = call(("POST", "/api/recommend", {"json": PROFILE}))
+    assert after.headers["X-Cache"] == "MISS"
+    assert after.json()["index_version"] != first.json()["index_version"]
+
+
+def test_recommend_without_matches_skips_the_advisor(services, fake_openai):
+    (response,) = call(("POST", "/api/recommend", {"json": {**PROFILE, "min_salary": 10_000_000}}))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["recommendations"] == []
+    assert body["user_summary"]
+    assert fake_openai.requests == []
+
+
+def test_recommend_without_matches_in_mock_mode(services, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    services["advisor"] = CareerAdvisor()
+    (response,) = call(("POST", "/api/recommend", {"json": {**PROFILE, "min_growth": 1000}}))
+    assert response.status_code == 200
+    assert response.json()["recommendations"] == []
+
+
+def test_batch_advice_runs_concurrently_up_to_the_limit(services, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_ADVICE_CONCURRENCY", 2)
+    in_flight = []
+    peak = []
+
+    async def agenerate_advice(user_profile, jobs):
+        in_flight.append(user_profile["skills"])
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(user_profile["skills"])
+        return f"Advice for {user_profile['skills']}"
+
+    monkeypatch.setattr(services["advisor"], "agenerate_advice", agenerate_advice)
+    profiles = [{**PROFILE, "skills": f"skill {i}"} for i in range(6)]
+    no_match = {**PROFILE, "min_salary": 10_000_000}
+    (response,) = call(("POST", "/api/recommend/batch", {"json": {"profiles": [*profiles, no_match]}}))
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["user_summary"] for item in results[:6]] == [f"Advice for skill {i}" for i in range(6)]
+    assert results[6] == {"user_summary": None, "recommendations": []}
+    assert max(peak) == 2
+
+
+def sse_events(response):
+    """(event, data) pairs of a text/event-stream response body."""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_sends_recommendations_then_tokens_then_end(services, fake_openai):
+    fake_openai.reply = "Try Software Developers first."
+    (response,) = call(("POST", "/api/recommend/stream", {"json": PROFILE}))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response)
+    names = [name for name, _ in events]
+    assert names == ["recommendations", "token", "token", "token", "token", "end"]
+    recommendations = events[0][1]
+    assert recommendations["recommendations"]
+    assert recommendations["index_version"] == services["engine"].index_version
+    assert "".join(data["text"] for name, data in events if name == "token") == fake_openai.reply
+    assert events[-1][1] == {"user_summary": fake_openai.reply}
+    assert fake_openai.requests[0]["stream"] is True
+
+
+def test_stream_reports_an_advisor_failure(services, fake_openai):
+    fake_openai.status = 400
+    (response,) = call(("POST", "/api/recommend/stream", {"json": PROFILE}))
+    assert response.status_code == 200
+    events = sse_events(response)
+    assert [name for name, _ in events] == ["recommendations", "error"]
+    assert events[1][1]["detail"].startswith("Could not generate advice:")
+
+
+def test_stream_without_matches_skips_the_advisor(services, fake_openai):
+    (response,) = call(("POST", "/api/recommend/stream", {"json": {**PROFILE, "min_salary": 10_000_000}}))
+    assert sse_events(response) == [
+        ("recommendations", {"recommendations": [], "index_version": services["engine"].index_version}),
+        ("end", {"user_summary": NO_MATCHES_SUMMARY}),
+    ]
+    assert fake_openai.requests == []
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from app.services.batcher import BatchingEncoder
+
+
+class GatedModel:
+    """Encodes texts to their lengths; each call waits until `gate` is set."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.gate.wait(5)
+        self.calls.append(list(texts))
+        return np.array([[float(len(t))] for t in texts])
+
+
+def test_batches_concurrent_queries():
+    model = GatedModel()
+    encoder = BatchingEncoder(model, max_batch_size=8, max_wait_ms=50)
+    futures = [encoder.submit(text) for text in ("a", "bb", "ccc")]
+    model.gate.set()
+    assert [f.result(5)[0] for f in futures] == [1.0, 2.0, 3.0]
+    assert encoder.stats()["items"] == 3
+
+
+def test_cancelled_member_does_not_stall_its_batch():
+    model = GatedModel()
+    encoder = BatchingEncoder(model, max_batch_size=8, max_wait_ms=0)
+    # The worker is busy encoding "first" while the next batch queues up behind it
+    first = encoder.submit("first")
+    while not first.running():
+        pass
+    cancelled = encoder.submit("xx")
+    kept = encoder.submit("yyy")
+    assert cancelled.cancel()
+    model.gate.set()
+
+    assert first.result(5)[0] == 5.0
+    assert kept.result(5)[0] == 3.0
+    assert cancelled.cancelled()
+    assert all("xx" not in call for call in model.calls)
+    # The worker survived and keeps serving
+    assert encoder.encode("zzzz")[0] == 4.0
+    assert encoder._thread.is_alive()
+
+
+def test_cancelled_async_caller_does_not_stall_others():
+    model = GatedModel()
+    encoder = BatchingEncoder(model, max_batch_size=8, max_wait_ms=20)
+
+    async def scenario():
+        first = asyncio.ensure_future(asyncio.wrap_future(encoder.submit("a")))
+        second = asyncio.ensure_future(asyncio.wrap_future(encoder.submit("bb")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        model.gate.set()
+        vector = await asyncio.wait_for(second, 5)
+        assert first.cancelled()
+        return vector
+
+    assert asyncio.run(scenario())[0] == 2.0
+    assert encoder.encode("ccc")[0] == 3.0
+    assert encoder._thread.is_alive()
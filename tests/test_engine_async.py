@@ -0,0 +1,56 @@
+import asyncio
+
+from qdrant_client import AsyncQdrantClient
+
+from tests.conftest import apopulate
+
+
+def test_asearch_matches_search(engine):
+    expected = engine.search("software developers", max_education_level=5, top_k=3)
+    results = asyncio.run(engine.asearch("software   developers", max_education_level=5, top_k=3))
+    assert results == expected
+    assert results[0]["id"] == "15-1252.00"
+    assert results[0]["match_score"] == 100.0
+    assert engine.backend_status()["active_backend"] == "qdrant"
+
+
+def test_asearch_applies_filters(engine):
+    results = asyncio.run(engine.asearch("anything", max_education_level=3, top_k=10, min_salary=50000))
+    assert {r["id"] for r in results} == {"47-2111.00", "29-1141.00"}
+    assert all(r["median_wage"] >= 50000 for r in results)
+
+
+def test_asearch_with_async_client(engine, encoder):
+    async def scenario():
+        client = AsyncQdrantClient(":memory:")
+        await apopulate(client, encoder)
+        engine.async_client = client
+        try:
+            return await engine.asearch("data scientists", max_education_level=5, top_k=2)
+        finally:
+            engine.async_client = None
+            await client.close()
+
+    results = asyncio.run(scenario())
+    assert [r["id"] for r in results][:1] == ["15-2051.00"]
+
+
+def test_concurrent_asearches_share_encoder_batches(engine):
+    async def scenario():
+        return await asyncio.gather(*(engine.asearch(f"query {i}", top_k=1) for i in range(20)))
+
+    results = asyncio.run(scenario())
+    assert all(len(r) == 1 for r in results)
+    assert engine.encoder.stats()["items"] == 20
+
+
+def test_cancelled_asearch_does_not_block_others(engine):
+    async def scenario():
+        cancelled = asyncio.ensure_future(engine.asearch("a"))
+        other = asyncio.ensure_future(engine.asearch("b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.wait_for(other, 5)
+
+    assert len(asyncio.run(scenario())) == 5
+    assert engine.encoder._thread.is_alive()
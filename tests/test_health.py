@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.main import service_container
+from app.services.health import CircuitBreaker
+from tests.conftest import write_local_store
+from tests.test_api import call
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Backend:
+    """Probe target that fails while `down`; each probe waits for `release`."""
+
+    def __init__(self):
+        self.down = True
+        self.probes = 0
+        self.release = threading.Event()
+
+    def probe(self):
+        self.probes += 1
+        assert self.release.wait(5)
+        self.release.clear()
+        if self.down:
+            raise ConnectionError("backend down")
+
+
+def wait_for_state(breaker, state):
+    deadline = time.monotonic() + 5
+    while breaker.state != state:
+        assert time.monotonic() < deadline, f"breaker stuck in {breaker.state}"
+        time.sleep(0.01)
+
+
+def test_breaker_transitions():
+    clock, backend = Clock(), Backend()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10, probe=backend.probe, clock=clock)
+
+    assert breaker.allow_request()
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success()  # a success resets the count
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+
+    clock.now = 9.9
+    assert not breaker.allow_request()
+    assert breaker.state == CircuitBreaker.OPEN and backend.probes == 0
+
+    # Cooldown over: one probe starts and requests keep skipping the backend meanwhile
+    clock.now = 10
+    assert not breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    # A failed probe re-opens for another cooldown
+    backend.release.set()
+    wait_for_state(breaker, CircuitBreaker.OPEN)
+    assert breaker.last_error == "backend down"
+    clock.now = 19.9
+    assert not breaker.allow_request() and breaker.state == CircuitBreaker.OPEN
+    assert backend.probes == 1
+
+    # A successful probe closes it again
+    clock.now = 20
+    backend.down = False
+    assert not breaker.allow_request()
+    backend.release.set()
+    wait_for_state(breaker, CircuitBreaker.CLOSED)
+    assert backend.probes == 2
+    assert breaker.allow_request()
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+
+class FlakyClient:
+    """Qdrant client whose searches and probes fail while `down`."""
+
+    def __init__(self, client):
+        self.client = client
+        self.down = False
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name in ("query_points", "query_batch_points", "get_collection"):
+            def call(*args, **kwargs):
+                self.calls += 1
+                if self.down:
+                    raise ConnectionError("qdrant unreachable")
+                return attr(*args, **kwargs)
+            return call
+        return attr
+
+
+@pytest.fixture
+def flaky(encoder, qdrant, monkeypatch):
+    from app.services.engine import CareerEngine
+
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 0)
+    monkeypatch.setattr(settings, "QDRANT_FAILURE_THRESHOLD", 1)
+    monkeypatch.setattr(settings, "QDRANT_COOLDOWN_SECONDS", 3600)
+    write_local_store(encoder)
+    client = FlakyClient(qdrant)
+    engine = CareerEngine(model=encoder, client=client)
+    monkeypatch.setitem(service_container, "engine", engine)
+    monkeypatch.setitem(service_container, "advisor", None)
+    monkeypatch.setitem(service_container, "response_cache", None)
+    yield engine, client
+    engine.encode_executor.shutdown(wait=False)
+
+
+def health():
+    (response,) = call(("GET", "/health", {}))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_open_breaker_falls_back_to_the_local_index(flaky):
+    engine, client = flaky
+    expected = engine.search("data scientists", top_k=3)
+    assert engine.backend_status()["active_backend"] == "qdrant"
+    assert health()["status"] == "ok"
+
+    client.down = True
+    # The failing query trips the breaker and is answered from the local index
+    assert [job["title"] for job in engine.search("data scientists", top_k=3)] == [job["title"] for job in expected]
+    assert engine.qdrant_breaker.state == CircuitBreaker.OPEN
+    # Later queries skip Qdrant altogether
+    calls = client.calls
+    assert engine.search("data scientists", top_k=3)
+    assert client.calls == calls
+    status = health()
+    assert status["status"] == "degraded"
+    assert status["search"]["active_backend"] == "local"
+    assert status["index_version"] == engine.local_index_version
+
+
+def test_health_is_unavailable_without_a_backend(flaky, monkeypatch):
+    engine, client = flaky
+    client.down = True
+    engine.qdrant_breaker.record_failure(ConnectionError("qdrant unreachable"))
+    monkeypatch.setattr(engine, "local_index", None)
+    assert health()["status"] == "unavailable"
+    monkeypatch.setitem(service_container, "engine", None)
+    assert health()["status"] == "unavailable"
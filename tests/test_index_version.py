@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.indexer import collection_digest, record_collection_metadata, switch_alias
+from app.services.local_index import LocalIndex, LocalIndexWriter, read_meta
+from tests.conftest import DIM, JOBS, populate
+
+
+def write_store(titles, chunk_size=100):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((len(titles), DIM)).astype(np.float32)
+    writer = LocalIndexWriter()
+    for start in range(0, len(titles), chunk_size):
+        part = slice(start, start + chunk_size)
+        count = len(titles[part])
+        writer.append(
+            vectors[part],
+            job_zone=np.full(count, 3),
+            ids=[f"id-{start + i}" for i in range(count)],
+            titles=titles[part],
+            education=[""] * count,
+            descriptions=[""] * count,
+        )
+    version = writer.finalize()
+    return version, writer.published
+
+
+def test_unchanged_rebuild_keeps_the_store(monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 0)
+    titles = [f"Job {i}" for i in range(10)]
+    version, published = write_store(titles)
+    assert published
+    meta_path = os.path.join(settings.LOCAL_INDEX_DIR, "meta.json")
+    inode = os.stat(meta_path).st_ino
+
+    # Same content, chunked differently: nothing is published
+    again, published = write_store(titles, chunk_size=3)
+    assert (again, published) == (version, False)
+    assert os.stat(meta_path).st_ino == inode
+    assert not [d for d in os.listdir(settings.DATA_DIR) if ".tmp-" in d]
+
+    changed, published = write_store(titles[:-1] + ["Renamed job"])
+    assert published and changed != version
+    assert read_meta()["version"] == changed == LocalIndex.load().version
+
+
+def test_build_settings_are_part_of_the_version(monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 0)
+    titles = [f"Job {i}" for i in range(10)]
+    version, _ = write_store(titles)
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 3)
+    rebuilt, published = write_store(titles)
+    assert published and rebuilt != version
+
+
+def test_legacy_files_get_a_content_version(tmp_path):
+    df = pd.DataFrame({"O*NET-SOC Code": ["a", "b"], "Title": ["A", "B"], "Job Zone": [1, 2]})
+    df.to_csv(tmp_path / "data.csv", index=False)
+    np.save(tmp_path / "emb.npy", np.eye(2, DIM, dtype=np.float32))
+    first = LocalIndex.from_files(str(tmp_path / "emb.npy"), str(tmp_path / "data.csv"))
+    assert first.version.startswith("legacy-")
+    assert LocalIndex.from_files(str(tmp_path / "emb.npy"), str(tmp_path / "data.csv")).version == first.version
+
+    df.loc[1, "Title"] = "B2"
+    df.to_csv(tmp_path / "data.csv", index=False)
+    assert LocalIndex.from_files(str(tmp_path / "emb.npy"), str(tmp_path / "data.csv")).version != first.version
+
+
+def test_engine_version_follows_the_qdrant_collection(engine, qdrant, encoder):
+    initial = engine.index_version
+    assert initial == f"careers:{len(JOBS)}"  # no digest recorded yet
+
+    digest = collection_digest({"p1": "h1"})
+    record_collection_metadata(qdrant, "careers", content_digest=digest)
+    assert engine.refresh_qdrant_version() == f"careers:{digest[:16]}"
+    assert engine.index_version == f"careers:{digest[:16]}"
+
+    # A shadow rebuild behind the alias (as `indexer --shadow` does)
+    populate(qdrant, encoder, collection="careers_v2")
+    record_collection_metadata(qdrant, "careers_v2", content_digest=collection_digest({"p1": "h2"}))
+    switch_alias(qdrant, "careers_v2", "careers")
+    engine.refresh_qdrant_version()
+    assert engine.index_version.startswith("careers_v2:")
+    assert engine.backend_status()["qdrant"]["version"] == engine.index_version
+
+
+def test_engine_version_falls_back_to_the_local_index(engine):
+    engine.local_index = LocalIndex(
+        vectors=np.eye(2, DIM, dtype=np.float32), job_zone=[1, 1], ids=["a", "b"],
+        titles=["A", "B"], education=["", ""], descriptions=["", ""], version="local-v1",
+    )
+    assert engine.index_version.startswith("careers:")
+    for _ in range(settings.QDRANT_FAILURE_THRESHOLD):
+        engine.qdrant_breaker.record_failure(RuntimeError("down"))
+    assert engine.index_version == "local-v1"
@@ -0,0 +1,135 @@
+import os
+
+import pandas as pd
+import pytest
+from qdrant_client import QdrantClient
+
+from app.core.config import settings
+from app.services import indexer
+from app.services.data_processor import processed_path
+from app.services.encoder import Encoder, encoder_id
+from app.services.local_index import read_meta
+from benchmarks.common import HashEncoder
+from tests.conftest import JOBS
+
+
+class CountingModel(HashEncoder):
+    """HashEncoder with the SentenceTransformer bits Encoder uses, counting encoded texts."""
+
+    max_seq_length = 256
+
+    def __init__(self, dim):
+        super().__init__(dim=dim)
+        self.encoded = 0
+        self.fail = False
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        if self.fail:
+            raise RuntimeError("encoder crashed")
+        self.encoded += 1 if isinstance(texts, str) else len(texts)
+        return super().encode(texts, batch_size, **kwargs)
+
+
+@pytest.fixture
+def dataset():
+    pd.DataFrame({
+        "O*NET-SOC Code": [job["soc_code"] for job in JOBS],
+        "Title": [job["title"] for job in JOBS],
+        "Description": [f"{job['title']} work." for job in JOBS],
+        "Education_Level": ["Some"] * len(JOBS),
+        "Job Zone": [job["job_zone"] for job in JOBS],
+        "Median Annual Wage": [job["median_wage"] for job in JOBS],
+        "Percent Change": [job["growth_pct"] for job in JOBS],
+        "combined_text": [f"{job['title']}: skills" for job in JOBS],
+    }).to_csv(processed_path("csv"), index=False)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = CountingModel(dim=24)
+    monkeypatch.setattr(Encoder, "load", classmethod(
+        lambda cls, *args, **kwargs: cls(model, settings.ENCODER_BACKEND, settings.ENCODER_MODEL_NAME)
+    ))
+    return model
+
+
+@pytest.fixture
+def client(monkeypatch, dataset):
+    client = QdrantClient(":memory:")
+    monkeypatch.delenv("QDRANT_URL", raising=False)
+    monkeypatch.setattr(indexer, "connect", lambda: client)
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 0)
+    yield client
+    client.close()
+
+
+def live_metadata(client):
+    return indexer.collection_metadata(client, indexer.resolve_live_collection(client))
+
+
+def test_collection_is_sized_for_the_encoder(client, model):
+    assert indexer.index_to_qdrant()
+    info = client.get_collection(indexer.COLLECTION_NAME)
+    assert info.config.params.vectors.size == 24
+    assert info.points_count == len(JOBS)
+    assert live_metadata(client)["encoder"] == encoder_id()
+
+
+def test_unchanged_run_encodes_and_publishes_nothing(client, model):
+    assert indexer.index_to_qdrant()
+    meta = read_meta()
+    inode = os.stat(os.path.join(settings.LOCAL_INDEX_DIR, "meta.json")).st_ino
+    metadata = live_metadata(client)
+
+    assert indexer.index_to_qdrant()
+    assert model.encoded == len(JOBS)
+    assert read_meta()["version"] == meta["version"]
+    assert os.stat(os.path.join(settings.LOCAL_INDEX_DIR, "meta.json")).st_ino == inode
+    assert live_metadata(client) == metadata
+
+
+def test_encoder_change_reencodes_everything(client, model, monkeypatch):
+    assert indexer.index_to_qdrant()
+    digest = live_metadata(client)["content_digest"]
+
+    monkeypatch.setattr(settings, "ENCODER_BACKEND", "int8")
+    assert indexer.index_to_qdrant()
+    assert model.encoded == 2 * len(JOBS)
+    live = indexer.resolve_live_collection(client)
+    assert live != indexer.COLLECTION_NAME  # rebuilt as a shadow collection behind the alias
+    assert live_metadata(client)["encoder"] == encoder_id()
+    assert live_metadata(client)["content_digest"] != digest
+    assert [c.name for c in client.get_collections().collections] == [live]
+
+
+def test_aborted_shadow_build_is_removed(client, model, monkeypatch):
+    assert indexer.index_to_qdrant()
+    monkeypatch.setattr(settings, "ENCODER_BACKEND", "int8")
+    model.fail = True
+    assert not indexer.index_to_qdrant()
+    assert [c.name for c in client.get_collections().collections] == [indexer.COLLECTION_NAME]
+
+
+def test_failed_upload_in_place_converges_on_rerun(client, model, monkeypatch, capsys):
+    assert indexer.index_to_qdrant()
+    df = pd.read_csv(processed_path("csv"))
+    df["combined_text"] = df["combined_text"] + " and more"
+    df.to_csv(processed_path("csv"), index=False)
+
+    upsert = indexer.upsert_with_retry
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("qdrant unavailable")
+
+    monkeypatch.setattr(indexer, "upsert_with_retry", fail)
+    assert not indexer.index_to_qdrant()
+    assert "live collection partially updated; rerun to converge" in capsys.readouterr().out
+
+    monkeypatch.setattr(indexer, "upsert_with_retry", upsert)
+    assert indexer.index_to_qdrant()
+    encoded = model.encoded
+    assert indexer.index_to_qdrant()
+    assert model.encoded == encoded
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import ann
+from app.services.ann import IVFIndex, sample_queries, synthetic_catalog
+from app.services.local_index import LocalIndex, LocalIndexWriter
+
+COUNT = 2000
+NLIST = 16
+TOP_K = 10
+
+# (max_job_zone, min_salary, min_growth): from no filter down to one leaving fewer rows than TOP_K
+FILTERS = [
+    (5, None, None),
+    (2, None, None),
+    (4, 80000, None),
+    (5, None, 10.0),
+    (3, 60000, 5.0),
+    (4, 190000, 25.0),
+    (0, None, None),
+]
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    """A store with job zones, wages (some missing) and growth, with an IVF index."""
+    directory = str(tmp_path_factory.mktemp("catalog") / "local_index")
+    vectors, job_zone = synthetic_catalog(COUNT, dim=32, clusters=40)
+    rng = np.random.default_rng(2)
+    median_wage = rng.uniform(20000, 200000, COUNT).astype(np.float32)
+    median_wage[rng.random(COUNT) < 0.1] = np.nan
+    growth_pct = rng.uniform(-10, 30, COUNT).astype(np.float32)
+
+    saved = settings.LOCAL_ANN_ENABLED, settings.LOCAL_NEIGHBORS_K, settings.LOCAL_VECTOR_DTYPE
+    settings.LOCAL_ANN_ENABLED, settings.LOCAL_NEIGHBORS_K, settings.LOCAL_VECTOR_DTYPE = False, 0, "float32"
+    try:
+        writer = LocalIndexWriter(directory)
+        ids = [str(i) for i in range(COUNT)]
+        writer.append(vectors, job_zone, median_wage=median_wage, growth_pct=growth_pct,
+                      ids=ids, titles=ids, education=ids, descriptions=ids)
+        writer.finalize()
+    finally:
+        settings.LOCAL_ANN_ENABLED, settings.LOCAL_NEIGHBORS_K, settings.LOCAL_VECTOR_DTYPE = saved
+    index = LocalIndex.load(directory, use_ann=False, vector_dtype="float32")
+    IVFIndex.build(index.vectors, index.job_zone, nlist=NLIST).save(directory)
+    return directory, sample_queries(vectors, 25)
+
+
+def brute_force(index, query, max_job_zone, min_salary, min_growth, top_k=TOP_K):
+    vectors = np.asarray(index.vectors)
+    mask = np.asarray(index.job_zone) <= max_job_zone
+    if min_salary is not None:
+        mask &= np.asarray(index.median_wage) >= min_salary
+    if min_growth is not None:
+        mask &= np.asarray(index.growth_pct) >= min_growth
+    rows = np.flatnonzero(mask)
+    scores = vectors[rows] @ query
+    best = np.argsort(-scores, kind="stable")[:top_k]
+    return rows[best], scores[best]
+
+
+def assert_matches_brute_force(index, queries, filters, **kwargs):
+    max_job_zone, min_salary, min_growth = filters
+    results = index.search_rows(queries, max_job_zone, TOP_K, min_salary=min_salary, min_growth=min_growth, **kwargs)
+    assert len(results) == len(queries)
+    for query, (rows, scores) in zip(queries, results):
+        expected_rows, expected_scores = brute_force(index, query, *filters)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_exact_search_matches_brute_force(catalog, filters):
+    directory, queries = catalog
+    index = LocalIndex.load(directory, use_ann=False, vector_dtype="float32")
+    assert_matches_brute_force(index, queries, filters)
+    # exact=True on an index with IVF loaded takes the same full scan
+    assert_matches_brute_force(LocalIndex.load(directory, use_ann=True, vector_dtype="float32"), queries, filters,
+                               exact=True)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_ivf_search_probing_every_list_matches_brute_force(catalog, filters, monkeypatch):
+    directory, queries = catalog
+    index = LocalIndex.load(directory, use_ann=True, vector_dtype="float32")
+    assert index.ann is not None and index.ann.nlist == NLIST
+    assert_matches_brute_force(index, queries, filters, nprobe=NLIST)
+    # Force the masked IVF search even where the filter would send it to the scan
+    monkeypatch.setattr(ann.IVFIndex, "probed_rows", lambda self, nprobe=None: 0)
+    assert_matches_brute_force(index, queries, filters, nprobe=NLIST)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_ivf_search_with_few_probes_respects_filters(catalog, filters):
+    directory, queries = catalog
+    index = LocalIndex.load(directory, use_ann=True, vector_dtype="float32")
+    max_job_zone, min_salary, min_growth = filters
+    allowed = set(np.flatnonzero(index.filter_mask(*filters)).tolist())
+    want = min(TOP_K, len(allowed))
+    for query, (rows, scores) in zip(queries, index.search_rows(
+            queries, max_job_zone, TOP_K, nprobe=2, min_salary=min_salary, min_growth=min_growth)):
+        assert set(rows.tolist()) <= allowed
+        assert len(rows) == want
+        assert np.all(np.diff(scores) <= 0)
+        np.testing.assert_allclose(scores, np.asarray(index.vectors)[rows] @ query, rtol=1e-5, atol=1e-6)
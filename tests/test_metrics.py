@@ -0,0 +1,37 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.metrics import cprofile_sampler
+
+SCOPE = {"path": "/api/recommend"}
+
+
+def request(request_id):
+    return SimpleNamespace(request_id=request_id)
+
+
+def profiles(directory):
+    return sorted(name.rsplit("-", 1)[-1] for name in os.listdir(directory))
+
+
+def test_one_profiler_at_a_time(tmp_path):
+    hook = cprofile_sampler(1.0, str(tmp_path))
+    # A request sampled while another is profiled runs unprofiled
+    with hook(request("first"), SCOPE):
+        with hook(request("overlapping"), SCOPE):
+            sum(range(1000))
+    assert profiles(tmp_path) == ["first.prof"]
+
+    # The profiler is free again afterwards, even after a failed request
+    with pytest.raises(RuntimeError):
+        with hook(request("failed"), SCOPE):
+            raise RuntimeError("handler failed")
+    with hook(request("next"), SCOPE):
+        pass
+    assert profiles(tmp_path) == ["failed.prof", "first.prof", "next.prof"]
+
+
+def test_sampling_rate(tmp_path):
+    assert cprofile_sampler(0.0, str(tmp_path))(request("skipped"), SCOPE) is None
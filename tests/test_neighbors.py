@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.services.neighbors import NeighborTable
+
+
+def unit_vectors(count, dim=8, seed=0):
+    v = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def brute_force(vectors, job_zone, row, max_job_zone, k):
+    scores = vectors @ vectors[row]
+    candidates = [i for i in range(len(vectors)) if i != row and job_zone[i] <= max_job_zone]
+    return sorted(candidates, key=lambda i: -scores[i])[:k]
+
+
+def test_neighbors_outside_the_jobs_own_zone():
+    # Three zone-1 jobs and one zone-2 job: under the zone-1 filter the zone-2
+    # job is not among the candidates, so all three zone-1 jobs are its neighbors
+    vectors = unit_vectors(4)
+    job_zone = [1, 1, 1, 2]
+    table = NeighborTable.build(vectors, job_zone, k=3)
+    related, _ = table.lookup(3, max_job_zone=1, top_k=3)
+    assert sorted(related.tolist()) == [0, 1, 2]
+    # A zone-1 job never lists itself
+    related, _ = table.lookup(0, max_job_zone=1, top_k=3)
+    assert sorted(related.tolist()) == [1, 2]
+
+
+def test_matches_brute_force():
+    vectors = unit_vectors(60, seed=1)
+    job_zone = np.random.default_rng(2).integers(1, 6, 60)
+    table = NeighborTable.build(vectors, job_zone, k=5, memory_mb=0.001)
+    for row in range(60):
+        for zone in (1, 2, 3, 4, 5):
+            related, scores = table.lookup(row, max_job_zone=zone, top_k=5)
+            assert related.tolist() == brute_force(vectors, job_zone, row, zone, 5)
+            assert np.all(np.diff(scores) <= 1e-3)
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.encoder import Encoder, is_uncased
+from app.services.engine import CareerEngine, normalize_query
+from benchmarks.common import HashEncoder
+from tests.conftest import DIM
+
+
+class UncasedEncoder(HashEncoder):
+    """HashEncoder behind a lowercasing tokenizer, like an uncased BERT."""
+
+    tokenizer = SimpleNamespace(do_lower_case=True)
+
+    def _vector(self, text):
+        return super()._vector(text.lower())
+
+
+def test_normalize_query():
+    assert normalize_query("  Data \t Scientists\n") == "Data Scientists"
+    assert normalize_query("  Data \t Scientists\n", lowercase=True) == "data scientists"
+
+
+def test_is_uncased():
+    assert is_uncased(UncasedEncoder(DIM))
+    assert is_uncased(Encoder(UncasedEncoder(DIM), "float32", "stub"))
+    assert not is_uncased(HashEncoder(DIM))
+    assert not is_uncased(SimpleNamespace(tokenizer=SimpleNamespace(do_lower_case=False)))
+
+
+@pytest.mark.parametrize("model, shared", [(HashEncoder(DIM), False), (UncasedEncoder(DIM), True)])
+def test_embedding_cache_folds_case_only_for_uncased_models(qdrant, model, shared):
+    engine = CareerEngine(model=model, client=qdrant)
+    try:
+        first = engine.encode_query("Go  developer")
+        assert len(engine.embedding_cache) == 1
+        # Spacing never changes the key
+        np.testing.assert_array_equal(engine.encode_query("Go developer "), first)
+        assert len(engine.embedding_cache) == 1
+        lower = engine.encode_query("go developer")
+        assert len(engine.embedding_cache) == (1 if shared else 2)
+        # Whichever key the query got, its vector is the one the model produces for it
+        np.testing.assert_allclose(lower, model.encode("go developer"), rtol=1e-6)
+    finally:
+        engine.encode_executor.shutdown(wait=False)
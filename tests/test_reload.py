@@ -0,0 +1,65 @@
+import pytest
+
+from app.core.config import settings
+from app.main import service_container
+from app.services.local_index import read_meta
+from tests.conftest import JOBS, write_local_store
+from tests.test_api import call
+
+RENAMED = [{**job, "title": "Nurse Practitioners"} if job["soc_code"] == "29-1141.00" else job for job in JOBS]
+
+
+@pytest.fixture
+def local_engine(encoder, monkeypatch):
+    from app.services.engine import CareerEngine
+
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 0)
+    write_local_store(encoder)
+    engine = CareerEngine(model=encoder, use_qdrant=False)
+    monkeypatch.setitem(service_container, "engine", engine)
+    yield engine
+    engine.encode_executor.shutdown(wait=False)
+
+
+def top_title(engine, text):
+    return engine.search(text, top_k=1)[0]["title"]
+
+
+def test_reload_swaps_in_a_rebuilt_store(local_engine, encoder):
+    version = local_engine.index_version
+    old_snapshot = local_engine.local_index
+    assert top_title(local_engine, "nurse practitioners") != "Nurse Practitioners"
+
+    write_local_store(encoder, RENAMED)
+    # Nothing changes until the reload
+    assert local_engine.index_version == version
+
+    result = local_engine.reload_index()
+    assert result == {"reloaded": True, "version": read_meta()["version"], "previous_version": version}
+    assert local_engine.index_version == read_meta()["version"] != version
+    assert top_title(local_engine, "nurse practitioners") == "Nurse Practitioners"
+    # A search that already held the old snapshot keeps reading it
+    assert old_snapshot.search(encoder.encode("registered nurses"), top_k=1)[0]["title"] == "Registered Nurses"
+
+    assert local_engine.reload_index()["reloaded"] is False
+
+
+def test_admin_reload_requires_the_token(local_engine, encoder, monkeypatch):
+    version = local_engine.index_version
+    write_local_store(encoder, RENAMED)
+
+    (disabled,) = call(("POST", "/api/admin/reload", {"headers": {"X-Admin-Token": "anything"}}))
+    assert disabled.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    missing, wrong = call(
+        ("POST", "/api/admin/reload", {}),
+        ("POST", "/api/admin/reload", {"headers": {"X-Admin-Token": "s3cret-not"}}),
+    )
+    assert missing.status_code == wrong.status_code == 401
+    assert local_engine.index_version == version
+
+    (reloaded,) = call(("POST", "/api/admin/reload", {"headers": {"X-Admin-Token": "s3cret"}}))
+    assert reloaded.status_code == 200
+    assert reloaded.json()["reloaded"] is True
+    assert local_engine.index_version == reloaded.json()["version"] != version
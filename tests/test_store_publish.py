@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import ann, neighbors
+from app.services.local_index import LocalIndex, LocalIndexWriter, quantize_store, read_meta
+
+COUNT = 200
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """A published store without derived files, and a snapshot mapped from it like a worker's."""
+    monkeypatch.setattr(settings, "LOCAL_ANN_ENABLED", False)
+    monkeypatch.setattr(settings, "LOCAL_NEIGHBORS_K", 0)
+    rng = np.random.default_rng(0)
+    writer = LocalIndexWriter()
+    ids = [f"id-{i}" for i in range(COUNT)]
+    writer.append(
+        rng.standard_normal((COUNT, 16)).astype(np.float32), job_zone=rng.integers(1, 6, COUNT),
+        ids=ids, titles=ids, education=[""] * COUNT, descriptions=[""] * COUNT,
+    )
+    writer.finalize()
+    snapshot = LocalIndex.load(use_ann=False, vector_dtype="float32")
+    return snapshot, np.array(snapshot.vectors), vectors_inode()
+
+
+def vectors_inode():
+    return os.stat(os.path.join(settings.LOCAL_INDEX_DIR, "vectors.npy")).st_ino
+
+
+def assert_republished(snapshot, vectors_before, inode):
+    assert read_meta()["version"] != snapshot.version
+    # The old snapshot is untouched, and unchanged files are shared with the new store
+    np.testing.assert_array_equal(snapshot.vectors, vectors_before)
+    assert vectors_inode() == inode
+    assert not [d for d in os.listdir(settings.DATA_DIR) if ".tmp-" in d or ".old-" in d]
+
+
+def test_ann_build_publishes_a_new_version(store):
+    index, ivf, version = ann.build_for_store(nlist=8)
+    assert_republished(*store)
+    assert read_meta()["version"] == version
+    reloaded = LocalIndex.load(use_ann=True)
+    assert reloaded.ann is not None and reloaded.ann.nlist == 8
+    assert read_meta()["derived"] == {"ann_nlist": 8}
+
+
+def test_quantize_publishes_a_new_version(store):
+    version = quantize_store("int8")
+    assert_republished(*store)
+    assert read_meta()["version"] == version
+    reloaded = LocalIndex.load(use_ann=False, vector_dtype="int8")
+    assert reloaded.quantized is not None and reloaded.quantized.dtype == "int8"
+    # Quantizing again writes fresh files instead of rewriting the mapped ones
+    codes = reloaded.quantized.codes.copy()
+    quantize_store("int8")
+    np.testing.assert_array_equal(reloaded.quantized.codes, codes)
+
+
+def test_neighbors_build_publishes_a_new_version(store):
+    table, version = neighbors.build_for_store(k=4)
+    assert_republished(*store)
+    assert read_meta()["version"] == version
+    assert read_meta()["derived"] == {"neighbors_k": 4}
+    reloaded = LocalIndex.load(use_ann=False)
+    assert reloaded.neighbors is not None and reloaded.neighbors.k == 4
+    # Rebuilding with another k leaves the table a running worker has mapped alone
+    rows = reloaded.neighbors.rows.copy()
+    neighbors.build_for_store(k=2)
+    np.testing.assert_array_equal(reloaded.neighbors.rows, rows)